@@ -5,6 +5,7 @@ import paramiko
 from scp import SCPClient
 
 from util import do_json_post
+from util.profile_summary import MERGED_FILENAME, merge_profiles, summarize, write_collapsed
 from util.state_dump import collect_state_dump
 
 HOST_IP = '192.168.0.10'
@@ -15,6 +16,9 @@ PAUSE_UPDATES_ROUTE = DEVICE_PLUGIN_ROUTE + 'setPausePluginUpdates'
 
 TEMPLATE_PLUGIN_PATH = '/data/plugins/template-plugin/template-plugin'
 TEMPLATE_PLUGIN_ENV_PATH = '/data/plugins/template-plugin/.env'
+TEMPLATE_PLUGIN_PROFILES_PATH = '/data/plugins/template-plugin/profiles'
+
+LOCAL_PROFILES_DIR = 'profiles'
 
 CACHE_DIR = '/data/cache'
 
@@ -82,6 +86,20 @@ def dump_cache():
     with SCPClient(ssh.get_transport()) as scp:
       scp.get(CACHE_DIR, recursive=True)
 
+def pull_profiles():
+  with paramiko.SSHClient() as ssh:
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(HOST_IP, username='root', password="", look_for_keys=False, allow_agent=False)
+
+    with SCPClient(ssh.get_transport()) as scp:
+      scp.get(TEMPLATE_PLUGIN_PROFILES_PATH, local_path='.', recursive=True)
+
+  counts = merge_profiles(LOCAL_PROFILES_DIR)
+  merged_path = f'{LOCAL_PROFILES_DIR}/{MERGED_FILENAME}'
+  write_collapsed(counts, merged_path)
+  print(summarize(counts))
+  print(f'Wrote flamegraph input to {merged_path}')
+
 if __name__ == '__main__':
   parser = argparse.ArgumentParser(description="Local dev tooling for Bee Plugin development.")
 
@@ -93,6 +111,7 @@ if __name__ == '__main__':
   parser.add_argument('-f', '--populate_fixture', help="Populate fixture data", type=str)
   parser.add_argument('-d', '--dump_cache', help='Copy cache contents to local machine', action='store_true')
   parser.add_argument('-sd', '--state_dump', help='Collect state dump from device', action='store_true')
+  parser.add_argument('-p', '--pull_profiles', help='Pull sampling profiles from device and summarize', action='store_true')
 
   args = parser.parse_args()
 
@@ -126,6 +145,9 @@ if __name__ == '__main__':
   if args.dump_cache:
     dump_cache()
 
+  if args.pull_profiles:
+    pull_profiles()
+
   if args.state_dump:
     zip_filename = collect_state_dump(HOST_IP)
     if zip_filename:
@@ -1,6 +1,30 @@
-from . import embeddings, recordings, secrets
+from . import (
+    clustering,
+    decimation,
+    depth,
+    device,
+    embeddings,
+    events,
+    feed,
+    frames,
+    geo,
+    governor,
+    localdb,
+    outbox,
+    precision,
+    profiler,
+    recordings,
+    records,
+    resilience,
+    response_cache,
+    result_cache,
+    s3,
+    secrets,
+    upload_queue,
+)
 from .embeddings import DimensionMismatchError, EmbeddingsError
 from .image_cache import (
+    ImageCacheError,
     disable_image_collection,
     disable_stereo_collection,
     enable_image_collection,
@@ -22,6 +46,7 @@ __all__ = [
     "purge_data",
     "list_contents",
     "upload_to_s3",
+    "ImageCacheError",
     "secrets",
     "SecretsError",
     "DecryptionError",
@@ -29,6 +54,25 @@ __all__ = [
     "SecretsNotFoundError",
     "embeddings",
     "recordings",
+    "records",
+    "result_cache",
+    "profiler",
+    "governor",
+    "frames",
+    "localdb",
+    "outbox",
+    "geo",
+    "decimation",
+    "depth",
+    "clustering",
+    "events",
+    "feed",
+    "precision",
+    "resilience",
+    "response_cache",
+    "device",
+    "upload_queue",
+    "s3",
     "EmbeddingsError",
     "DimensionMismatchError",
     "RecordingsError",
@@ -1,2 +1,5 @@
-ODC_HOST = "http://127.0.0.1:5000"
+import os
+
+# Overridable so beeutil can target a stand-in server (see util/odc_server.py).
+ODC_HOST = os.environ.get("BEE_ODC_HOST", "http://127.0.0.1:5000")
 ODC_API_BASE = f"{ODC_HOST}/api/1"
@@ -0,0 +1,204 @@
+"""Clustering: streaming scene clusters for summary uploads.
+
+``SceneClusters`` runs spherical mini-batch k-means over frame embeddings,
+one ``partial_fit`` per fetch window. Memory is fixed: ``k`` centroids, one
+representative vector per cluster, and the best frame per (time bucket,
+cluster) for at most ``max_buckets`` open buckets. Centroids are seeded
+farthest-first from the first frames seen and then move by per-cluster
+running means (learning rate 1 / count).
+
+Representatives are the frames closest to their cluster's centroid: overall
+(``representatives``) and per time bucket (``pop_completed``), which lets an
+upload path send up to ``k`` frames per bucket that cover the drive's visual
+variety.
+
+Usage:
+  clusters = beeutil.clustering.SceneClusters(k=8, time_bucket_ms=60_000)
+  clusters.partial_fit_frames(beeutil.embeddings.list_embeddings(since_ms=cursor + 1))
+  for handle in clusters.pop_completed(now_ms):
+      upload(handle)
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Sequence
+
+import numpy as np
+
+from .embeddings import DimensionMismatchError, FrameEmbedding
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+DEFAULT_K = 8
+DEFAULT_TIME_BUCKET_MS = 60_000
+DEFAULT_MAX_BUCKETS = 64
+
+
+class SceneClusters:
+    """Incremental spherical k-means with per-cluster and per-bucket representatives."""
+
+    def __init__(
+        self,
+        k: int = DEFAULT_K,
+        time_bucket_ms: int = DEFAULT_TIME_BUCKET_MS,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ) -> None:
+        """
+        Args:
+            k: Number of clusters, i.e. the most frames kept per time bucket.
+            time_bucket_ms: Width of the time buckets representatives are kept for.
+            max_buckets: Open buckets kept before the oldest is dropped.
+        """
+        self.k = k
+        self.time_bucket_ms = time_bucket_ms
+        self.max_buckets = max_buckets
+        self.centroids: npt.NDArray[np.float32] | None = None
+        self.counts = np.zeros(k, dtype=np.int64)
+        self._n_seeded = 0
+        self._rep_vectors: npt.NDArray[np.float32] | None = None
+        self._rep_names: list[str | None] = [None] * k
+        # bucket -> {cluster: (similarity, timestamp_ms, image_name)}
+        self._buckets: OrderedDict[int, dict[int, tuple[float, int, str]]] = OrderedDict()
+
+    @property
+    def n_clusters(self) -> int:
+        return self._n_seeded
+
+    def _allocate(self, dim: int) -> None:
+        self.centroids = np.zeros((self.k, dim), dtype=np.float32)
+        self._rep_vectors = np.zeros((self.k, dim), dtype=np.float32)
+
+    def _seed(self, x: npt.NDArray[np.float32]) -> None:
+        """Farthest-first: add the frame least similar to existing centroids until k are set."""
+        assert self.centroids is not None
+        if self._n_seeded:
+            best = np.max(x @ self.centroids[: self._n_seeded].T, axis=1)
+        else:
+            best = np.full(len(x), -np.inf, dtype=np.float32)
+        while self._n_seeded < self.k:
+            i = int(np.argmin(best))
+            if self._n_seeded and best[i] >= 1.0 - 1e-6:
+                break  # every remaining frame duplicates a centroid
+            self.centroids[self._n_seeded] = x[i]
+            self._n_seeded += 1
+            best = np.maximum(best, x @ x[i])
+
+    def partial_fit(
+        self,
+        vectors: npt.NDArray[np.floating[Any]],
+        timestamps_ms: Sequence[int],
+        image_names: Sequence[str],
+    ) -> npt.NDArray[np.intp]:
+        """Fold one time-ordered batch in. Returns each frame's cluster (-1 for zero vectors)."""
+        assignments = np.full(len(vectors), -1, dtype=np.intp)
+        if not len(vectors):
+            return assignments
+        x = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(x, axis=1)
+        valid = norms > 0
+        if not valid.any():
+            return assignments
+        x = x[valid] / norms[valid, None]
+        if self.centroids is None:
+            self._allocate(x.shape[1])
+        elif self.centroids.shape[1] != x.shape[1]:
+            raise DimensionMismatchError(
+                f"Vector dimensions do not match: {x.shape[1]} vs {self.centroids.shape[1]}",
+            )
+        assert self.centroids is not None
+        assert self._rep_vectors is not None
+
+        if self._n_seeded < self.k:
+            self._seed(x)
+        n = self._n_seeded
+        centroids = self.centroids[:n]
+
+        labels = np.argmax(x @ centroids.T, axis=1)
+        batch_counts = np.bincount(labels, minlength=n)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        touched = batch_counts > 0
+        self.counts[:n] += batch_counts
+        # Running mean: c += (sum_x - m * c) / count, then back onto the unit sphere
+        centroids[touched] += (
+            sums[touched] - batch_counts[touched, None] * centroids[touched]
+        ) / self.counts[:n][touched, None]
+        centroids[touched] /= np.linalg.norm(centroids[touched], axis=1, keepdims=True)
+
+        sims = np.einsum("ij,ij->i", x, centroids[labels])
+        names = [name for name, v in zip(image_names, valid.tolist()) if v]
+        times = [int(t) for t, v in zip(timestamps_ms, valid.tolist()) if v]
+        self._update_representatives(x, labels, sims, names)
+        self._update_buckets(labels, sims, names, times)
+
+        assignments[np.nonzero(valid)[0]] = labels
+        return assignments
+
+    def partial_fit_frames(self, frames: list[FrameEmbedding]) -> npt.NDArray[np.intp]:
+        ordered = sorted(frames, key=lambda f: f["timestamp_ms"])
+        if not ordered:
+            return np.empty(0, dtype=np.intp)
+        return self.partial_fit(
+            np.array([f["embeddings"] for f in ordered], dtype=np.float32),
+            [f["timestamp_ms"] for f in ordered],
+            [f["image_name"] for f in ordered],
+        )
+
+    def _update_representatives(
+        self,
+        x: npt.NDArray[np.float32],
+        labels: npt.NDArray[np.intp],
+        sims: npt.NDArray[np.float32],
+        names: list[str],
+    ) -> None:
+        assert self.centroids is not None
+        assert self._rep_vectors is not None
+        # Stored representatives are re-scored against the moved centroids.
+        current = np.einsum("ij,ij->i", self._rep_vectors, self.centroids)
+        for cluster in np.unique(labels).tolist():
+            members = np.nonzero(labels == cluster)[0]
+            best = int(members[np.argmax(sims[members])])
+            if self._rep_names[cluster] is None or sims[best] > current[cluster]:
+                self._rep_vectors[cluster] = x[best]
+                self._rep_names[cluster] = names[best]
+
+    def _update_buckets(
+        self,
+        labels: npt.NDArray[np.intp],
+        sims: npt.NDArray[np.float32],
+        names: list[str],
+        times: list[int],
+    ) -> None:
+        for label, sim, name, t in zip(labels.tolist(), sims.tolist(), names, times):
+            bucket_id = t // self.time_bucket_ms
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                bucket = self._buckets[bucket_id] = {}
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            held = bucket.get(label)
+            if held is None or sim > held[0]:
+                bucket[label] = (sim, t, name)
+
+    def representatives(self) -> list[str]:
+        """Frame closest to each cluster's centroid, in cluster order."""
+        return [name for name in self._rep_names if name is not None]
+
+    def bucket_representatives(self) -> dict[int, list[str]]:
+        """Open buckets (by start ms) -> their representative names in time order."""
+        return {
+            bucket_id * self.time_bucket_ms: [
+                name for _, _, name in sorted(reps.values(), key=lambda r: r[1])
+            ]
+            for bucket_id, reps in self._buckets.items()
+        }
+
+    def pop_completed(self, now_ms: int) -> list[str]:
+        """Representatives of buckets that ended at or before ``now_ms``, removing them."""
+        names: list[str] = []
+        for bucket_id in [b for b in self._buckets if (b + 1) * self.time_bucket_ms <= now_ms]:
+            reps = self._buckets.pop(bucket_id)
+            names.extend(name for _, _, name in sorted(reps.values(), key=lambda r: r[1]))
+        return names
@@ -0,0 +1,144 @@
+"""Decimation: thin frames to one per N meters of travel before upload.
+
+Stopped or slow vehicles produce many frames of the same spot. A
+``Decimator`` keeps a frame once the vehicle has travelled ``distance_m``
+since the last kept frame, or turned by ``heading_change_deg``, and never
+keeps two frames closer than ``min_interval_ms`` apart. Step distances and
+bearings are computed for the whole batch with vectorized haversine; state
+carries over between batches so it can sit behind the ``list_contents``
+cursor.
+
+Usage:
+  decimator = beeutil.decimation.Decimator(distance_m=10)
+  handles = decimator.filter_names(beeutil.list_contents(since))
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+from .frames import FrameRecord, parse_frame_name
+from .geo import bearing_deg, haversine_m
+
+DEFAULT_DISTANCE_M = 10.0
+DEFAULT_MIN_INTERVAL_MS = 0
+DEFAULT_HEADING_CHANGE_DEG = 30.0
+
+# Steps shorter than this are GNSS jitter and do not update the heading.
+HEADING_MIN_STEP_M = 2.0
+
+
+def _angle_diff(a: float, b: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+class Decimator:
+    """Stateful distance / heading / time-gap frame thinning."""
+
+    def __init__(
+        self,
+        distance_m: float = DEFAULT_DISTANCE_M,
+        min_interval_ms: int = DEFAULT_MIN_INTERVAL_MS,
+        heading_change_deg: float | None = DEFAULT_HEADING_CHANGE_DEG,
+    ) -> None:
+        """
+        Args:
+            distance_m: Keep a frame after this much travel since the last kept one.
+            min_interval_ms: Never keep two frames closer together than this.
+            heading_change_deg: Keep a frame when the heading has turned this much
+                since the last kept one. None disables the heading trigger.
+        """
+        self.distance_m = distance_m
+        self.min_interval_ms = min_interval_ms
+        self.heading_change_deg = heading_change_deg
+        self.kept = 0
+        self.dropped = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._last: tuple[float, float] | None = None
+        self._last_kept_time: int | None = None
+        self._travelled = 0.0
+        self._heading: float | None = None
+        self._kept_heading: float | None = None
+
+    def keep_mask(
+        self, times: Sequence[int], lats: Sequence[float], lons: Sequence[float]
+    ) -> list[bool]:
+        """Which of these time-ordered frames to keep, advancing the decimator state."""
+        n = len(times)
+        if not n:
+            return []
+        lat = np.asarray(lats, dtype=np.float64)
+        lon = np.asarray(lons, dtype=np.float64)
+        if self._last is not None:
+            prev_lat = np.concatenate([[self._last[0]], lat[:-1]])
+            prev_lon = np.concatenate([[self._last[1]], lon[:-1]])
+        else:
+            prev_lat = np.concatenate([lat[:1], lat[:-1]])
+            prev_lon = np.concatenate([lon[:1], lon[:-1]])
+        steps = haversine_m(prev_lat, prev_lon, lat, lon).tolist()
+        bearings = bearing_deg(prev_lat, prev_lon, lat, lon).tolist()
+
+        keep = []
+        for t, step, bearing in zip(times, steps, bearings):
+            self._travelled += step
+            if step >= HEADING_MIN_STEP_M:
+                self._heading = bearing
+                if self._kept_heading is None:
+                    self._kept_heading = bearing
+
+            if self._last_kept_time is None:
+                decision = True
+            elif t - self._last_kept_time < self.min_interval_ms:
+                decision = False
+            elif self._travelled >= self.distance_m:
+                decision = True
+            else:
+                decision = (
+                    self.heading_change_deg is not None
+                    and self._heading is not None
+                    and self._kept_heading is not None
+                    and _angle_diff(self._heading, self._kept_heading) >= self.heading_change_deg
+                )
+
+            if decision:
+                self._last_kept_time = t
+                self._travelled = 0.0
+                self._kept_heading = self._heading
+            keep.append(decision)
+
+        self._last = (float(lat[-1]), float(lon[-1]))
+        n_kept = sum(keep)
+        self.kept += n_kept
+        self.dropped += n - n_kept
+        return keep
+
+    def filter_records(self, records: Sequence[FrameRecord]) -> list[FrameRecord]:
+        """Kept records, in time order."""
+        ordered = sorted(records, key=lambda r: r["time"])
+        keep = self.keep_mask(
+            [r["time"] for r in ordered],
+            [r["lat"] for r in ordered],
+            [r["lon"] for r in ordered],
+        )
+        return [r for r, k in zip(ordered, keep) if k]
+
+    def filter_names(self, names: Sequence[str]) -> list[str]:
+        """Kept ``<time>_<lat>_<lon>`` names in time order; unparseable names are kept."""
+        parsed = []
+        passthrough = []
+        for name in names:
+            try:
+                parsed.append((parse_frame_name(name), name))
+            except ValueError:
+                passthrough.append(name)
+        parsed.sort(key=lambda p: p[0][0])
+        keep = self.keep_mask(
+            [p[0][0] for p in parsed],
+            [p[0][1] for p in parsed],
+            [p[0][2] for p in parsed],
+        )
+        return [name for (_, name), k in zip(parsed, keep) if k] + passthrough
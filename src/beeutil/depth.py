@@ -0,0 +1,245 @@
+"""Depth: turn stereo/depth capture on only around predicted or active matches.
+
+``enable_stereo_collection`` is a global switch, and leaving it on multiplies
+cache I/O and storage. A ``DepthController`` wants depth while a match event
+is active (a match within ``hold_ms``, or an open event in an
+``EventDetector``) and while the vehicle is predicted to reach a target: the
+position and heading of recent frames are extrapolated ``lookahead_s`` ahead
+and any target within ``radius_m`` of that path counts. Targets are given up
+front and, by default, learned from the locations of trigger matches, so a
+second pass down the same road starts depth before the object is in view.
+
+The wanted state only reaches ``/cache/enableDepthFlag`` after holding for
+``debounce_ms``, and never sooner than ``min_on_ms`` / ``min_off_ms`` after
+the last switch, so the endpoint is not flapped.
+
+All times are capture time (frame ``timestamp_ms``), not the wall clock: the
+embeddings a plugin reads lag capture by the fetch interval, which can
+exceed ``hold_ms`` on its own.
+
+Usage:
+  depth = beeutil.depth.DepthController(targets=[(37.77, -122.42)])
+  matches, cursor = beeutil.embeddings.fetch_and_match(cursor + 1, qe, 0.8)
+  depth.update(matches, frames=beeutil.embeddings.list_embeddings(since_ms=cursor - 5000))
+"""
+
+from __future__ import annotations
+
+import collections
+import math
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .events import EventDetector
+from .geo import EARTH_RADIUS_M, haversine_m
+from .image_cache import ImageCacheError, disable_stereo_collection, enable_stereo_collection
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+LOOKAHEAD_S = 8.0
+RADIUS_M = 40.0
+HOLD_MS = 5000
+DEBOUNCE_MS = 1000
+MIN_ON_MS = 15000
+MIN_OFF_MS = 5000
+MAX_TARGETS = 512
+
+# Frames kept for heading/speed, and how far apart they must be to trust a heading.
+TRACK_FRAMES = 16
+MIN_TRACK_M = 5.0
+MAX_TRACK_AGE_MS = 10000
+
+Target = Tuple[float, float]  # (lat, lon)
+
+
+class DepthController:
+    """Debounced, dwell-limited stereo toggle driven by matches and position."""
+
+    def __init__(
+        self,
+        targets: Sequence[Target] = (),
+        detector: EventDetector | None = None,
+        trigger_threshold: float | None = None,
+        learn_targets: bool = True,
+        lookahead_s: float = LOOKAHEAD_S,
+        radius_m: float = RADIUS_M,
+        hold_ms: int = HOLD_MS,
+        debounce_ms: int = DEBOUNCE_MS,
+        min_on_ms: int = MIN_ON_MS,
+        min_off_ms: int = MIN_OFF_MS,
+        enable: Callable[[], Any] = enable_stereo_collection,
+        disable: Callable[[], Any] = disable_stereo_collection,
+    ) -> None:
+        """
+        Args:
+            targets: Known object locations to start depth ahead of.
+            detector: Event detector the plugin updates; open events keep depth on.
+            trigger_threshold: Lowest match score that counts; None counts every match.
+            learn_targets: Add trigger match locations to the targets.
+            lookahead_s: How far ahead (in travel time) to predict.
+            radius_m: Distance from the predicted path within which a target counts.
+            hold_ms: Keep depth wanted this long after the last trigger match.
+            debounce_ms: The wanted state must hold this long before switching.
+            min_on_ms, min_off_ms: Least time between switches in each state.
+            enable, disable: Toggles, overridable for tests or other endpoints.
+        """
+        self.detector = detector
+        self.trigger_threshold = trigger_threshold
+        self.learn_targets = learn_targets
+        self.lookahead_s = lookahead_s
+        self.radius_m = radius_m
+        self.hold_ms = hold_ms
+        self.debounce_ms = debounce_ms
+        self.min_on_ms = min_on_ms
+        self.min_off_ms = min_off_ms
+        self._enable = enable
+        self._disable = disable
+        self._targets: collections.deque[Target] = collections.deque(maxlen=MAX_TARGETS)
+        self._targets.extend((float(lat), float(lon)) for lat, lon in targets)
+        self._track: collections.deque[tuple[int, float, float]] = collections.deque(
+            maxlen=TRACK_FRAMES
+        )
+        self._newest_ms = 0
+        self._last_trigger_ms: int | None = None
+        self._wanted_since_ms: int | None = None
+        self._wanted = False
+        self._switched_ms: int | None = None
+        self._on_since_ms: int | None = None
+        self.enabled = False
+        self.switches = 0
+        self.errors = 0
+        self.on_ms = 0
+
+    @property
+    def targets(self) -> list[Target]:
+        return list(self._targets)
+
+    def observe(self, frames: Iterable[Mapping[str, Any]]) -> None:
+        """Track position from frames (anything with timestamp_ms, lat and lon)."""
+        for frame in sorted(frames, key=lambda f: int(f["timestamp_ms"])):
+            ts = int(frame["timestamp_ms"])
+            self._newest_ms = max(self._newest_ms, ts)
+            if self._track and ts <= self._track[-1][0]:
+                continue
+            self._track.append((ts, float(frame["lat"]), float(frame["lon"])))
+
+    def _trigger(self, matches: Iterable[Mapping[str, Any]]) -> None:
+        for match in matches:
+            if self.trigger_threshold is not None and match["score"] < self.trigger_threshold:
+                continue
+            ts = int(match["timestamp_ms"])
+            if self._last_trigger_ms is None or ts > self._last_trigger_ms:
+                self._last_trigger_ms = ts
+            if self.learn_targets:
+                self._learn((float(match["lat"]), float(match["lon"])))
+
+    def _learn(self, target: Target) -> None:
+        if self._targets:
+            known = np.array(self._targets)
+            nearest = haversine_m(target[0], target[1], known[:, 0], known[:, 1]).min()
+            if nearest <= self.radius_m / 2:
+                return
+        self._targets.append(target)
+
+    def motion(self) -> tuple[float, float, float, float] | None:
+        """(lat, lon, heading_deg, speed_mps) from recent frames, or None if unknown."""
+        if len(self._track) < 2:
+            return None
+        ts, lat, lon = self._track[-1]
+        for prev_ts, prev_lat, prev_lon in reversed(list(self._track)[:-1]):
+            if ts - prev_ts > MAX_TRACK_AGE_MS:
+                break
+            x, y = _local_xy(prev_lat, prev_lon, np.array([lat]), np.array([lon]))
+            distance = math.hypot(float(x[0]), float(y[0]))
+            if distance >= MIN_TRACK_M and ts > prev_ts:
+                heading = math.degrees(math.atan2(float(x[0]), float(y[0]))) % 360.0
+                return lat, lon, heading, distance / ((ts - prev_ts) / 1000)
+        return None
+
+    def predicted(self, now_ms: int) -> bool:
+        """Whether a target lies on (or next to) the path ahead of a recent frame."""
+        if not self._targets or not self._track:
+            return False
+        ts, lat, lon = self._track[-1]
+        if now_ms - ts > MAX_TRACK_AGE_MS:
+            return False
+        known = np.array(self._targets)
+        x, y = _local_xy(lat, lon, known[:, 0], known[:, 1])
+        if (np.hypot(x, y) <= self.radius_m).any():
+            return True
+        moving = self.motion()
+        if moving is None:
+            return False
+        heading = math.radians(moving[2])
+        along = x * math.sin(heading) + y * math.cos(heading)
+        across = np.abs(x * math.cos(heading) - y * math.sin(heading))
+        reach = moving[3] * self.lookahead_s
+        return bool(((along >= 0) & (along <= reach) & (across <= self.radius_m)).any())
+
+    def active(self, now_ms: int) -> bool:
+        """Whether a match event is in progress."""
+        if self.detector is not None and self.detector.open_labels:
+            return True
+        return self._last_trigger_ms is not None and now_ms - self._last_trigger_ms <= self.hold_ms
+
+    def update(
+        self,
+        matches: Iterable[Mapping[str, Any]] = (),
+        frames: Iterable[Mapping[str, Any]] = (),
+        now_ms: int | None = None,
+    ) -> bool:
+        """Fold in new matches and frames, switch depth if due, and return its state.
+
+        Matches also count as frames for position tracking. ``now_ms`` is in
+        capture time and defaults to the newest frame or match timestamp seen.
+        """
+        matches = list(matches)
+        self.observe(list(frames) + matches)
+        self._trigger(matches)
+        now_ms = self._newest_ms if now_ms is None else now_ms
+
+        wanted = self.active(now_ms) or self.predicted(now_ms)
+        if wanted != self._wanted:
+            self._wanted = wanted
+            self._wanted_since_ms = now_ms
+        if wanted == self.enabled or self._wanted_since_ms is None:
+            return self.enabled
+        if now_ms - self._wanted_since_ms < self.debounce_ms:
+            return self.enabled
+        dwell = self.min_on_ms if self.enabled else self.min_off_ms
+        if self._switched_ms is not None and now_ms - self._switched_ms < dwell:
+            return self.enabled
+        self._switch(wanted, now_ms)
+        return self.enabled
+
+    def _switch(self, on: bool, now_ms: int) -> None:
+        try:
+            (self._enable if on else self._disable)()
+        except ImageCacheError:
+            # Leave the state alone; the next update() retries.
+            self.errors += 1
+            return
+        if on:
+            self._on_since_ms = now_ms
+        elif self._on_since_ms is not None:
+            self.on_ms += now_ms - self._on_since_ms
+            self._on_since_ms = None
+        self.enabled = on
+        self._switched_ms = now_ms
+        self.switches += 1
+
+    def close(self, now_ms: int | None = None) -> None:
+        """Turn depth off if this controller turned it on, e.g. on shutdown."""
+        if self.enabled:
+            self._switch(False, self._newest_ms if now_ms is None else now_ms)
+
+
+def _local_xy(
+    lat0: float, lon0: float, lats: npt.NDArray[np.float64], lons: npt.NDArray[np.float64]
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """East/north offsets in meters from (lat0, lon0), equirectangular."""
+    x = np.radians(lons - lon0) * math.cos(math.radians(lat0)) * EARTH_RADIUS_M
+    y = np.radians(lats - lat0) * EARTH_RADIUS_M
+    return x, y
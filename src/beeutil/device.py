@@ -0,0 +1,44 @@
+"""Device: identity and firmware info from odc-api."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import requests
+
+from . import resilience
+from ._constants import ODC_API_BASE
+from .response_cache import cache
+
+TIMEOUT = 10
+
+
+class DeviceError(Exception):
+    """Error querying device info."""
+
+
+def _fetch_info() -> dict[str, Any]:
+    try:
+        resp = resilience.get(f"{ODC_API_BASE}/info", endpoint="info", timeout=TIMEOUT)
+    except requests.RequestException as e:
+        raise DeviceError(f"Failed to reach odc-api: {e}") from e
+
+    if resp.status_code != 200:
+        raise DeviceError(
+            f"odc-api error {resp.status_code}: {resp.text}",
+        )
+
+    try:
+        data = resp.json()
+    except ValueError as e:
+        raise DeviceError("Invalid JSON response from odc-api") from e
+
+    if not isinstance(data, dict):
+        raise DeviceError(f"Expected object, got {type(data).__name__}")
+
+    return data
+
+
+def info() -> dict[str, Any]:
+    """Device info (serial, firmware, ...), cached for response_cache.TTLS["info"] seconds."""
+    return cache.cached("info", ODC_API_BASE, _fetch_info)
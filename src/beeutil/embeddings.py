@@ -2,12 +2,25 @@
 
 from __future__ import annotations
 
-from typing import TypedDict
+import hashlib
+import os
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypedDict, overload
 
 import numpy as np
 import requests
 
+from . import precision as _precision
+from . import resilience
 from ._constants import ODC_API_BASE
+from .parallel import score_hits, score_hits_sharded
+from .records import EmbeddingRecord, MatchBatch, MatchRecord, QueryRecord, R
+from .result_cache import query_key
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from .geo import Geofence
+    from .result_cache import Hits, ResultCache
 
 
 class QueryEmbedding(TypedDict):
@@ -35,6 +48,17 @@ class Match(TypedDict):
 
 TIMEOUT = 10
 
+# Batches smaller than this are scored in-process even when processes > 1.
+PARALLEL_MIN_FRAMES = 2048
+
+# Default scoring precision: float64, float32, float16 or int8 (see beeutil.precision).
+PRECISION = os.environ.get("BEE_EMBEDDINGS_PRECISION", "float64")
+
+# NearDuplicateFilter defaults: similarity to a recently kept frame that counts
+# as a duplicate, and how many recently kept frames to compare against.
+DEDUP_THRESHOLD = 0.97
+DEDUP_WINDOW = 8
+
 
 class EmbeddingsError(Exception):
     """Base exception for embeddings operations."""
@@ -44,14 +68,45 @@ class DimensionMismatchError(EmbeddingsError):
     """Vectors have incompatible dimensions."""
 
 
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    as_records: Literal[False] = ...,
+) -> list[FrameEmbedding]: ...
+
+
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    *,
+    as_records: Literal[True],
+) -> list[EmbeddingRecord]: ...
+
+
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    as_records: bool = ...,
+) -> list[FrameEmbedding] | list[EmbeddingRecord]: ...
+
+
 def list_embeddings(
     since_ms: int | None = None,
     until_ms: int | None = None,
-) -> list[FrameEmbedding]:
-    """Query scene embeddings from odc-api."""
+    as_records: bool = False,
+) -> list[FrameEmbedding] | list[EmbeddingRecord]:
+    """Query scene embeddings from odc-api.
+
+    Args:
+        as_records: Return slotted beeutil.records.EmbeddingRecord objects.
+    """
     try:
-        resp = requests.get(
+        resp = resilience.get(
             f"{ODC_API_BASE}/embeddings",
+            endpoint="embeddings",
             params={"since": since_ms, "until": until_ms},
             timeout=TIMEOUT,
         )
@@ -73,14 +128,39 @@ def list_embeddings(
             f"Expected list, got {type(items).__name__}",
         )
 
+    if as_records:
+        return _to_records(EmbeddingRecord, items)
     return items
 
 
-def load_query_embeddings(plugin_name: str) -> list[QueryEmbedding]:
-    """Load query embeddings from the plugin data store."""
+@overload
+def load_query_embeddings(
+    plugin_name: str, as_records: Literal[False] = ...
+) -> list[QueryEmbedding]: ...
+
+
+@overload
+def load_query_embeddings(plugin_name: str, as_records: Literal[True]) -> list[QueryRecord]: ...
+
+
+@overload
+def load_query_embeddings(
+    plugin_name: str, as_records: bool = ...
+) -> list[QueryEmbedding] | list[QueryRecord]: ...
+
+
+def load_query_embeddings(
+    plugin_name: str, as_records: bool = False
+) -> list[QueryEmbedding] | list[QueryRecord]:
+    """Load query embeddings from the plugin data store.
+
+    Args:
+        as_records: Return slotted beeutil.records.QueryRecord objects.
+    """
     try:
-        resp = requests.get(
+        resp = resilience.get(
             f"{ODC_API_BASE}/plugin/dataStore/{plugin_name}/queryEmbeddings",
+            endpoint="queryEmbeddings",
             timeout=TIMEOUT,
         )
     except requests.RequestException as e:
@@ -100,9 +180,18 @@ def load_query_embeddings(plugin_name: str) -> list[QueryEmbedding]:
     if not isinstance(items, list):
         raise EmbeddingsError("Response missing queryEmbeddings list")
 
+    if as_records:
+        return _to_records(QueryRecord, items)
     return items
 
 
+def _to_records(record_type: type[R], items: list[Any]) -> list[R]:
+    try:
+        return [record_type.from_dict(item) for item in items]
+    except (KeyError, TypeError) as e:
+        raise EmbeddingsError(f"Malformed {record_type.__name__}: {e}") from e
+
+
 def cosine_similarity(a: list[float], b: list[float]) -> float:
     """Cosine similarity between two vectors. Normalizes inputs internally."""
     if len(a) != len(b):
@@ -113,24 +202,56 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
     return float(np.dot(a_arr, b_arr) / (np.linalg.norm(a_arr) * np.linalg.norm(b_arr)))
 
 
+@overload
+def find_matches(
+    frame_embedding: FrameEmbedding,
+    query_embeddings: list[QueryEmbedding],
+    default_threshold: float,
+    as_records: Literal[False] = ...,
+) -> list[Match]: ...
+
+
+@overload
 def find_matches(
     frame_embedding: FrameEmbedding,
     query_embeddings: list[QueryEmbedding],
     default_threshold: float,
-) -> list[Match]:
+    as_records: Literal[True],
+) -> list[MatchRecord]: ...
+
+
+@overload
+def find_matches(
+    frame_embedding: FrameEmbedding,
+    query_embeddings: list[QueryEmbedding],
+    default_threshold: float,
+    as_records: bool = ...,
+) -> list[Match] | list[MatchRecord]: ...
+
+
+def find_matches(
+    frame_embedding: FrameEmbedding,
+    query_embeddings: list[QueryEmbedding],
+    default_threshold: float,
+    as_records: bool = False,
+) -> list[Match] | list[MatchRecord]:
     """Compare a scene embedding against all query embeddings.
 
     Returns matches above threshold.
+
+    Args:
+        as_records: Return slotted beeutil.records.MatchRecord objects.
     """
     embedding_vector = frame_embedding["embeddings"]
-    matches: list[Match] = []
+    make: Callable[..., Any] = MatchRecord if as_records else Match
+    matches: list[Any] = []
 
     for qe in query_embeddings:
         threshold = qe.get("threshold", default_threshold)
         score = cosine_similarity(embedding_vector, qe["embedding"])
         if score >= threshold:
             matches.append(
-                Match(
+                make(
                     label=qe["label"],
                     score=score,
                     timestamp_ms=frame_embedding["timestamp_ms"],
@@ -143,17 +264,609 @@ def find_matches(
     return matches
 
 
+def _normalize_rows(matrix: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized: npt.NDArray[Any] = matrix / norms
+    return normalized
+
+
+def _query_matrix(
+    query_embeddings: list[QueryEmbedding],
+    default_threshold: float,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Row-normalized query matrix and per-row thresholds."""
+    dim = len(query_embeddings[0]["embedding"])
+    for qe in query_embeddings:
+        if len(qe["embedding"]) != dim:
+            raise DimensionMismatchError(
+                f"Vector dimensions do not match: {dim} vs {len(qe['embedding'])}",
+            )
+    matrix = np.array([qe["embedding"] for qe in query_embeddings], dtype=np.float64)
+    thresholds = np.array(
+        [qe.get("threshold", default_threshold) for qe in query_embeddings],
+        dtype=np.float64,
+    )
+    return _normalize_rows(matrix), thresholds
+
+
+def _vector_hash(vector: npt.NDArray[np.float64]) -> str:
+    return hashlib.blake2b(vector.tobytes(), digest_size=8).hexdigest()
+
+
+class QuerySet:
+    """Query embeddings as a normalized matrix that reloads incrementally.
+
+    ``update`` diffs a new ``queryEmbeddings`` list against the current rows by
+    label and vector hash: changed vectors and thresholds are rewritten in
+    place, new labels are appended and removed labels are swapped out with the
+    last row. Rows keep their position while their label exists, so row order
+    is not the list order. ``version`` increases on every effective change and
+    ``content_hash`` identifies the contents for cache keys.
+    """
+
+    def __init__(self, query_embeddings: list[QueryEmbedding] | None = None) -> None:
+        self.version = 0
+        self.labels: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._hashes: list[str] = []
+        self._matrix = np.empty((0, 0), dtype=np.float64)
+        self._thresholds = np.empty(0, dtype=np.float64)
+        self._content_hash: str | None = None
+        self._encoded: dict[str, _precision.Encoded] = {}
+        if query_embeddings:
+            self.update(query_embeddings)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def dim(self) -> int:
+        return int(self._matrix.shape[1])
+
+    @property
+    def matrix(self) -> npt.NDArray[np.float64]:
+        """(n_queries, dim) row-normalized query vectors."""
+        return self._matrix[: len(self)]
+
+    def encoded(self, precision: str) -> _precision.Encoded:
+        """``matrix`` encoded for ``precision``, kept until the next change."""
+        encoded = self._encoded.get(precision)
+        if encoded is None:
+            encoded = self._encoded[precision] = _precision.encode(self.matrix, precision)
+        return encoded
+
+    def thresholds(self, default_threshold: float) -> npt.NDArray[np.float64]:
+        """Per-row thresholds, filling rows without one from ``default_threshold``."""
+        thresholds = self._thresholds[: len(self)]
+        filled: npt.NDArray[np.float64] = np.where(
+            np.isnan(thresholds), default_threshold, thresholds
+        )
+        return filled
+
+    @property
+    def content_hash(self) -> str:
+        """Order-independent hash of labels, vectors and thresholds."""
+        if self._content_hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for label in sorted(self.labels):
+                row = self._rows[label]
+                digest.update(label.encode())
+                digest.update(self._hashes[row].encode())
+                digest.update(self._thresholds[row : row + 1].tobytes())
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    def _grow(self, rows: int, dim: int) -> None:
+        capacity = len(self._matrix)
+        if rows <= capacity and dim == self.dim:
+            return
+        new_capacity = max(rows, 2 * capacity, 8)
+        matrix = np.zeros((new_capacity, dim), dtype=np.float64)
+        thresholds = np.full(new_capacity, np.nan)
+        if len(self):
+            matrix[: len(self)] = self._matrix[: len(self)]
+            thresholds[: len(self)] = self._thresholds[: len(self)]
+        self._matrix = matrix
+        self._thresholds = thresholds
+
+    def _remove(self, label: str) -> None:
+        row = self._rows.pop(label)
+        last = len(self.labels) - 1
+        if row != last:
+            moved = self.labels[last]
+            self._matrix[row] = self._matrix[last]
+            self._thresholds[row] = self._thresholds[last]
+            self._hashes[row] = self._hashes[last]
+            self.labels[row] = moved
+            self._rows[moved] = row
+        self.labels.pop()
+        self._hashes.pop()
+
+    def update(self, query_embeddings: list[QueryEmbedding]) -> bool:
+        """Apply a new query list. Returns True if anything changed.
+
+        Labels are the diff key; later duplicates of a label win.
+        """
+        incoming: dict[str, tuple[npt.NDArray[np.float64], float]] = {}
+        for qe in query_embeddings:
+            vector = np.asarray(qe["embedding"], dtype=np.float64)
+            threshold = qe.get("threshold")
+            incoming[qe["label"]] = (vector, np.nan if threshold is None else float(threshold))
+
+        dims = {len(vector) for vector, _ in incoming.values()}
+        if len(dims) > 1:
+            raise DimensionMismatchError(f"Vector dimensions do not match: {sorted(dims)}")
+        if dims and len(self) and dims != {self.dim}:
+            # A new embedding model: nothing carries over.
+            self.labels, self._rows, self._hashes = [], {}, []
+            self._matrix = np.empty((0, 0), dtype=np.float64)
+
+        changed = False
+        for label in [label for label in self.labels if label not in incoming]:
+            self._remove(label)
+            changed = True
+
+        for label, (vector, threshold) in incoming.items():
+            vector_hash = _vector_hash(vector)
+            row = self._rows.get(label)
+            if row is None:
+                row = len(self.labels)
+                self._grow(row + 1, len(vector))
+                self.labels.append(label)
+                self._hashes.append("")
+                self._rows[label] = row
+            if self._hashes[row] != vector_hash:
+                norm = np.linalg.norm(vector)
+                self._matrix[row] = vector / norm if norm else np.nan
+                self._hashes[row] = vector_hash
+                changed = True
+            same_threshold = self._thresholds[row] == threshold or (
+                np.isnan(self._thresholds[row]) and np.isnan(threshold)
+            )
+            if not same_threshold:
+                self._thresholds[row] = threshold
+                changed = True
+
+        if changed:
+            self.version += 1
+            self._content_hash = None
+            self._encoded = {}
+        return changed
+
+    def reload(self, plugin_name: str) -> bool:
+        """Fetch the plugin's queryEmbeddings and apply them with ``update``."""
+        return self.update(load_query_embeddings(plugin_name))
+
+
+def _resolve_queries(
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+) -> tuple[list[str], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """(labels, normalized query matrix, thresholds) for a query list or QuerySet."""
+    if isinstance(query_embeddings, QuerySet):
+        return (
+            list(query_embeddings.labels),
+            query_embeddings.matrix,
+            query_embeddings.thresholds(default_threshold),
+        )
+    queries, thresholds = _query_matrix(query_embeddings, default_threshold)
+    return [qe["label"] for qe in query_embeddings], queries, thresholds
+
+
+def _encoded_queries(
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    queries: npt.NDArray[np.float64],
+    precision: str,
+) -> _precision.Encoded:
+    """Encoded query matrix; a QuerySet encodes once per change and precision."""
+    if isinstance(query_embeddings, QuerySet):
+        return query_embeddings.encoded(precision)
+    return _precision.encode(queries, precision)
+
+
+def _frame_matrix(
+    frames: list[FrameEmbedding],
+    dim: int,
+    dtype: type[np.floating[Any]] = np.float64,
+) -> npt.NDArray[Any]:
+    """Row-normalized frame matrix. Zero vectors become NaN rows that never match."""
+    for frame in frames:
+        if len(frame["embeddings"]) != dim:
+            raise DimensionMismatchError(
+                f"Vector dimensions do not match: {len(frame['embeddings'])} vs {dim}",
+            )
+    matrix = np.array([frame["embeddings"] for frame in frames], dtype=dtype)
+    return _normalize_rows(matrix.reshape(len(frames), dim))
+
+
+def _score(
+    frame_matrix: npt.NDArray[Any],
+    queries: _precision.Encoded,
+    thresholds: npt.NDArray[np.float64],
+    processes: int | None,
+    precision: str,
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+    frames_enc, frame_scales = _precision.encode(frame_matrix, precision)
+    queries_enc, query_scales = queries
+    if processes is not None and processes > 1 and len(frame_matrix) >= PARALLEL_MIN_FRAMES:
+        return score_hits_sharded(
+            frames_enc, queries_enc, thresholds, processes, frame_scales, query_scales
+        )
+    return score_hits(frames_enc, queries_enc, thresholds, frame_scales, query_scales)
+
+
+@overload
+def find_matches_batch(
+    frames: list[FrameEmbedding],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: Literal[False] = ...,
+) -> list[Match]: ...
+
+
+@overload
+def find_matches_batch(
+    frames: list[FrameEmbedding],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    *,
+    as_batch: Literal[True],
+) -> MatchBatch: ...
+
+
+@overload
+def find_matches_batch(
+    frames: list[FrameEmbedding],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: bool = ...,
+) -> list[Match] | MatchBatch: ...
+
+
+def find_matches_batch(
+    frames: list[FrameEmbedding],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = None,
+    precision: str | None = None,
+    result_cache: ResultCache | None = None,
+    as_batch: bool = False,
+) -> list[Match] | MatchBatch:
+    """Score a batch of frames against all query embeddings with one matrix product.
+
+    Same result as calling find_matches per frame, in the same order (for a
+    QuerySet, labels follow its row order).
+
+    Args:
+        processes: Worker processes for batches of at least PARALLEL_MIN_FRAMES
+            frames. None or 1 keeps scoring in-process.
+        precision: float64, float32, float16 or int8 scoring (default PRECISION).
+            Scores differ from float64 by at most precision.MAX_SCORE_ERROR.
+        result_cache: Reuse stored hits for frames already scored against the
+            same queries (beeutil.result_cache.ResultCache); only new frames are scored.
+        as_batch: Return a columnar beeutil.records.MatchBatch instead of dicts.
+    """
+    if not frames or not len(query_embeddings):
+        return MatchBatch.empty() if as_batch else []
+
+    precision = _precision.check(precision or PRECISION)
+    labels, queries, thresholds = _resolve_queries(query_embeddings, default_threshold)
+    dtype = _precision.work_dtype(precision)
+
+    def score_frames(indices: npt.NDArray[np.intp] | None = None) -> Hits:
+        subset = frames if indices is None else [frames[i] for i in indices.tolist()]
+        frame_matrix = _frame_matrix(subset, queries.shape[1], dtype)
+        encoded = _encoded_queries(query_embeddings, queries, precision)
+        return _score(frame_matrix, encoded, thresholds, processes, precision)
+
+    if result_cache is None:
+        rows, cols, scores = score_frames()
+    else:
+        rows, cols, scores = result_cache.score(
+            query_key(labels, queries, thresholds, precision),
+            [f["timestamp_ms"] for f in frames],
+            [f["image_name"] for f in frames],
+            score_frames,
+        )
+
+    if as_batch:
+        hits = [frames[row] for row in rows.tolist()]
+        return MatchBatch.from_columns(
+            labels,
+            cols,
+            scores,
+            [f["timestamp_ms"] for f in hits],
+            [f["lat"] for f in hits],
+            [f["lon"] for f in hits],
+            [f["image_name"] for f in hits],
+        )
+
+    matches: list[Match] = []
+    for row, col, score in zip(rows.tolist(), cols.tolist(), scores.tolist()):
+        frame = frames[row]
+        matches.append(
+            Match(
+                label=labels[col],
+                score=score,
+                timestamp_ms=frame["timestamp_ms"],
+                lat=frame["lat"],
+                lon=frame["lon"],
+                image_name=frame["image_name"],
+            )
+        )
+    return matches
+
+
+@overload
+def find_matches_arrays(
+    vectors: npt.NDArray[np.floating[Any]],
+    timestamps_ms: npt.NDArray[np.int64],
+    lats: npt.NDArray[np.float64],
+    lons: npt.NDArray[np.float64],
+    image_names: list[str],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: Literal[False] = ...,
+) -> list[Match]: ...
+
+
+@overload
+def find_matches_arrays(
+    vectors: npt.NDArray[np.floating[Any]],
+    timestamps_ms: npt.NDArray[np.int64],
+    lats: npt.NDArray[np.float64],
+    lons: npt.NDArray[np.float64],
+    image_names: list[str],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    *,
+    as_batch: Literal[True],
+) -> MatchBatch: ...
+
+
+@overload
+def find_matches_arrays(
+    vectors: npt.NDArray[np.floating[Any]],
+    timestamps_ms: npt.NDArray[np.int64],
+    lats: npt.NDArray[np.float64],
+    lons: npt.NDArray[np.float64],
+    image_names: list[str],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: bool = ...,
+) -> list[Match] | MatchBatch: ...
+
+
+def find_matches_arrays(
+    vectors: npt.NDArray[np.floating[Any]],
+    timestamps_ms: npt.NDArray[np.int64],
+    lats: npt.NDArray[np.float64],
+    lons: npt.NDArray[np.float64],
+    image_names: list[str],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = None,
+    precision: str | None = None,
+    result_cache: ResultCache | None = None,
+    as_batch: bool = False,
+) -> list[Match] | MatchBatch:
+    """find_matches_batch over columnar frames, e.g. straight from beeutil.localdb.
+
+    Args:
+        vectors: (n_frames, dim) embedding matrix; need not be normalized.
+        result_cache: See find_matches_batch.
+    """
+    if not len(vectors) or not len(query_embeddings):
+        return MatchBatch.empty() if as_batch else []
+
+    labels, queries, thresholds = _resolve_queries(query_embeddings, default_threshold)
+    if vectors.ndim != 2 or vectors.shape[1] != queries.shape[1]:
+        raise DimensionMismatchError(
+            f"Vector dimensions do not match: {vectors.shape[-1]} vs {queries.shape[1]}",
+        )
+    precision = _precision.check(precision or PRECISION)
+    dtype = _precision.work_dtype(precision)
+
+    def score_frames(indices: npt.NDArray[np.intp] | None = None) -> Hits:
+        subset = vectors if indices is None else vectors[indices]
+        frame_matrix = _normalize_rows(subset.astype(dtype, copy=False))
+        encoded = _encoded_queries(query_embeddings, queries, precision)
+        return _score(frame_matrix, encoded, thresholds, processes, precision)
+
+    if result_cache is None:
+        rows, cols, scores = score_frames()
+    else:
+        rows, cols, scores = result_cache.score(
+            query_key(labels, queries, thresholds, precision),
+            timestamps_ms.tolist(),
+            image_names,
+            score_frames,
+        )
+
+    if as_batch:
+        return MatchBatch.from_columns(
+            labels,
+            cols,
+            scores,
+            timestamps_ms[rows],
+            lats[rows],
+            lons[rows],
+            [image_names[row] for row in rows.tolist()],
+        )
+    return [
+        Match(
+            label=labels[col],
+            score=score,
+            timestamp_ms=ts,
+            lat=lat,
+            lon=lon,
+            image_name=image_names[row],
+        )
+        for row, col, score, ts, lat, lon in zip(
+            rows.tolist(),
+            cols.tolist(),
+            scores.tolist(),
+            timestamps_ms[rows].tolist(),
+            lats[rows].tolist(),
+            lons[rows].tolist(),
+        )
+    ]
+
+
+class NearDuplicateFilter:
+    """Streaming near-duplicate suppression for consecutive frames.
+
+    Each frame is compared with a rolling window of recently kept frames in one
+    (window, dim) x (dim,) product and dropped if any similarity reaches the
+    threshold. State persists across calls, so the filter can sit behind the
+    fetch_and_match cursor. Frames with zero vectors are always kept.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, window: int = DEDUP_WINDOW) -> None:
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        self.threshold = threshold
+        self.window = window
+        self.kept = 0
+        self.dropped = 0
+        self._recent: npt.NDArray[np.float64] | None = None
+        self._filled = 0
+        self._next = 0
+
+    def reset(self) -> None:
+        self._recent = None
+        self._filled = 0
+        self._next = 0
+
+    def keep_mask(self, vectors: npt.NDArray[np.floating[Any]]) -> npt.NDArray[np.bool_]:
+        """Which rows of a time-ordered (n_frames, dim) matrix survive."""
+        keep = np.zeros(len(vectors), dtype=bool)
+        if not len(vectors):
+            return keep
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float64).reshape(len(vectors), -1))
+        if self._recent is None:
+            self._recent = np.zeros((self.window, matrix.shape[1]))
+        elif self._recent.shape[1] != matrix.shape[1]:
+            raise DimensionMismatchError(
+                f"Vector dimensions do not match: {matrix.shape[1]} vs {self._recent.shape[1]}",
+            )
+
+        recent = self._recent
+        for i, vector in enumerate(matrix):
+            if not np.all(np.isfinite(vector)):
+                keep[i] = True
+                continue
+            if self._filled and np.max(recent[: self._filled] @ vector) >= self.threshold:
+                continue
+            keep[i] = True
+            recent[self._next] = vector
+            self._next = (self._next + 1) % self.window
+            self._filled = min(self._filled + 1, self.window)
+
+        n_kept = int(keep.sum())
+        self.kept += n_kept
+        self.dropped += len(keep) - n_kept
+        return keep
+
+    def filter(self, frames: list[FrameEmbedding]) -> list[FrameEmbedding]:
+        """Surviving frames, in timestamp order."""
+        if not frames:
+            return []
+        ordered = sorted(frames, key=lambda frame: frame["timestamp_ms"])
+        dim = len(ordered[0]["embeddings"])
+        keep = self.keep_mask(_frame_matrix(ordered, dim))
+        return [frame for frame, k in zip(ordered, keep.tolist()) if k]
+
+    def surviving_names(self, frames: list[FrameEmbedding]) -> list[str]:
+        """image_name of each surviving frame, in timestamp order."""
+        return [frame["image_name"] for frame in self.filter(frames)]
+
+
+@overload
 def fetch_and_match(
     since_ms: int,
-    query_embeddings: list[QueryEmbedding],
+    query_embeddings: list[QueryEmbedding] | QuerySet,
     default_threshold: float,
-) -> tuple[list[Match], int]:
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: Literal[False] = ...,
+) -> tuple[list[Match], int]: ...
+
+
+@overload
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    *,
+    as_batch: Literal[True],
+) -> tuple[MatchBatch, int]: ...
+
+
+@overload
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: bool = ...,
+) -> tuple[list[Match] | MatchBatch, int]: ...
+
+
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = None,
+    geofence: Geofence | None = None,
+    dedup: NearDuplicateFilter | None = None,
+    precision: str | None = None,
+    result_cache: ResultCache | None = None,
+    as_batch: bool = False,
+) -> tuple[list[Match] | MatchBatch, int]:
     """Fetch new embeddings and return matches with cursor.
 
     Args:
         since_ms: Inclusive lower bound (Unix ms). Pass cursor + 1 to skip reprocessed.
-        query_embeddings: Vectors to match against.
+        query_embeddings: Vectors to match against, as a list or a QuerySet.
         default_threshold: Minimum cosine similarity for a match.
+        processes: Shard large catch-up batches across this many worker processes.
+        geofence: Only score frames inside this beeutil.geo.Geofence.
+        dedup: Skip frames this NearDuplicateFilter drops as near-duplicates.
+        precision: Scoring precision, see find_matches_batch.
+        result_cache: Skip rescoring frames already scored, see find_matches_batch.
+        as_batch: Return matches as a beeutil.records.MatchBatch.
 
     Returns:
         (matches, last_timestamp_ms) — cursor advances even with no matches.
@@ -161,14 +874,22 @@ def fetch_and_match(
     frames = list_embeddings(since_ms=since_ms)
 
     if not frames:
-        return ([], since_ms)
-
-    last_timestamp_ms = since_ms
-    all_matches: list[Match] = []
-
-    for frame in frames:
-        last_timestamp_ms = max(last_timestamp_ms, frame["timestamp_ms"])
-        matches = find_matches(frame, query_embeddings, default_threshold)
-        all_matches.extend(matches)
-
-    return (all_matches, last_timestamp_ms)
+        return (MatchBatch.empty() if as_batch else [], since_ms)
+
+    last_timestamp_ms = max(since_ms, max(frame["timestamp_ms"] for frame in frames))
+    if geofence is not None:
+        inside = geofence.contains([f["lat"] for f in frames], [f["lon"] for f in frames])
+        frames = [frame for frame, keep in zip(frames, inside.tolist()) if keep]
+    if dedup is not None:
+        frames = dedup.filter(frames)
+    matches = find_matches_batch(
+        frames,
+        query_embeddings,
+        default_threshold,
+        processes,
+        precision,
+        result_cache=result_cache,
+        as_batch=as_batch,
+    )
+
+    return (matches, last_timestamp_ms)
@@ -0,0 +1,149 @@
+"""Events: collapse per-frame matches into one event per physical object.
+
+Driving past one sign yields a Match on every frame it is visible in. An
+``EventDetector`` keeps one open event per label and folds each match into it
+in O(1): an event opens on a score >= ``enter_threshold``, is extended by
+scores >= ``exit_threshold`` (hysteresis), and closes once no extending match
+has arrived within ``max_gap_ms`` / ``max_gap_m`` of the last one. Each event
+carries its time span and the best-scoring frame.
+
+State persists across calls, so it follows the fetch_and_match cursor. Fetch
+with ``default_threshold`` at (or below) the exit threshold so the detector
+sees the weaker frames that keep an event open.
+
+Usage:
+  detector = beeutil.events.EventDetector(enter_threshold=0.85, exit_threshold=0.75)
+  matches, cursor = beeutil.embeddings.fetch_and_match(cursor + 1, qe, 0.75)
+  for event in detector.update(matches, now_ms=cursor):
+      report(event["label"], event["best"]["image_name"])
+"""
+
+from __future__ import annotations
+
+from typing import TypedDict
+
+from .embeddings import Match
+from .geo import haversine_m
+
+DEFAULT_MAX_GAP_MS = 3000
+DEFAULT_MAX_GAP_M = 50.0
+
+
+class Event(TypedDict):
+    label: str
+    start_ms: int
+    end_ms: int
+    frames: int
+    best: Match
+
+
+class _OpenEvent:
+    __slots__ = ("label", "start_ms", "end_ms", "frames", "best", "last_lat", "last_lon")
+
+    def __init__(self, match: Match) -> None:
+        self.label = match["label"]
+        self.start_ms = match["timestamp_ms"]
+        self.end_ms = match["timestamp_ms"]
+        self.frames = 1
+        self.best = match
+        self.last_lat = match["lat"]
+        self.last_lon = match["lon"]
+
+    def extend(self, match: Match) -> None:
+        self.end_ms = max(self.end_ms, match["timestamp_ms"])
+        self.frames += 1
+        if match["score"] > self.best["score"]:
+            self.best = match
+        self.last_lat = match["lat"]
+        self.last_lon = match["lon"]
+
+    def event(self) -> Event:
+        return Event(
+            label=self.label,
+            start_ms=self.start_ms,
+            end_ms=self.end_ms,
+            frames=self.frames,
+            best=self.best,
+        )
+
+
+class EventDetector:
+    """Per-label streaming state machine from matches to events."""
+
+    def __init__(
+        self,
+        enter_threshold: float,
+        exit_threshold: float | None = None,
+        max_gap_ms: int = DEFAULT_MAX_GAP_MS,
+        max_gap_m: float | None = DEFAULT_MAX_GAP_M,
+    ) -> None:
+        """
+        Args:
+            enter_threshold: Score that opens an event.
+            exit_threshold: Score that keeps an open event going. Defaults to
+                enter_threshold (no hysteresis).
+            max_gap_ms: Close an event after this long without an extending match.
+            max_gap_m: Close an event when the next match is farther than this
+                from the last one. None disables the distance check.
+        """
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = enter_threshold if exit_threshold is None else exit_threshold
+        if self.exit_threshold > self.enter_threshold:
+            raise ValueError("exit_threshold must not exceed enter_threshold")
+        self.max_gap_ms = max_gap_ms
+        self.max_gap_m = max_gap_m
+        self._open: dict[str, _OpenEvent] = {}
+
+    @property
+    def open_labels(self) -> list[str]:
+        return list(self._open)
+
+    def _continues(self, current: _OpenEvent, match: Match) -> bool:
+        if match["timestamp_ms"] - current.end_ms > self.max_gap_ms:
+            return False
+        if self.max_gap_m is None:
+            return True
+        distance = float(
+            haversine_m(current.last_lat, current.last_lon, match["lat"], match["lon"])
+        )
+        return distance <= self.max_gap_m
+
+    def update(self, matches: list[Match], now_ms: int | None = None) -> list[Event]:
+        """Fold matches in (timestamp order) and return the events they closed.
+
+        Args:
+            now_ms: Stream time reached, e.g. the fetch_and_match cursor. Events
+                idle for more than max_gap_ms before it are closed too.
+        """
+        closed: list[Event] = []
+        for match in sorted(matches, key=lambda m: m["timestamp_ms"]):
+            label = match["label"]
+            current = self._open.get(label)
+            if current is not None:
+                if self._continues(current, match):
+                    if match["score"] >= self.exit_threshold:
+                        current.extend(match)
+                    continue
+                closed.append(current.event())
+                del self._open[label]
+            if match["score"] >= self.enter_threshold:
+                self._open[label] = _OpenEvent(match)
+
+        if now_ms is not None:
+            closed.extend(self.advance(now_ms))
+        return closed
+
+    def advance(self, now_ms: int) -> list[Event]:
+        """Close events with no extending match within max_gap_ms of ``now_ms``."""
+        expired = [
+            label
+            for label, current in self._open.items()
+            if now_ms - current.end_ms > self.max_gap_ms
+        ]
+        return [self._open.pop(label).event() for label in expired]
+
+    def flush(self) -> list[Event]:
+        """Close and return every open event, e.g. on shutdown."""
+        closed = [current.event() for current in self._open.values()]
+        self._open.clear()
+        return closed
@@ -0,0 +1,558 @@
+"""Feed: one shared embeddings fetch for every plugin on the device.
+
+A ``FeedServer`` polls odc-api's ``/embeddings`` once, keeps the frames in a
+bounded in-memory ring (float32 vectors, or float16/float64 to suit the
+scoring precision) and serves time-range reads to local subscribers over a
+Unix socket. Subscribers hold their own cursors; the server keeps no
+per-client state. ``FeedClient`` mirrors
+``list_embeddings`` / ``fetch_and_match`` and falls back to odc-api directly
+when no feed is running.
+
+Wire format: the client sends one JSON line ``{"since": ms, "until": ms}``;
+the server answers with one JSON header line (``n``, ``dim`` and the
+timestamp/lat/lon/image_name columns, or ``error``) followed by
+``n * dim`` little-endian float32 values.
+
+Usage:
+  # feed daemon (e.g. its own plugin): python3 -m beeutil.feed
+  feed = beeutil.feed.FeedClient()
+  matches, cursor = feed.fetch_and_match(cursor + 1, qe, 0.8)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Literal, overload
+
+import numpy as np
+
+from . import embeddings
+from . import precision as _precision
+from .embeddings import EmbeddingsError, FrameEmbedding, Match, QueryEmbedding, QuerySet
+from .localdb import EmbeddingArrays, match_embedding_arrays
+from .records import EmbeddingRecord, MatchBatch
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from .embeddings import NearDuplicateFilter
+    from .geo import Geofence
+    from .result_cache import ResultCache
+
+FEED_SOCKET = os.environ.get("BEE_FEED_SOCKET", "/tmp/beeutil-feed.sock")
+DEFAULT_CAPACITY = 20000  # frames kept in memory (~40 MB at 512-d float32)
+RING_SLACK = 0.25  # extra rows allocated past capacity (~10 MB more at the default)
+REFRESH_INTERVAL_S = 1.0
+TIMEOUT = 10
+WIRE_DTYPE = "<f4"
+PROBE_TIMEOUT = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class FeedError(EmbeddingsError):
+    """Feed socket unreachable or returned a malformed response."""
+
+
+def _connect(socket_path: str, timeout: float) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _listening(socket_path: str) -> bool:
+    """True if something accepts connections on socket_path (not just a stale file)."""
+    try:
+        _connect(socket_path, PROBE_TIMEOUT).close()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except OSError:
+        # Busy or unreadable: assume a live server rather than unlinking its socket.
+        return True
+    return True
+
+
+def _empty_arrays(dim: int = 0, dtype: type[np.floating[Any]] = np.float32) -> EmbeddingArrays:
+    return EmbeddingArrays(
+        timestamp_ms=np.empty(0, dtype=np.int64),
+        lat=np.empty(0, dtype=np.float64),
+        lon=np.empty(0, dtype=np.float64),
+        image_name=[],
+        vectors=np.empty((0, dim), dtype=dtype),
+    )
+
+
+class _Ring:
+    """Timestamp-ordered columns holding at most ``capacity`` newest frames.
+
+    Backed by arrays of ``capacity`` plus ``RING_SLACK`` spare rows: appends go
+    to the tail and the rows still needed are moved to the front only when the
+    tail runs out, so appends are amortized O(1) and reads are ``searchsorted``
+    slices.
+    """
+
+    def __init__(self, capacity: int, dtype: type[np.floating[Any]] = np.float32) -> None:
+        self.capacity = capacity
+        self.dtype = dtype
+        self.dim: int | None = None
+        self._start = 0
+        self._end = 0
+        self.evicted_through: int | None = None
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def newest(self) -> int | None:
+        return int(self._ts[self._end - 1]) if len(self) else None
+
+    def _allocate(self, dim: int) -> None:
+        size = self.capacity + max(1, int(self.capacity * RING_SLACK))
+        self.dim = dim
+        self._ts = np.empty(size, dtype=np.int64)
+        self._lat = np.empty(size, dtype=np.float64)
+        self._lon = np.empty(size, dtype=np.float64)
+        self._names = np.empty(size, dtype=object)
+        self._vectors = np.empty((size, dim), dtype=self.dtype)
+
+    def extend(self, frames: list[FrameEmbedding]) -> int:
+        """Append frames newer than the newest held. Returns count added."""
+        newest = self.newest
+        frames = sorted(
+            (f for f in frames if newest is None or f["timestamp_ms"] > newest),
+            key=lambda f: f["timestamp_ms"],
+        )
+        if not frames:
+            return 0
+        added = len(frames)
+        if added > self.capacity:
+            self.evicted_through = frames[-self.capacity - 1]["timestamp_ms"]
+            frames = frames[-self.capacity :]
+            self._start = self._end
+        dim = len(frames[0]["embeddings"])
+        if self.dim != dim:
+            # First batch, or a new embedding model: start over.
+            self._allocate(dim)
+            self._start = self._end = 0
+
+        n = len(frames)
+        if self._end + n > len(self._ts):
+            # Only the rows that survive this append are moved
+            keep = min(len(self), self.capacity - n)
+            live = slice(self._end - keep, self._end)
+            if keep < len(self):
+                self.evicted_through = int(self._ts[live.start - 1])
+            for column in (self._ts, self._lat, self._lon, self._names, self._vectors):
+                column[:keep] = column[live]
+            self._start, self._end = 0, keep
+
+        end = self._end + n
+        self._ts[self._end : end] = [f["timestamp_ms"] for f in frames]
+        self._lat[self._end : end] = [f["lat"] for f in frames]
+        self._lon[self._end : end] = [f["lon"] for f in frames]
+        self._names[self._end : end] = [f["image_name"] for f in frames]
+        self._vectors[self._end : end] = [f["embeddings"] for f in frames]
+        self._end = end
+
+        if len(self) > self.capacity:
+            self._start = self._end - self.capacity
+            self.evicted_through = int(self._ts[self._start - 1])
+        return added
+
+    def range(self, since_ms: int | None, until_ms: int | None) -> EmbeddingArrays:
+        """Copies of the frames with since <= timestamp <= until."""
+        if not len(self) or self.dim is None:
+            return _empty_arrays(dtype=self.dtype)
+        ts = self._ts[self._start : self._end]
+        lo = 0 if since_ms is None else int(np.searchsorted(ts, since_ms, side="left"))
+        hi = len(ts) if until_ms is None else int(np.searchsorted(ts, until_ms, side="right"))
+        window = slice(self._start + lo, self._start + max(lo, hi))
+        return EmbeddingArrays(
+            timestamp_ms=self._ts[window].copy(),
+            lat=self._lat[window].copy(),
+            lon=self._lon[window].copy(),
+            image_name=self._names[window].tolist(),
+            vectors=self._vectors[window].copy(),
+        )
+
+
+def _frames_to_arrays(
+    frames: list[FrameEmbedding], dtype: type[np.floating[Any]] = np.float32
+) -> EmbeddingArrays:
+    if not frames:
+        return _empty_arrays(dtype=dtype)
+    frames = sorted(frames, key=lambda f: f["timestamp_ms"])
+    return EmbeddingArrays(
+        timestamp_ms=np.array([f["timestamp_ms"] for f in frames], dtype=np.int64),
+        lat=np.array([f["lat"] for f in frames], dtype=np.float64),
+        lon=np.array([f["lon"] for f in frames], dtype=np.float64),
+        image_name=[f["image_name"] for f in frames],
+        vectors=np.array([f["embeddings"] for f in frames], dtype=dtype),
+    )
+
+
+def _concat(a: EmbeddingArrays, b: EmbeddingArrays) -> EmbeddingArrays:
+    if not len(a["timestamp_ms"]):
+        return b
+    if not len(b["timestamp_ms"]):
+        return a
+    return EmbeddingArrays(
+        timestamp_ms=np.concatenate([a["timestamp_ms"], b["timestamp_ms"]]),
+        lat=np.concatenate([a["lat"], b["lat"]]),
+        lon=np.concatenate([a["lon"], b["lon"]]),
+        image_name=a["image_name"] + b["image_name"],
+        vectors=np.concatenate([a["vectors"], b["vectors"]]),
+    )
+
+
+class _FeedHandler(socketserver.StreamRequestHandler):
+    server: FeedServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return  # closed without a request, e.g. a liveness probe
+        try:
+            request = json.loads(line)
+            arrays = self.server.read(request.get("since"), request.get("until"))
+        except (ValueError, AttributeError, EmbeddingsError) as e:
+            self.wfile.write(json.dumps({"error": str(e)}).encode() + b"\n")
+            return
+        vectors = arrays["vectors"]
+        header = {
+            "n": len(arrays["timestamp_ms"]),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "timestamp_ms": arrays["timestamp_ms"].tolist(),
+            "lat": arrays["lat"].tolist(),
+            "lon": arrays["lon"].tolist(),
+            "image_name": arrays["image_name"],
+        }
+        self.wfile.write(json.dumps(header).encode() + b"\n")
+        self.wfile.write(vectors.astype(WIRE_DTYPE, copy=False).tobytes())
+
+
+class FeedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Fetches embeddings once and serves them to local subscribers."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str = FEED_SOCKET,
+        capacity: int = DEFAULT_CAPACITY,
+        refresh_interval_s: float = REFRESH_INTERVAL_S,
+        since_ms: int | None = None,
+        fetch: Callable[..., list[FrameEmbedding]] | None = None,
+        precision: str | None = None,
+    ) -> None:
+        """
+        Args:
+            capacity: Newest frames kept in memory. Older reads go to odc-api.
+            refresh_interval_s: Poll period, and the maximum staleness of a read.
+            since_ms: Where the first fetch starts. None fetches all odc-api has.
+            fetch: ``list_embeddings``-compatible callable (for tests).
+            precision: Hold vectors in the dtype this scoring precision works
+                from (precision.storage_dtype); float16 halves the ring. None
+                keeps float32. The wire format is float32 either way.
+        """
+        if os.path.exists(socket_path):
+            if _listening(socket_path):
+                raise FeedError(f"A feed is already serving {socket_path}")
+            os.unlink(socket_path)  # left behind by a feed that did not shut down
+        super().__init__(socket_path, _FeedHandler)
+        self.socket_path = socket_path
+        self.refresh_interval_s = refresh_interval_s
+        self.fetches = 0
+        self._since_ms = since_ms
+        self._fetch = fetch or embeddings.list_embeddings
+        dtype = np.float32 if precision is None else _precision.storage_dtype(precision)
+        self._ring = _Ring(capacity, dtype)
+        if since_ms is not None:
+            # Nothing before the first fetch is held; older reads go to odc-api.
+            self._ring.evicted_through = since_ms - 1
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = float("-inf")
+        self._stop = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    def refresh(self, max_age_s: float = 0.0) -> int:
+        """Fetch frames newer than the ring unless it was refreshed within max_age_s.
+
+        Concurrent callers share one fetch. Returns count added.
+        """
+        with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at < max_age_s:
+                return 0
+            with self._lock:
+                newest = self._ring.newest
+            since = self._since_ms if newest is None else newest + 1
+            frames = self._fetch(since_ms=since)
+            self.fetches += 1
+            self._refreshed_at = time.monotonic()
+            with self._lock:
+                return self._ring.extend(frames)
+
+    def read(self, since_ms: int | None, until_ms: int | None) -> EmbeddingArrays:
+        """Frames in [since_ms, until_ms], going to odc-api only for evicted history."""
+        self.refresh(max_age_s=self.refresh_interval_s)
+        with self._lock:
+            arrays = self._ring.range(since_ms, until_ms)
+            evicted_through = self._ring.evicted_through
+        if evicted_through is not None and (since_ms is None or since_ms <= evicted_through):
+            upper = evicted_through if until_ms is None else min(until_ms, evicted_through)
+            older = _frames_to_arrays(
+                self._fetch(since_ms=since_ms, until_ms=upper), self._ring.dtype
+            )
+            arrays = _concat(older, arrays)
+        return arrays
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.refresh_interval_s):
+            try:
+                self.refresh(max_age_s=self.refresh_interval_s / 2)
+            except EmbeddingsError as e:
+                logger.warning(f"Feed refresh failed: {e}")
+
+    def start(self) -> None:
+        """Serve and poll in daemon threads."""
+        self._workers = [
+            threading.Thread(
+                target=self.serve_forever, args=(0.1,), name="feed-serve", daemon=True
+            ),
+            threading.Thread(target=self._poll, name="feed-poll", daemon=True),
+        ]
+        for thread in self._workers:
+            thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._workers:
+            self.shutdown()
+        self.server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _recv_exact(f: Any, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise FeedError(f"Short read from feed: {len(data)} of {size} bytes")
+    return bytes(data)
+
+
+class FeedClient:
+    """Drop-in for list_embeddings / fetch_and_match backed by a FeedServer."""
+
+    def __init__(
+        self,
+        socket_path: str = FEED_SOCKET,
+        fallback: bool = True,
+        timeout: float = TIMEOUT,
+    ) -> None:
+        """
+        Args:
+            fallback: Query odc-api directly when no feed is listening on the socket.
+        """
+        self.socket_path = socket_path
+        self.fallback = fallback
+        self.timeout = timeout
+        self.cursor: int | None = None
+
+    def available(self) -> bool:
+        return _listening(self.socket_path)
+
+    def embedding_arrays(
+        self,
+        since_ms: int | None = None,
+        until_ms: int | None = None,
+        precision: str | None = None,
+    ) -> EmbeddingArrays:
+        """Frames in [since_ms, until_ms] as timestamp-ordered columns.
+
+        Args:
+            precision: Convert vectors to the dtype this scoring precision works
+                from (precision.storage_dtype). None keeps float32.
+        """
+        dtype = np.float32 if precision is None else _precision.storage_dtype(precision)
+        try:
+            sock = _connect(self.socket_path, self.timeout)
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            # Missing or stale socket: no feed is running.
+            if not self.fallback:
+                raise FeedError(f"No feed at {self.socket_path}: {e}") from e
+            return _frames_to_arrays(embeddings.list_embeddings(since_ms, until_ms), dtype)
+        except OSError as e:
+            raise FeedError(f"Failed to reach feed at {self.socket_path}: {e}") from e
+
+        try:
+            with sock:
+                request = {"since": since_ms, "until": until_ms}
+                sock.sendall(json.dumps(request).encode() + b"\n")
+                with sock.makefile("rb") as f:
+                    header = json.loads(f.readline())
+                    if "error" in header:
+                        raise FeedError(f"Feed error: {header['error']}")
+                    n, dim = header["n"], header["dim"]
+                    blob = _recv_exact(f, n * dim * np.dtype(WIRE_DTYPE).itemsize)
+        except OSError as e:
+            raise FeedError(f"Failed to reach feed at {self.socket_path}: {e}") from e
+        except (ValueError, KeyError) as e:
+            raise FeedError(f"Malformed feed response: {e}") from e
+
+        vectors: npt.NDArray[np.floating[Any]] = (
+            np.frombuffer(blob, dtype=WIRE_DTYPE).reshape(n, dim).astype(dtype)
+        )
+        return EmbeddingArrays(
+            timestamp_ms=np.array(header["timestamp_ms"], dtype=np.int64),
+            lat=np.array(header["lat"], dtype=np.float64),
+            lon=np.array(header["lon"], dtype=np.float64),
+            image_name=header["image_name"],
+            vectors=vectors,
+        )
+
+    @overload
+    def list_embeddings(
+        self,
+        since_ms: int | None = ...,
+        until_ms: int | None = ...,
+        as_records: Literal[False] = ...,
+    ) -> list[FrameEmbedding]: ...
+
+    @overload
+    def list_embeddings(
+        self,
+        since_ms: int | None = ...,
+        until_ms: int | None = ...,
+        *,
+        as_records: Literal[True],
+    ) -> list[EmbeddingRecord]: ...
+
+    @overload
+    def list_embeddings(
+        self,
+        since_ms: int | None = ...,
+        until_ms: int | None = ...,
+        as_records: bool = ...,
+    ) -> list[FrameEmbedding] | list[EmbeddingRecord]: ...
+
+    def list_embeddings(
+        self,
+        since_ms: int | None = None,
+        until_ms: int | None = None,
+        as_records: bool = False,
+    ) -> list[FrameEmbedding] | list[EmbeddingRecord]:
+        """Same as beeutil.embeddings.list_embeddings (vectors are float32-rounded)."""
+        arrays = self.embedding_arrays(since_ms, until_ms)
+        make: Callable[..., Any] = EmbeddingRecord if as_records else FrameEmbedding
+        return [
+            make(embeddings=vector, timestamp_ms=ts, lat=lat, lon=lon, image_name=name)
+            for vector, ts, lat, lon, name in zip(
+                arrays["vectors"].tolist(),
+                arrays["timestamp_ms"].tolist(),
+                arrays["lat"].tolist(),
+                arrays["lon"].tolist(),
+                arrays["image_name"],
+            )
+        ]
+
+    @overload
+    def fetch_and_match(
+        self,
+        since_ms: int,
+        query_embeddings: list[QueryEmbedding] | QuerySet,
+        default_threshold: float,
+        processes: int | None = ...,
+        geofence: Geofence | None = ...,
+        dedup: NearDuplicateFilter | None = ...,
+        precision: str | None = ...,
+        result_cache: ResultCache | None = ...,
+        as_batch: Literal[False] = ...,
+    ) -> tuple[list[Match], int]: ...
+
+    @overload
+    def fetch_and_match(
+        self,
+        since_ms: int,
+        query_embeddings: list[QueryEmbedding] | QuerySet,
+        default_threshold: float,
+        processes: int | None = ...,
+        geofence: Geofence | None = ...,
+        dedup: NearDuplicateFilter | None = ...,
+        precision: str | None = ...,
+        result_cache: ResultCache | None = ...,
+        *,
+        as_batch: Literal[True],
+    ) -> tuple[MatchBatch, int]: ...
+
+    @overload
+    def fetch_and_match(
+        self,
+        since_ms: int,
+        query_embeddings: list[QueryEmbedding] | QuerySet,
+        default_threshold: float,
+        processes: int | None = ...,
+        geofence: Geofence | None = ...,
+        dedup: NearDuplicateFilter | None = ...,
+        precision: str | None = ...,
+        result_cache: ResultCache | None = ...,
+        as_batch: bool = ...,
+    ) -> tuple[list[Match] | MatchBatch, int]: ...
+
+    def fetch_and_match(
+        self,
+        since_ms: int,
+        query_embeddings: list[QueryEmbedding] | QuerySet,
+        default_threshold: float,
+        processes: int | None = None,
+        geofence: Geofence | None = None,
+        dedup: NearDuplicateFilter | None = None,
+        precision: str | None = None,
+        result_cache: ResultCache | None = None,
+        as_batch: bool = False,
+    ) -> tuple[list[Match] | MatchBatch, int]:
+        """Same as beeutil.embeddings.fetch_and_match; also stores the cursor on ``self.cursor``."""
+        precision = _precision.check(precision or embeddings.PRECISION)
+        arrays = self.embedding_arrays(since_ms=since_ms, precision=precision)
+        matches, cursor = match_embedding_arrays(
+            arrays,
+            since_ms,
+            query_embeddings,
+            default_threshold,
+            processes,
+            geofence,
+            dedup,
+            precision=precision,
+            result_cache=result_cache,
+            as_batch=as_batch,
+        )
+        self.cursor = cursor
+        return matches, cursor
+
+
+def main() -> None:
+    server = FeedServer()
+    print(f"feed: serving {server.socket_path}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Frame index: NumPy columns over cached frame metadata.
+
+Frames are stored as ``<time>_<lat>_<lon>.jpg`` with a ``.json`` sidecar
+(``time``, ``gnss_time``, ``lat``, ``lon``, ``img_id``). The index parses each
+frame once into sorted columns and persists them as ``.npz``, so time-range and
+bounding-box queries are ``searchsorted`` and vectorized masks instead of
+directory scans.
+
+Usage:
+  index = beeutil.frames.open_index('/data/cache', '/data/plugins/my-plugin/frames.npz')
+  recent = index.records(index.time_range(since_ms, until_ms))
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Any, TypedDict
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+CACHE_DIR = "/data/cache"
+FRAME_EXTENSION = ".jpg"
+SIDECAR_EXTENSION = ".json"
+
+COLUMNS = ("time", "gnss_time", "lat", "lon", "img_id")
+DTYPES = {
+    "time": np.int64,
+    "gnss_time": np.int64,
+    "lat": np.float64,
+    "lon": np.float64,
+    "img_id": np.int32,
+}
+MISSING_IMG_ID = -1
+
+
+class FrameRecord(TypedDict):
+    name: str
+    time: int
+    gnss_time: int
+    lat: float
+    lon: float
+    img_id: int
+
+
+class FrameIndexError(Exception):
+    """Frame index could not be read or built."""
+
+
+def parse_frame_name(name: str) -> tuple[int, float, float]:
+    """Split ``<time>_<lat>_<lon>.<ext>`` into (time_ms, lat, lon)."""
+    stem = name.rsplit(".", 1)[0]
+    parts = stem.split("_")
+    if len(parts) != 3:
+        raise ValueError(f"Not a frame name: {name}")
+    return int(parts[0]), float(parts[1]), float(parts[2])
+
+
+def _read_sidecar(path: str) -> dict[str, Any]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _frame_row(directory: str, name: str, read_sidecars: bool) -> dict[str, Any] | None:
+    try:
+        time_ms, lat, lon = parse_frame_name(name)
+    except ValueError:
+        return None
+    row = {
+        "name": name,
+        "time": time_ms,
+        "gnss_time": time_ms,
+        "lat": lat,
+        "lon": lon,
+        "img_id": MISSING_IMG_ID,
+    }
+    if read_sidecars:
+        sidecar = _read_sidecar(
+            os.path.join(directory, name[: -len(FRAME_EXTENSION)] + SIDECAR_EXTENSION)
+        )
+        for key in ("gnss_time", "img_id"):
+            if isinstance(sidecar.get(key), int):
+                row[key] = sidecar[key]
+    return row
+
+
+class FrameIndex:
+    """Time-sorted columns: names plus int64 time/gnss_time, float64 lat/lon, int32 img_id."""
+
+    def __init__(self) -> None:
+        self.names: npt.NDArray[np.str_] = np.empty(0, dtype=np.str_)
+        self.columns: dict[str, npt.NDArray[Any]] = {
+            key: np.empty(0, dtype=dtype) for key, dtype in DTYPES.items()
+        }
+        self._known: set[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def time(self) -> npt.NDArray[np.int64]:
+        return self.columns["time"]
+
+    @property
+    def lat(self) -> npt.NDArray[np.float64]:
+        return self.columns["lat"]
+
+    @property
+    def lon(self) -> npt.NDArray[np.float64]:
+        return self.columns["lon"]
+
+    def _known_names(self) -> set[str]:
+        if self._known is None:
+            self._known = set(self.names.tolist())
+        return self._known
+
+    def add_rows(self, rows: list[dict[str, Any]]) -> int:
+        """Append rows (dicts with name + COLUMNS), skipping known names. Returns count added."""
+        known = self._known_names()
+        rows = [row for row in rows if row["name"] not in known]
+        if not rows:
+            return 0
+        known.update(row["name"] for row in rows)
+
+        names = np.concatenate([self.names, np.array([row["name"] for row in rows])])
+        columns = {
+            key: np.concatenate(
+                [self.columns[key], np.array([row[key] for row in rows], dtype=dtype)]
+            )
+            for key, dtype in DTYPES.items()
+        }
+        new_times = columns["time"][len(self.names) :]
+        appended_out_of_order = len(self.names) > 0 and new_times.min() < self.time[-1]
+        if appended_out_of_order or np.any(np.diff(new_times) < 0):
+            order = np.argsort(columns["time"], kind="mergesort")
+            names = names[order]
+            columns = {key: col[order] for key, col in columns.items()}
+
+        self.names = names
+        self.columns = columns
+        return len(rows)
+
+    def remove_names(self, names: set[str]) -> int:
+        """Drop the given names from the index. Returns count removed."""
+        known = self._known_names()
+        gone = names & known
+        if not gone:
+            return 0
+        keep = ~np.isin(self.names, list(gone))
+        self.names = self.names[keep]
+        self.columns = {key: col[keep] for key, col in self.columns.items()}
+        known.difference_update(gone)
+        return len(gone)
+
+    def update(self, directory: str = CACHE_DIR, read_sidecars: bool = True) -> int:
+        """Sync with ``directory``: index new frames and drop ones rotated out of it.
+
+        Returns:
+            Frames added plus frames removed.
+        """
+        known = self._known_names()
+        rows = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            raise FrameIndexError(f"Failed to scan {directory}: {e}") from e
+        present = set()
+        for entry in entries:
+            if not entry.name.endswith(FRAME_EXTENSION):
+                continue
+            present.add(entry.name)
+            if entry.name in known:
+                continue
+            row = _frame_row(directory, entry.name, read_sidecars)
+            if row is not None:
+                rows.append(row)
+        removed = self.remove_names(known - present)
+        return self.add_rows(rows) + removed
+
+    def time_range(self, since: int | None = None, until: int | None = None) -> slice:
+        """Positions of frames with since <= time <= until (both inclusive)."""
+        start = 0 if since is None else int(np.searchsorted(self.time, since, side="left"))
+        stop = len(self) if until is None else int(np.searchsorted(self.time, until, side="right"))
+        return slice(start, max(start, stop))
+
+    def bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        since: int | None = None,
+        until: int | None = None,
+    ) -> npt.NDArray[np.intp]:
+        """Positions of frames inside the bounding box, optionally within a time range."""
+        window = self.time_range(since, until)
+        lat = self.lat[window]
+        lon = self.lon[window]
+        mask = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        positions: npt.NDArray[np.intp] = np.nonzero(mask)[0] + window.start
+        return positions
+
+    def records(self, positions: slice | npt.NDArray[np.intp] | list[int]) -> list[FrameRecord]:
+        names = self.names[positions].tolist()
+        cols = {key: self.columns[key][positions].tolist() for key in COLUMNS}
+        return [
+            FrameRecord(
+                name=name,
+                time=cols["time"][i],
+                gnss_time=cols["gnss_time"][i],
+                lat=cols["lat"][i],
+                lon=cols["lon"][i],
+                img_id=cols["img_id"][i],
+            )
+            for i, name in enumerate(names)
+        ]
+
+    def save(self, path: str) -> None:
+        """Atomically write the columns to an ``.npz`` file."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                names=self.names,
+                time=self.columns["time"],
+                gnss_time=self.columns["gnss_time"],
+                lat=self.columns["lat"],
+                lon=self.columns["lon"],
+                img_id=self.columns["img_id"],
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> FrameIndex:
+        index = cls()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                index.names = data["names"]
+                index.columns = {key: data[key].astype(dtype) for key, dtype in DTYPES.items()}
+        except (OSError, KeyError, ValueError) as e:
+            raise FrameIndexError(f"Failed to load frame index {path}: {e}") from e
+        if any(len(col) != len(index.names) for col in index.columns.values()):
+            raise FrameIndexError(f"Column lengths differ in {path}")
+        return index
+
+    @classmethod
+    def from_directory(cls, directory: str = CACHE_DIR, read_sidecars: bool = True) -> FrameIndex:
+        index = cls()
+        index.update(directory, read_sidecars)
+        return index
+
+
+def open_index(
+    directory: str = CACHE_DIR,
+    index_path: str | None = None,
+    read_sidecars: bool = True,
+) -> FrameIndex:
+    """Load a persisted index (if any), sync it with ``directory`` and save it back."""
+    index = FrameIndex()
+    if index_path and os.path.exists(index_path):
+        try:
+            index = FrameIndex.load(index_path)
+        except FrameIndexError:
+            index = FrameIndex()
+    changed = index.update(directory, read_sidecars)
+    if index_path and changed:
+        index.save(index_path)
+    return index
@@ -0,0 +1,272 @@
+"""Geo: vectorized distance and geofence tests over batches of lat/lon.
+
+A ``Geofence`` is a set of polygons and bounding boxes behind a uniform grid
+index: each grid cell lists the shapes whose bounds overlap it, and at build
+time every cell no polygon edge passes through is classified as wholly inside
+or outside that polygon. Points in those cells are accepted or rejected from
+their cell alone; only points in cells an edge crosses run the exact
+(vectorized, even-odd) point-in-polygon test.
+
+Usage:
+  fence = beeutil.geo.Geofence(bboxes=[(37.70, -122.52, 37.83, -122.35)])
+  handles = fence.filter_names(beeutil.list_contents(since))
+  matches, cursor = beeutil.embeddings.fetch_and_match(since, qe, 0.8, geofence=fence)
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+EARTH_RADIUS_M = 6371008.8
+DEFAULT_GRID_SIZE = 64
+
+# (lat, lon) vertices; a polygon is one or more rings (exterior first, then holes).
+Ring = Sequence[Tuple[float, float]]
+BBox = Tuple[float, float, float, float]  # (min_lat, min_lon, max_lat, max_lon)
+
+
+class GeofenceError(Exception):
+    """Invalid geofence shape."""
+
+
+def haversine_m(
+    lat1: npt.ArrayLike,
+    lon1: npt.ArrayLike,
+    lat2: npt.ArrayLike,
+    lon2: npt.ArrayLike,
+) -> npt.NDArray[np.float64]:
+    """Great-circle distance in meters, broadcasting over array inputs."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lon2) - np.radians(lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    distance: npt.NDArray[np.float64] = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return distance
+
+
+def bearing_deg(
+    lat1: npt.ArrayLike,
+    lon1: npt.ArrayLike,
+    lat2: npt.ArrayLike,
+    lon2: npt.ArrayLike,
+) -> npt.NDArray[np.float64]:
+    """Initial bearing from point 1 to point 2 in degrees [0, 360)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlmb = np.radians(lon2) - np.radians(lon1)
+    y = np.sin(dlmb) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlmb)
+    bearing: npt.NDArray[np.float64] = np.degrees(np.arctan2(y, x)) % 360.0
+    return bearing
+
+
+def points_in_polygon(
+    lats: npt.NDArray[np.float64],
+    lons: npt.NDArray[np.float64],
+    rings: Sequence[Ring],
+) -> npt.NDArray[np.bool_]:
+    """Even-odd point-in-polygon over all rings, vectorized over points."""
+    inside = np.zeros(len(lats), dtype=bool)
+    for ring in rings:
+        vertices = np.asarray(ring, dtype=np.float64)
+        y0, x0 = vertices[:, 0], vertices[:, 1]
+        y1, x1 = np.roll(y0, -1), np.roll(x0, -1)
+        for ya, xa, yb, xb in zip(y0.tolist(), x0.tolist(), y1.tolist(), x1.tolist()):
+            if ya == yb:
+                continue
+            crosses = (ya > lats) != (yb > lats)
+            x_at = xa + (lats - ya) * (xb - xa) / (yb - ya)
+            inside ^= crosses & (lons < x_at)
+    return inside
+
+
+def parse_name_positions(
+    names: Sequence[str],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+    """(lats, lons, valid) parsed from ``<time>_<lat>_<lon>.<ext>`` names."""
+    lats = np.full(len(names), np.nan)
+    lons = np.full(len(names), np.nan)
+    for i, name in enumerate(names):
+        parts = name.rsplit(".", 1)[0].split("_")
+        if len(parts) == 3:
+            try:
+                lats[i] = float(parts[1])
+                lons[i] = float(parts[2])
+            except ValueError:
+                continue
+    return lats, lons, ~(np.isnan(lats) | np.isnan(lons))
+
+
+class Geofence:
+    """Union of polygons and bounding boxes with a grid index."""
+
+    def __init__(
+        self,
+        polygons: Sequence[Sequence[Ring]] = (),
+        bboxes: Sequence[BBox] = (),
+        grid_size: int = DEFAULT_GRID_SIZE,
+    ) -> None:
+        """
+        Args:
+            polygons: Each polygon is a list of rings of (lat, lon) vertices;
+                the first ring is the exterior and any others are holes.
+            bboxes: (min_lat, min_lon, max_lat, max_lon) boxes.
+            grid_size: Cells per axis of the grid index.
+        """
+        self.polygons = [[list(ring) for ring in polygon] for polygon in polygons]
+        self.bboxes = [tuple(float(v) for v in box) for box in bboxes]
+        for polygon in self.polygons:
+            if not polygon or any(len(ring) < 3 for ring in polygon):
+                raise GeofenceError("Polygon rings need at least 3 vertices")
+        for box in self.bboxes:
+            if len(box) != 4 or box[0] > box[2] or box[1] > box[3]:
+                raise GeofenceError(f"Invalid bbox {box}")
+
+        bounds = [self._polygon_bounds(p) for p in self.polygons] + list(self.bboxes)
+        self._shape_bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+        self.grid_size = grid_size
+        self._build_grid()
+
+    @staticmethod
+    def _polygon_bounds(polygon: list[list[tuple[float, float]]]) -> BBox:
+        vertices = np.asarray(polygon[0], dtype=np.float64)
+        return (
+            float(vertices[:, 0].min()),
+            float(vertices[:, 1].min()),
+            float(vertices[:, 0].max()),
+            float(vertices[:, 1].max()),
+        )
+
+    @classmethod
+    def from_geojson(cls, obj: dict[str, Any], grid_size: int = DEFAULT_GRID_SIZE) -> Geofence:
+        """Build from a GeoJSON Feature(Collection), Polygon or MultiPolygon ([lon, lat] order)."""
+        polygons: list[list[list[tuple[float, float]]]] = []
+
+        def visit(geo: dict[str, Any]) -> None:
+            kind = geo.get("type")
+            if kind == "FeatureCollection":
+                for feature in geo.get("features", []):
+                    visit(feature)
+            elif kind == "Feature":
+                visit(geo.get("geometry") or {})
+            elif kind == "Polygon":
+                polygons.append(
+                    [[(lat, lon) for lon, lat, *_ in ring] for ring in geo["coordinates"]]
+                )
+            elif kind == "MultiPolygon":
+                for coords in geo["coordinates"]:
+                    polygons.append([[(lat, lon) for lon, lat, *_ in ring] for ring in coords])
+            else:
+                raise GeofenceError(f"Unsupported GeoJSON type: {kind}")
+
+        visit(obj)
+        return cls(polygons=polygons, grid_size=grid_size)
+
+    def _build_grid(self) -> None:
+        if not len(self._shape_bounds):
+            self._origin = np.zeros(2)
+            self._cell = np.ones(2)
+            self._candidates = np.zeros((0, 0), dtype=bool)
+            self._interior = np.zeros((0, 0), dtype=bool)
+            return
+        lo = self._shape_bounds[:, :2].min(axis=0)
+        hi = self._shape_bounds[:, 2:].max(axis=0)
+        self._origin = lo
+        self._cell = np.maximum((hi - lo) / self.grid_size, 1e-9)
+
+        # candidates[cell, shape]: shape bounds overlap the cell
+        n = self.grid_size
+        first = np.floor((self._shape_bounds[:, :2] - lo) / self._cell).astype(int).clip(0, n - 1)
+        last = np.floor((self._shape_bounds[:, 2:] - lo) / self._cell).astype(int).clip(0, n - 1)
+        candidates = np.zeros((n * n, len(self._shape_bounds)), dtype=bool)
+        for s in range(len(self._shape_bounds)):
+            rows = np.arange(first[s, 0], last[s, 0] + 1)
+            cols = np.arange(first[s, 1], last[s, 1] + 1)
+            candidates[(rows[:, None] * n + cols[None, :]).ravel(), s] = True
+
+        # Cells no edge crosses lie wholly inside or outside a polygon: their center decides.
+        interior = np.zeros_like(candidates)
+        center_lat = lo[0] + (np.arange(n) + 0.5) * self._cell[0]
+        center_lon = lo[1] + (np.arange(n) + 0.5) * self._cell[1]
+        for s, polygon in enumerate(self.polygons):
+            crossed = self._edge_cells(polygon).ravel()
+            cells = np.nonzero(candidates[:, s] & ~crossed)[0]
+            if not len(cells):
+                continue
+            inner = points_in_polygon(center_lat[cells // n], center_lon[cells % n], polygon)
+            interior[cells[inner], s] = True
+            candidates[cells[~inner], s] = False
+        self._candidates = candidates
+        self._interior = interior
+
+    def _edge_cells(self, polygon: list[list[tuple[float, float]]]) -> npt.NDArray[np.bool_]:
+        """(n, n) mask of cells that any edge of ``polygon`` may pass through."""
+        n = self.grid_size
+        crossed = np.zeros((n + 2, n + 2), dtype=bool)
+        for ring in polygon:
+            start = np.asarray(ring, dtype=np.float64)
+            delta = np.roll(start, -1, axis=0) - start
+            # Sample each edge at most one cell apart, so consecutive samples share a 2x2 block.
+            steps = np.ceil(np.abs(delta / self._cell).max(axis=1)).astype(int) + 1
+            edge = np.repeat(np.arange(len(start)), steps + 1)
+            offsets = np.concatenate([[0], np.cumsum(steps + 1)[:-1]])
+            t = (np.arange(len(edge)) - offsets[edge]) / steps[edge]
+            samples = start[edge] + t[:, None] * delta[edge]
+            rc = np.floor((samples - self._origin) / self._cell).astype(int).clip(0, n - 1)
+            crossed[rc[:, 0] + 1, rc[:, 1] + 1] = True
+        # Grow by one cell: covers the 2x2 blocks between samples and rounding at cell borders.
+        grown = np.zeros_like(crossed)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                grown[1:-1, 1:-1] |= crossed[1 + dr : n + 1 + dr, 1 + dc : n + 1 + dc]
+        return grown[1:-1, 1:-1]
+
+    def contains(self, lats: npt.ArrayLike, lons: npt.ArrayLike) -> npt.NDArray[np.bool_]:
+        """Boolean mask of points inside any shape."""
+        lat = np.asarray(lats, dtype=np.float64).ravel()
+        lon = np.asarray(lons, dtype=np.float64).ravel()
+        inside = np.zeros(len(lat), dtype=bool)
+        if not len(lat) or not len(self._shape_bounds):
+            return inside
+
+        n = self.grid_size
+        with np.errstate(invalid="ignore"):
+            cell_rc = np.floor((np.stack([lat, lon], axis=1) - self._origin) / self._cell)
+        in_grid = np.all((cell_rc >= 0) & (cell_rc <= n), axis=1)
+        points = np.nonzero(in_grid)[0]
+        if not len(points):
+            return inside
+        rc = cell_rc[points].astype(int).clip(0, n - 1)
+        cells = rc[:, 0] * n + rc[:, 1]
+        candidates = self._candidates[cells]
+        interior = self._interior[cells]
+
+        n_polygons = len(self.polygons)
+        for s, (min_lat, min_lon, max_lat, max_lon) in enumerate(self._shape_bounds.tolist()):
+            pending = candidates[:, s] & ~inside[points]
+            inside[points[pending & interior[:, s]]] = True
+            idx = points[pending & ~interior[:, s]]
+            if not len(idx):
+                continue
+            p_lat, p_lon = lat[idx], lon[idx]
+            hit = (p_lat >= min_lat) & (p_lat <= max_lat) & (p_lon >= min_lon) & (p_lon <= max_lon)
+            if s < n_polygons and hit.any():
+                hit[hit] = points_in_polygon(p_lat[hit], p_lon[hit], self.polygons[s])
+            inside[idx[hit]] = True
+        return inside
+
+    def contains_point(self, lat: float, lon: float) -> bool:
+        return bool(self.contains([lat], [lon])[0])
+
+    def filter_names(self, names: Sequence[str]) -> list[str]:
+        """Keep ``<time>_<lat>_<lon>`` names inside the fence; unparseable names are kept."""
+        lats, lons, valid = parse_name_positions(names)
+        keep = ~valid
+        keep[valid] = self.contains(lats[valid], lons[valid])
+        return [name for name, k in zip(names, keep.tolist()) if k]
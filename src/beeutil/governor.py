@@ -0,0 +1,180 @@
+"""Resource governor: scale batch sizes, worker counts and poll rates to device load.
+
+The plugin shares a small SoC with recording and odc-api. The governor samples
+``/proc/loadavg``, ``/proc/self/status`` (VmRSS) and the thermal zones under
+``/sys/class/thermal`` and keeps a scale factor in ``[min_scale, 1]``: halved
+while the device is under pressure, grown back step by step once it is idle.
+
+Usage:
+  gov = beeutil.governor.Governor()
+  gov.update()
+  batch = gov.batch_size(500)
+  time.sleep(gov.poll_interval(5))
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import time
+from typing import Callable, TypedDict
+
+DEFAULT_ROOT = "/"
+
+LOAD_HIGH = 0.9
+LOAD_LOW = 0.5
+TEMP_HIGH_C = 75.0
+TEMP_LOW_C = 65.0
+RSS_LOW_FRACTION = 0.8
+
+MIN_SCALE = 0.125
+DECREASE_FACTOR = 0.5
+INCREASE_STEP = 0.125
+SAMPLE_INTERVAL_S = 5.0
+
+
+class LoadSample(TypedDict):
+    load1: float
+    cpu_count: int
+    rss_kb: int | None
+    temp_c: float | None
+
+
+def _read(root: str, path: str) -> str | None:
+    try:
+        with open(os.path.join(root, path.lstrip("/"))) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def read_loadavg(root: str = DEFAULT_ROOT) -> float:
+    """1-minute load average, or 0.0 if unavailable."""
+    text = _read(root, "/proc/loadavg")
+    try:
+        return float(text.split()[0]) if text else 0.0
+    except ValueError:
+        return 0.0
+
+
+def read_rss_kb(root: str = DEFAULT_ROOT) -> int | None:
+    """Resident set size of this process in kB."""
+    text = _read(root, "/proc/self/status")
+    if not text:
+        return None
+    for line in text.splitlines():
+        if line.startswith("VmRSS:"):
+            try:
+                return int(line.split()[1])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+
+def read_max_temp_c(root: str = DEFAULT_ROOT) -> float | None:
+    """Hottest thermal zone in degrees Celsius."""
+    pattern = os.path.join(root, "sys/class/thermal/thermal_zone*/temp")
+    temps = []
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as f:
+                temps.append(int(f.read().strip()) / 1000.0)
+        except (OSError, ValueError):
+            continue
+    return max(temps) if temps else None
+
+
+def sample(root: str = DEFAULT_ROOT, cpu_count: int | None = None) -> LoadSample:
+    return LoadSample(
+        load1=read_loadavg(root),
+        cpu_count=cpu_count or os.cpu_count() or 1,
+        rss_kb=read_rss_kb(root),
+        temp_c=read_max_temp_c(root),
+    )
+
+
+class Governor:
+    """AIMD scale factor driven by load average, RSS and temperature."""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_ROOT,
+        cpu_count: int | None = None,
+        load_high: float = LOAD_HIGH,
+        load_low: float = LOAD_LOW,
+        temp_high_c: float = TEMP_HIGH_C,
+        temp_low_c: float = TEMP_LOW_C,
+        rss_high_kb: int | None = None,
+        min_scale: float = MIN_SCALE,
+        sample_interval_s: float = SAMPLE_INTERVAL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            root: Filesystem root for /proc and /sys, overridable for tests.
+            cpu_count: Cores to normalize load average by (default: os.cpu_count()).
+            load_high, load_low: Per-core load above which to shrink / below which to grow.
+            temp_high_c, temp_low_c: Thermal thresholds in the same sense.
+            rss_high_kb: Process RSS ceiling; None disables the memory signal.
+            min_scale: Lower bound of the scale factor.
+            sample_interval_s: Minimum time between samples in update().
+        """
+        self.root = root
+        self.cpu_count = cpu_count
+        self.load_high = load_high
+        self.load_low = load_low
+        self.temp_high_c = temp_high_c
+        self.temp_low_c = temp_low_c
+        self.rss_high_kb = rss_high_kb
+        self.min_scale = min_scale
+        self.sample_interval_s = sample_interval_s
+        self._clock = clock
+        self._last_sample_at: float | None = None
+        self.scale = 1.0
+        self.last_sample: LoadSample | None = None
+
+    def pressure(self, s: LoadSample) -> float:
+        """Highest ratio of any signal to its high watermark; >= 1.0 means pressure."""
+        ratios = [s["load1"] / s["cpu_count"] / self.load_high]
+        if s["temp_c"] is not None:
+            ratios.append(s["temp_c"] / self.temp_high_c)
+        if s["rss_kb"] is not None and self.rss_high_kb:
+            ratios.append(s["rss_kb"] / self.rss_high_kb)
+        return max(ratios)
+
+    def is_idle(self, s: LoadSample) -> bool:
+        if s["load1"] / s["cpu_count"] >= self.load_low:
+            return False
+        if s["temp_c"] is not None and s["temp_c"] >= self.temp_low_c:
+            return False
+        if s["rss_kb"] is not None and self.rss_high_kb:
+            return s["rss_kb"] < self.rss_high_kb * RSS_LOW_FRACTION
+        return True
+
+    def update(self, force: bool = False) -> float:
+        """Sample the device (at most once per sample_interval_s) and return the scale."""
+        now = self._clock()
+        if (
+            not force
+            and self._last_sample_at is not None
+            and now - self._last_sample_at < self.sample_interval_s
+        ):
+            return self.scale
+        self._last_sample_at = now
+
+        s = sample(self.root, self.cpu_count)
+        self.last_sample = s
+        if self.pressure(s) >= 1.0:
+            self.scale = max(self.min_scale, self.scale * DECREASE_FACTOR)
+        elif self.is_idle(s):
+            self.scale = min(1.0, self.scale + INCREASE_STEP)
+        return self.scale
+
+    def batch_size(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    def workers(self, base: int) -> int:
+        return max(1, round(base * self.scale))
+
+    def poll_interval(self, base_s: float) -> float:
+        return base_s / self.scale
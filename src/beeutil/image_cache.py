@@ -1,84 +1,271 @@
+import bisect
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+import time
+
 import requests
 
-HOST_URL = "http://127.0.0.1:5000"
+from . import resilience
+from ._constants import ODC_HOST
+from .response_cache import cache
+
+HOST_URL = ODC_HOST
 CACHE_ROUTE = f"{HOST_URL}/cache"
 
+CACHE_DIR = "/data/cache"
+FRAME_EXTENSION = ".jpg"
 
-def image_cache_status():
-    res = requests.get(f"{CACHE_ROUTE}/status")
-    if res.status_code != 200:
-        raise Exception(res.json())
+# "auto" lists CACHE_DIR directly when it exists (on device), "local" always does,
+# "http" always goes through odc-api's /cache/list.
+CACHE_LIST_MODE = os.environ.get("BEE_CACHE_LIST_MODE", "auto")
+CACHE_USE_INOTIFY = True
 
-    return status  # noqa: F821
+# Directory mtimes this recent are not trusted to cover every entry.
+MTIME_SETTLE_S = 1.0
 
 
-def enable_image_collection():
-    res = requests.get(f"{CACHE_ROUTE}/enable")
+class ImageCacheError(Exception):
+    """Error from odc-api's /cache endpoints."""
+
+
+def _call(method, route, *args, query=""):
+    send = resilience.get if method == "get" else resilience.post
+    try:
+        res = send(f"{CACHE_ROUTE}/{route}{query}", *args, endpoint=f"cache/{route.split('/')[0]}")
+    except requests.RequestException as e:
+        raise ImageCacheError(f"Failed to reach odc-api: {e}") from e
+
     if res.status_code != 200:
-        raise Exception(res.json())
+        try:
+            detail = res.json()
+        except ValueError:
+            detail = res.text
+        raise ImageCacheError(f"odc-api error {res.status_code}: {detail}")
+    return res
+
+
+def image_cache_status():
+    return cache.cached("cache/status", CACHE_ROUTE, lambda: _call("get", "status").json())
 
+
+def enable_image_collection():
+    res = _call("get", "enable")
+    cache.invalidate("cache/status")
     print(res.json())
 
 
 def disable_image_collection():
-    res = requests.get(f"{CACHE_ROUTE}/disable")
-    if res.status_code != 200:
-        raise Exception(res.json())
-
+    res = _call("get", "disable")
+    cache.invalidate("cache/status")
     print(res.json())
 
 
 def purge_data():
-    res = requests.get(f"{CACHE_ROUTE}/purge")
-    if res.status_code != 200:
-        raise Exception(res.json())
-
+    res = _call("get", "purge")
+    cache.invalidate("cache/status")
     print(res.json())
 
 
 def enable_stereo_collection():
-    res = requests.post(f"{CACHE_ROUTE}/enableDepthFlag")
-    if res.status_code != 200:
-        raise Exception(res.json())
-
+    res = _call("post", "enableDepthFlag")
+    cache.invalidate("cache/status")
     print(res.json())
 
 
 def disable_stereo_collection():
-    res = requests.post(f"{CACHE_ROUTE}/disableDepthFlag")
-    if res.status_code != 200:
-        raise Exception(res.json())
-
+    res = _call("post", "disableDepthFlag")
+    cache.invalidate("cache/status")
     print(res.json())
 
 
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal non-blocking inotify watch on one directory, via libc."""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def read_events(self):
+        """Return (added, removed, overflowed) since the last call."""
+        added, removed, overflowed = set(), set(), False
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                _, mask, _, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+                offset += _INOTIFY_EVENT.size
+                name = buf[offset : offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflowed = True
+                elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                    added.add(name)
+                    removed.discard(name)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    removed.add(name)
+                    added.discard(name)
+        return added, removed, overflowed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _frame_time(name):
+    try:
+        return int(name.split("_", 1)[0])
+    except ValueError:
+        return None
+
+
+class _LocalCacheIndex:
+    """Sorted (time, name) index of CACHE_DIR, refreshed incrementally.
+
+    Changes are picked up from inotify events when available, otherwise by
+    rescanning only when the directory mtime moves.
+    """
+
+    def __init__(self, cache_dir, use_inotify=CACHE_USE_INOTIFY):
+        self.cache_dir = cache_dir
+        self._times = []
+        self._names = []
+        self._known = set()
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(cache_dir)
+            except (OSError, AttributeError, TypeError):
+                self._inotify = None
+        self._rescan()
+
+    def _insert(self, names):
+        entries = [(_frame_time(n), n) for n in names if n.endswith(FRAME_EXTENSION)]
+        entries = [e for e in entries if e[0] is not None and e[1] not in self._known]
+        if not entries:
+            return
+        self._known.update(n for _, n in entries)
+        if len(entries) > 32 or (self._times and min(entries)[0] < self._times[-1]):
+            merged = sorted(list(zip(self._times, self._names)) + entries)
+            self._times = [t for t, _ in merged]
+            self._names = [n for _, n in merged]
+        else:
+            for t, n in sorted(entries):
+                self._times.append(t)
+                self._names.append(n)
+
+    def _remove(self, names):
+        names = self._known.intersection(names)
+        if not names:
+            return
+        self._known.difference_update(names)
+        kept = [(t, n) for t, n in zip(self._times, self._names) if n not in names]
+        self._times = [t for t, _ in kept]
+        self._names = [n for _, n in kept]
+
+    def _rescan(self):
+        self._mtime_ns = os.stat(self.cache_dir).st_mtime_ns
+        with os.scandir(self.cache_dir) as it:
+            present = {entry.name for entry in it if entry.name.endswith(FRAME_EXTENSION)}
+        self._remove(self._known - present)
+        self._insert(present - self._known)
+
+    def refresh(self):
+        if self._inotify is not None:
+            added, removed, overflowed = self._inotify.read_events()
+            if overflowed:
+                self._rescan()
+            else:
+                self._remove(removed)
+                self._insert(added)
+            return
+
+        mtime_ns = os.stat(self.cache_dir).st_mtime_ns
+        settled = time.time() - mtime_ns / 1e9 > MTIME_SETTLE_S
+        if mtime_ns != self._mtime_ns or not settled:
+            self._rescan()
+
+    def list(self, since=None, until=None):
+        """Frame names with since < time <= until, oldest first."""
+        with self._lock:
+            self.refresh()
+            lo = 0 if since is None else bisect.bisect_right(self._times, int(since))
+            hi = len(self._times) if until is None else bisect.bisect_right(self._times, int(until))
+            return self._names[lo:hi]
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+_local_index = None
+_local_index_lock = threading.Lock()
+
+
+def _use_local_listing():
+    if CACHE_LIST_MODE == "local":
+        return True
+    return CACHE_LIST_MODE == "auto" and os.path.isdir(CACHE_DIR)
+
+
+def _get_local_index():
+    global _local_index
+
+    with _local_index_lock:
+        if _local_index is None or _local_index.cache_dir != CACHE_DIR:
+            if _local_index is not None:
+                _local_index.close()
+            _local_index = _LocalCacheIndex(CACHE_DIR)
+        return _local_index
+
+
 def list_contents(since=None, until=None):
-    url = f"{CACHE_ROUTE}/list"
+    if _use_local_listing():
+        return _get_local_index().list(since, until)
+
+    query = ""
     if since is not None or until is not None:
-        url += "?"
+        query += "?"
         if since is not None:
-            url += f"since={since}"
+            query += f"since={since}"
             if until is not None:
-                url += "&"
+                query += "&"
         if until is not None:
-            url += f"until={until}"
-
-    res = requests.get(url)
-    if res.status_code != 200:
-        raise Exception(res.json())
+            query += f"until={until}"
 
+    res = _call("get", "list", query=query)
     contents = res.json()
     return contents
 
 
 def upload_to_s3(prefix, handle, aws_bucket, aws_region, aws_secret, aws_key):
-    url = f"{CACHE_ROUTE}/uploadS3/{handle}?prefix={prefix}&key={aws_key}&bucket={aws_bucket}&region={aws_region}"
+    query = f"?prefix={prefix}&key={aws_key}&bucket={aws_bucket}&region={aws_region}"
     headers = {
         "authorization": aws_secret,
     }
-    res = requests.post(url, headers)
-
-    if res.status_code != 200:
-        raise Exception(res.json())
-
+    res = _call("post", f"uploadS3/{handle}", headers, query=query)
     print(res.json())
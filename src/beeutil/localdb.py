@@ -0,0 +1,477 @@
+"""Local DB: read-only SQLite fast path for embeddings and recordings metadata.
+
+On the device the recorder keeps frame embeddings and video segments in SQLite
+under ``/data/recording``. This module opens those databases read-only
+(``mode=ro`` URI, safe alongside the recorder's WAL writer) and runs indexed
+range queries straight into NumPy arrays, skipping odc-api's HTTP + JSON.
+
+``list_embeddings``, ``fetch_and_match`` and ``get_videos_by_timerange`` return
+the same types as their HTTP counterparts.
+
+Usage:
+  frames = beeutil.localdb.list_embeddings(since_ms=cursor + 1)
+  arrays = beeutil.localdb.embedding_arrays(since_ms=cursor + 1)
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypedDict, overload
+from urllib.parse import quote
+
+import numpy as np
+
+from . import embeddings
+from . import precision as _precision
+from .embeddings import (
+    EmbeddingsError,
+    FrameEmbedding,
+    Match,
+    NearDuplicateFilter,
+    QueryEmbedding,
+    QuerySet,
+    find_matches_arrays,
+)
+from .recordings import RecordingsError, VideoFile
+from .records import EmbeddingRecord, MatchBatch, VideoRecord
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from .geo import Geofence
+    from .result_cache import ResultCache
+
+RECORDING_DIR = "/data/recording"
+
+EMBEDDINGS_TABLE = "embeddings"
+EMBEDDING_COLUMNS = ("timestamp_ms", "image_name", "lat", "lon", "embedding")
+VIDEOS_TABLE = "videos"
+VIDEO_COLUMNS = ("filepath", "timestamp_ms")
+
+# Stored embeddings are little-endian float32 blobs (JSON text is also accepted).
+EMBEDDING_DTYPE = "<f4"
+
+BUSY_TIMEOUT_S = 1.0
+
+
+class LocalDBError(EmbeddingsError, RecordingsError):
+    """Local database missing, unreadable or not in the expected shape."""
+
+
+class EmbeddingArrays(TypedDict):
+    timestamp_ms: npt.NDArray[np.int64]
+    lat: npt.NDArray[np.float64]
+    lon: npt.NDArray[np.float64]
+    image_name: list[str]
+    vectors: npt.NDArray[np.floating[Any]]
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open ``path`` read-only. Never creates the file or takes write locks."""
+    if not os.path.exists(path):
+        raise LocalDBError(f"Database not found: {path}")
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    try:
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+    except sqlite3.Error as e:
+        raise LocalDBError(f"Failed to open {path}: {e}") from e
+    return conn
+
+
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def find_db(table: str, recording_dir: str | None = None) -> str:
+    """Path of the first ``*.db`` in the recording dir that has ``table``."""
+    directory = recording_dir or RECORDING_DIR
+    for path in sorted(glob.glob(os.path.join(directory, "*.db"))):
+        try:
+            conn = connect(path)
+        except LocalDBError:
+            continue
+        try:
+            if _has_table(conn, table):
+                return path
+        except sqlite3.Error:
+            continue
+        finally:
+            conn.close()
+    raise LocalDBError(f"No database with table '{table}' in {directory}")
+
+
+_connections: dict[str, sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+
+
+def _connection(table: str, db_path: str | None) -> sqlite3.Connection:
+    path = db_path or find_db(table)
+    with _connections_lock:
+        conn = _connections.get(path)
+        if conn is None:
+            conn = connect(path)
+            _connections[path] = conn
+        return conn
+
+
+def close_all() -> None:
+    with _connections_lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+
+
+def _range_query(
+    table: str,
+    columns: tuple[str, ...],
+    since_ms: int | None,
+    until_ms: int | None,
+    db_path: str | None,
+) -> list[tuple[Any, ...]]:
+    clauses = []
+    params = []
+    if since_ms is not None:
+        clauses.append("timestamp_ms >= ?")
+        params.append(since_ms)
+    if until_ms is not None:
+        clauses.append("timestamp_ms <= ?")
+        params.append(until_ms)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY timestamp_ms"
+
+    conn = _connection(table, db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        raise LocalDBError(f"Query on {table} failed: {e}") from e
+
+
+def _decode_vectors(
+    blobs: list[Any],
+    dtype: type[np.floating[Any]] = np.float32,
+) -> npt.NDArray[np.floating[Any]]:
+    if not blobs:
+        return np.empty((0, 0), dtype=dtype)
+    if isinstance(blobs[0], (bytes, memoryview)):
+        sizes = {len(b) for b in blobs}
+        if len(sizes) != 1:
+            raise LocalDBError(f"Embedding blobs have mixed sizes: {sorted(sizes)}")
+        flat = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE)
+        return flat.reshape(len(blobs), -1).astype(dtype, copy=False)
+    try:
+        return np.array([json.loads(b) for b in blobs], dtype=dtype)
+    except (TypeError, ValueError) as e:
+        raise LocalDBError(f"Unreadable embedding column: {e}") from e
+
+
+def embedding_arrays(
+    since_ms: int | None = None,
+    until_ms: int | None = None,
+    db_path: str | None = None,
+    precision: str | None = None,
+) -> EmbeddingArrays:
+    """Embeddings in [since_ms, until_ms] as columns, ordered by timestamp.
+
+    Args:
+        precision: Decode vectors straight into the dtype this scoring precision
+            works from (precision.storage_dtype). None keeps float32.
+    """
+    dtype = np.float32 if precision is None else _precision.storage_dtype(precision)
+    rows = _range_query(EMBEDDINGS_TABLE, EMBEDDING_COLUMNS, since_ms, until_ms, db_path)
+    if not rows:
+        return EmbeddingArrays(
+            timestamp_ms=np.empty(0, dtype=np.int64),
+            lat=np.empty(0, dtype=np.float64),
+            lon=np.empty(0, dtype=np.float64),
+            image_name=[],
+            vectors=np.empty((0, 0), dtype=dtype),
+        )
+    timestamps, names, lats, lons, blobs = zip(*rows)
+    return EmbeddingArrays(
+        timestamp_ms=np.array(timestamps, dtype=np.int64),
+        lat=np.array(lats, dtype=np.float64),
+        lon=np.array(lons, dtype=np.float64),
+        image_name=list(names),
+        vectors=_decode_vectors(list(blobs), dtype),
+    )
+
+
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    db_path: str | None = ...,
+    as_records: Literal[False] = ...,
+) -> list[FrameEmbedding]: ...
+
+
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    db_path: str | None = ...,
+    *,
+    as_records: Literal[True],
+) -> list[EmbeddingRecord]: ...
+
+
+@overload
+def list_embeddings(
+    since_ms: int | None = ...,
+    until_ms: int | None = ...,
+    db_path: str | None = ...,
+    as_records: bool = ...,
+) -> list[FrameEmbedding] | list[EmbeddingRecord]: ...
+
+
+def list_embeddings(
+    since_ms: int | None = None,
+    until_ms: int | None = None,
+    db_path: str | None = None,
+    as_records: bool = False,
+) -> list[FrameEmbedding] | list[EmbeddingRecord]:
+    """Drop-in for beeutil.embeddings.list_embeddings backed by the local DB."""
+    arrays = embedding_arrays(since_ms, until_ms, db_path)
+    make: Callable[..., Any] = EmbeddingRecord if as_records else FrameEmbedding
+    return [
+        make(
+            embeddings=vector,
+            timestamp_ms=ts,
+            lat=lat,
+            lon=lon,
+            image_name=name,
+        )
+        for vector, ts, lat, lon, name in zip(
+            arrays["vectors"].tolist(),
+            arrays["timestamp_ms"].tolist(),
+            arrays["lat"].tolist(),
+            arrays["lon"].tolist(),
+            arrays["image_name"],
+        )
+    ]
+
+
+@overload
+def match_embedding_arrays(
+    arrays: EmbeddingArrays,
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: Literal[False] = ...,
+) -> tuple[list[Match], int]: ...
+
+
+@overload
+def match_embedding_arrays(
+    arrays: EmbeddingArrays,
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    *,
+    as_batch: Literal[True],
+) -> tuple[MatchBatch, int]: ...
+
+
+@overload
+def match_embedding_arrays(
+    arrays: EmbeddingArrays,
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: bool = ...,
+) -> tuple[list[Match] | MatchBatch, int]: ...
+
+
+def match_embedding_arrays(
+    arrays: EmbeddingArrays,
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = None,
+    geofence: Geofence | None = None,
+    dedup: NearDuplicateFilter | None = None,
+    precision: str | None = None,
+    result_cache: ResultCache | None = None,
+    as_batch: bool = False,
+) -> tuple[list[Match] | MatchBatch, int]:
+    """fetch_and_match over already-fetched, timestamp-ordered columns."""
+    if not len(arrays["timestamp_ms"]):
+        return (MatchBatch.empty() if as_batch else [], since_ms)
+    cursor = max(since_ms, int(arrays["timestamp_ms"].max()))
+
+    vectors = arrays["vectors"]
+    timestamps = arrays["timestamp_ms"]
+    lats = arrays["lat"]
+    lons = arrays["lon"]
+    names = arrays["image_name"]
+    keep = None
+    if geofence is not None:
+        keep = geofence.contains(lats, lons)
+    if dedup is not None:
+        # Rows are in timestamp order; only in-fence frames enter the dedup window.
+        if keep is None:
+            keep = np.ones(len(vectors), dtype=bool)
+        keep[keep] = dedup.keep_mask(vectors[keep])
+    if keep is not None:
+        vectors, timestamps, lats, lons = vectors[keep], timestamps[keep], lats[keep], lons[keep]
+        names = [name for name, k in zip(names, keep.tolist()) if k]
+
+    matches = find_matches_arrays(
+        vectors,
+        timestamps,
+        lats,
+        lons,
+        names,
+        query_embeddings,
+        default_threshold,
+        processes,
+        precision,
+        result_cache=result_cache,
+        as_batch=as_batch,
+    )
+    return (matches, cursor)
+
+
+@overload
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    db_path: str | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: Literal[False] = ...,
+) -> tuple[list[Match], int]: ...
+
+
+@overload
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    db_path: str | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    *,
+    as_batch: Literal[True],
+) -> tuple[MatchBatch, int]: ...
+
+
+@overload
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = ...,
+    db_path: str | None = ...,
+    geofence: Geofence | None = ...,
+    dedup: NearDuplicateFilter | None = ...,
+    precision: str | None = ...,
+    result_cache: ResultCache | None = ...,
+    as_batch: bool = ...,
+) -> tuple[list[Match] | MatchBatch, int]: ...
+
+
+def fetch_and_match(
+    since_ms: int,
+    query_embeddings: list[QueryEmbedding] | QuerySet,
+    default_threshold: float,
+    processes: int | None = None,
+    db_path: str | None = None,
+    geofence: Geofence | None = None,
+    dedup: NearDuplicateFilter | None = None,
+    precision: str | None = None,
+    result_cache: ResultCache | None = None,
+    as_batch: bool = False,
+) -> tuple[list[Match] | MatchBatch, int]:
+    """Drop-in for beeutil.embeddings.fetch_and_match that scores the DB columns directly.
+
+    Vectors are decoded in the dtype ``precision`` scores from, so no copy is
+    made between the query and scoring.
+    """
+    precision = _precision.check(precision or embeddings.PRECISION)
+    arrays = embedding_arrays(since_ms=since_ms, db_path=db_path, precision=precision)
+    return match_embedding_arrays(
+        arrays,
+        since_ms,
+        query_embeddings,
+        default_threshold,
+        processes,
+        geofence,
+        dedup,
+        result_cache=result_cache,
+        precision=precision,
+        as_batch=as_batch,
+    )
+
+
+@overload
+def get_videos_by_timerange(
+    start_ms: int,
+    end_ms: int,
+    db_path: str | None = ...,
+    as_records: Literal[False] = ...,
+) -> list[VideoFile]: ...
+
+
+@overload
+def get_videos_by_timerange(
+    start_ms: int,
+    end_ms: int,
+    db_path: str | None = ...,
+    *,
+    as_records: Literal[True],
+) -> list[VideoRecord]: ...
+
+
+@overload
+def get_videos_by_timerange(
+    start_ms: int,
+    end_ms: int,
+    db_path: str | None = ...,
+    as_records: bool = ...,
+) -> list[VideoFile] | list[VideoRecord]: ...
+
+
+def get_videos_by_timerange(
+    start_ms: int,
+    end_ms: int,
+    db_path: str | None = None,
+    as_records: bool = False,
+) -> list[VideoFile] | list[VideoRecord]:
+    """Drop-in for beeutil.recordings.get_videos_by_timerange backed by the local DB."""
+    rows = _range_query(VIDEOS_TABLE, VIDEO_COLUMNS, start_ms, end_ms, db_path)
+    make: Callable[..., Any] = VideoRecord if as_records else VideoFile
+    return [
+        make(filepath=filepath, filename=filepath.rsplit("/", 1)[-1], timestamp_ms=ts)
+        for filepath, ts in rows
+    ]
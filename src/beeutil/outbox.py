@@ -0,0 +1,284 @@
+"""Outbox: store-and-forward delivery of matches and events to a plugin backend.
+
+``put`` appends to a SQLite (WAL) queue and returns at once, so the plugin
+loop never waits on the network. A flush sends the oldest items as one
+gzipped JSON POST (``{"items": [...]}``) once a batch is due: ``batch_size``
+items, ``max_bytes`` of payload, or an oldest item older than ``max_age_s``.
+Delivered items are deleted; on failure the batch stays queued and the next
+attempt waits a decorrelated-jitter backoff, so nothing is lost while LTE is
+down and the backlog drains when it returns. A batch the backend rejects
+outright (4xx other than ``RETRY_CLIENT_STATUSES``) is halved and resent, so
+only an item rejected on its own is dropped (and counted in ``rejected``)
+rather than blocking the queue or taking its batch-mates with it. The smaller
+batch size is kept (the backend may cap batches, e.g. with 413) until an item
+is dropped, which shows the rejections came from that item.
+
+Usage:
+  outbox = beeutil.outbox.Outbox(f"/data/plugins/{PLUGIN_NAME}/outbox.db", "https://example.com/ingest")
+  outbox.start()
+  outbox.put_many(matches)
+  vlog(f"outbox backlog: {outbox.backlog}")
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Mapping, Sequence, TypedDict
+
+import requests
+
+from . import resilience
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_BYTES = 256 * 1024
+DEFAULT_MAX_AGE_S = 30.0
+POLL_INTERVAL_S = 1.0
+TIMEOUT = 15
+
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 300.0
+
+# 4xx responses worth retrying; other 4xx batches are split, then dropped as rejected.
+RETRY_CLIENT_STATUSES = frozenset({408, 409, 425, 429})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+"""
+
+
+class OutboxError(Exception):
+    """Outbox database error."""
+
+
+class OutboxStats(TypedDict):
+    backlog: int
+    backlog_bytes: int
+    oldest_age_s: float | None
+    sent: int
+    batches: int
+    failures: int
+    rejected: int
+
+
+class Outbox:
+    """Durable, batched, retrying POST queue."""
+
+    def __init__(
+        self,
+        path: str,
+        url: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+        headers: Mapping[str, str] | None = None,
+        timeout: float = TIMEOUT,
+    ) -> None:
+        """
+        Args:
+            path: Queue database file (created if missing).
+            url: Endpoint each batch is POSTed to.
+            batch_size: Most items per POST; a full batch is sent right away.
+            max_bytes: Most uncompressed JSON bytes per POST; reaching it also sends.
+            max_age_s: Send a partial batch once its oldest item is this old.
+            headers: Extra request headers, e.g. authorization.
+        """
+        self.path = path
+        self.url = url
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.sent = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self._delay = BACKOFF_BASE_S
+        self._retry_at = 0.0
+        self._limit = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            raise OutboxError(f"Cannot open {path}: {e}") from e
+
+    def put(self, item: Mapping[str, Any], kind: str = "match") -> None:
+        self.put_many([item], kind)
+
+    def put_many(self, items: Sequence[Mapping[str, Any]], kind: str = "match") -> None:
+        """Queue items (JSON-serializable mappings, e.g. Match or Event)."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(now, kind, json.dumps(dict(item), separators=(",", ":"))) for item in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO outbox (created, kind, body) VALUES (?, ?, ?)", rows
+            )
+        if self._thread is not None:
+            self._wake.set()
+
+    @property
+    def backlog(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0])
+
+    def stats(self) -> OutboxStats:
+        with self._lock:
+            count, size, oldest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), MIN(created) FROM outbox"
+            ).fetchone()
+        return {
+            "backlog": int(count),
+            "backlog_bytes": int(size),
+            "oldest_age_s": None if oldest is None else time.time() - oldest,
+            "sent": self.sent,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+    def due(self, now: float | None = None) -> bool:
+        """Whether a batch should go out now (ignoring retry backoff)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            count, size, oldest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), MIN(created) FROM outbox"
+            ).fetchone()
+        if not count:
+            return False
+        return bool(
+            count >= self.batch_size or size >= self.max_bytes or now - oldest >= self.max_age_s
+        )
+
+    def _next_batch(self) -> tuple[list[int], list[tuple[str, str]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, body FROM outbox ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        ids: list[int] = []
+        items: list[tuple[str, str]] = []
+        size = 0
+        for row_id, kind, body in rows:
+            if items and size + len(body) > self.max_bytes:
+                break
+            ids.append(row_id)
+            items.append((kind, body))
+            size += len(body)
+        return ids, items
+
+    def _send(self, items: list[tuple[str, str]]) -> int | None:
+        """POST one batch. Returns the status code, or None if unreachable."""
+        # Bodies are already JSON; splice them instead of re-encoding.
+        entries = ",".join(f'{{"kind":{json.dumps(kind)},"item":{body}}}' for kind, body in items)
+        payload = f'{{"items":[{entries}]}}'
+        headers = dict(
+            self.headers, **{"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+        try:
+            resp = resilience.post(
+                self.url,
+                data=gzip.compress(payload.encode()),
+                headers=headers,
+                timeout=self.timeout,
+                endpoint=f"outbox:{self.url}",
+            )
+        except requests.RequestException:
+            return None
+        return resp.status_code
+
+    def flush(self, force: bool = False) -> int:
+        """Send due batches until the queue is empty, not due, or a send fails.
+
+        Args:
+            force: Send even partial batches, and ignore the retry backoff.
+
+        Returns:
+            Items delivered.
+        """
+        delivered = 0
+        with self._flush_lock:
+            if not force and time.time() < self._retry_at:
+                return 0
+            while force or self.due():
+                ids, items = self._next_batch()
+                if not ids:
+                    break
+                # Send the batch in chunks of at most _limit items, halving on rejection.
+                start = 0
+                while start < len(ids):
+                    chunk = ids[start : start + self._limit]
+                    status = self._send(items[start : start + len(chunk)])
+                    rejected = (
+                        status is not None
+                        and 400 <= status < 500
+                        and status not in RETRY_CLIENT_STATUSES
+                    )
+                    if not rejected and (status is None or not 200 <= status < 300):
+                        self.failures += 1
+                        self._delay = min(
+                            BACKOFF_CAP_S, random.uniform(BACKOFF_BASE_S, self._delay * 3)
+                        )
+                        self._retry_at = time.time() + self._delay
+                        return delivered
+                    if rejected and len(chunk) > 1:
+                        # Bisect towards the item the backend refuses.
+                        self._limit = len(chunk) // 2
+                        continue
+                    with self._lock, self._conn:
+                        self._conn.execute(
+                            f"DELETE FROM outbox WHERE id IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        )
+                    self._delay = BACKOFF_BASE_S
+                    self._retry_at = 0.0
+                    start += len(chunk)
+                    if rejected:
+                        self.rejected += 1
+                        self._limit = self.batch_size
+                        continue
+                    self.sent += len(chunk)
+                    self.batches += 1
+                    delivered += len(chunk)
+        return delivered
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.flush()
+            self._wake.wait(POLL_INTERVAL_S)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Flush from a background thread as batches come due."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="beeutil-outbox", daemon=True)
+            self._thread.start()
+
+    def close(self, flush: bool = False) -> None:
+        """Stop the background thread; with ``flush``, try to send everything first."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush(force=True)
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,118 @@
+"""Scoring kernels, with process-pool sharding for large frame batches.
+
+The query matrix is copied once into ``multiprocessing.shared_memory`` and
+attached by every worker, so only frame shards and the (sparse) hits cross
+process boundaries.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from . import precision
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+# None uses the platform default (fork on Linux).
+START_METHOD: str | None = None
+SHARDS_PER_PROCESS = 2
+
+
+def score_hits(
+    frames: npt.NDArray[Any],
+    queries: npt.NDArray[Any],
+    thresholds: npt.NDArray[np.float64],
+    frame_scales: npt.NDArray[np.float32] | None = None,
+    query_scales: npt.NDArray[np.float32] | None = None,
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+    """Score row-normalized frames against row-normalized queries.
+
+    Matrices may be encoded by beeutil.precision; int8 matrices come with
+    their per-row scales.
+
+    Returns (frame_rows, query_cols, scores) for every pair at or above its
+    query's threshold, in frame-major order.
+    """
+    scores = precision.dot((frames, frame_scales), (queries, query_scales))
+    with np.errstate(invalid="ignore"):
+        rows, cols = np.nonzero(scores >= thresholds)
+    return rows, cols, scores[rows, cols].astype(np.float64)
+
+
+_worker_shm: shared_memory.SharedMemory | None = None
+_worker_queries: npt.NDArray[Any] | None = None
+_worker_thresholds: npt.NDArray[np.float64] | None = None
+_worker_query_scales: npt.NDArray[np.float32] | None = None
+
+
+def _init_worker(
+    shm_name: str,
+    shape: tuple[int, ...],
+    dtype: str,
+    thresholds: npt.NDArray[np.float64],
+    query_scales: npt.NDArray[np.float32] | None = None,
+) -> None:
+    global _worker_shm, _worker_queries, _worker_thresholds, _worker_query_scales
+
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_queries = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+    _worker_thresholds = thresholds
+    _worker_query_scales = query_scales
+
+
+def _score_shard(
+    task: tuple[int, npt.NDArray[Any], npt.NDArray[np.float32] | None],
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+    assert _worker_queries is not None
+    assert _worker_thresholds is not None
+    offset, frames, frame_scales = task
+    rows, cols, scores = score_hits(
+        frames, _worker_queries, _worker_thresholds, frame_scales, _worker_query_scales
+    )
+    return rows + offset, cols, scores
+
+
+def score_hits_sharded(
+    frames: npt.NDArray[Any],
+    queries: npt.NDArray[Any],
+    thresholds: npt.NDArray[np.float64],
+    processes: int,
+    frame_scales: npt.NDArray[np.float32] | None = None,
+    query_scales: npt.NDArray[np.float32] | None = None,
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+    """Same result as score_hits, with frame rows split across a process pool."""
+    n_shards = max(1, min(len(frames), processes * SHARDS_PER_PROCESS))
+    bounds = np.linspace(0, len(frames), n_shards + 1).astype(int).tolist()
+    tasks = [
+        (a, frames[a:b], None if frame_scales is None else frame_scales[a:b])
+        for a, b in zip(bounds[:-1], bounds[1:])
+        if b > a
+    ]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, queries.nbytes))
+    try:
+        shared = np.ndarray(queries.shape, dtype=queries.dtype, buffer=shm.buf)
+        shared[:] = queries
+        del shared
+
+        ctx = multiprocessing.get_context(START_METHOD)
+        with ctx.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(shm.name, queries.shape, queries.dtype.str, thresholds, query_scales),
+        ) as pool:
+            results = pool.map(_score_shard, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if not results:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=np.float64)
+    rows, cols, scores = zip(*results)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
@@ -0,0 +1,100 @@
+"""Precision: reduced-precision storage and scoring for embedding matrices.
+
+Modes for row-normalized frame and query matrices:
+
+- ``float64``: reference.
+- ``float32``: half the memory traffic; scores differ by ~1e-7.
+- ``float16``: quarter-size storage, scored in float32.
+- ``int8``: per-row symmetric quantization (``round(x / max|x| * 127)``) with
+  a float32 scale per row, scored in float32 and rescaled.
+
+``MAX_SCORE_ERROR`` bounds the absolute cosine-score error per mode for unit
+vectors of 16 to 1024 dimensions (int8 error shrinks as dimension grows).
+Threshold decisions can only flip for scores within that distance of the
+threshold.
+
+Usage:
+  matches = beeutil.embeddings.find_matches_batch(frames, qe, 0.8, precision="int8")
+  # or for every call: BEE_EMBEDDINGS_PRECISION=float32
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+PRECISIONS = ("float64", "float32", "float16", "int8")
+INT8_MAX = 127.0
+
+MAX_SCORE_ERROR = {
+    "float64": 1e-12,
+    "float32": 1e-5,
+    "float16": 2e-3,
+    "int8": 1e-2,
+}
+
+# (matrix, per-row scale or None)
+Encoded = Tuple["npt.NDArray[Any]", Optional["npt.NDArray[np.float32]"]]
+
+
+class PrecisionError(Exception):
+    """Unknown precision mode."""
+
+
+def check(precision: str) -> str:
+    if precision not in PRECISIONS:
+        raise PrecisionError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+    return precision
+
+
+def work_dtype(precision: str) -> type[np.floating[Any]]:
+    """Float dtype to build and normalize matrices in before encoding."""
+    return np.float64 if check(precision) == "float64" else np.float32
+
+
+def storage_dtype(precision: str) -> type[np.floating[Any]]:
+    """Float dtype to hold raw (unnormalized) vectors in ahead of scoring.
+
+    float16 keeps float16 (half the memory of float32); int8 needs per-row
+    scales taken from the normalized matrix, so its raw vectors stay float32.
+    """
+    return np.float16 if check(precision) == "float16" else work_dtype(precision)
+
+
+def encode(matrix: npt.NDArray[np.floating[Any]], precision: str) -> Encoded:
+    """Encode a row-normalized matrix. NaN rows (zero vectors) keep scoring NaN."""
+    check(precision)
+    if precision == "float64":
+        return matrix.astype(np.float64, copy=False), None
+    if precision == "float32":
+        return matrix.astype(np.float32, copy=False), None
+    if precision == "float16":
+        return matrix.astype(np.float16), None
+
+    with np.errstate(invalid="ignore"):
+        peak = np.max(np.abs(matrix), axis=1) if matrix.size else np.zeros(len(matrix))
+    peak = np.where(peak > 0, peak, np.where(np.isnan(peak), np.nan, 1.0))
+    scaled = np.nan_to_num(matrix / peak[:, None] * INT8_MAX)
+    quantized = np.rint(scaled).astype(np.int8)
+    scales = (peak / INT8_MAX).astype(np.float32)
+    return quantized, scales
+
+
+def dot(frames: Encoded, queries: Encoded) -> npt.NDArray[np.floating[Any]]:
+    """(n_frames, n_queries) scores between encoded matrices."""
+    frame_matrix, frame_scales = frames
+    query_matrix, query_scales = queries
+    both_float64 = frame_matrix.dtype == np.float64 and query_matrix.dtype == np.float64
+    dtype = np.float64 if both_float64 else np.float32
+    scores: npt.NDArray[np.floating[Any]] = np.dot(
+        frame_matrix.astype(dtype, copy=False), query_matrix.astype(dtype, copy=False).T
+    )
+    if frame_scales is not None:
+        scores *= frame_scales[:, None]
+    if query_scales is not None:
+        scores *= query_scales[None, :]
+    return scores
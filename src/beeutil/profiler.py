@@ -0,0 +1,236 @@
+"""Sampling profiler: periodic collapsed-stack dumps for CPU debugging on device.
+
+Opt-in via the ``BEE_PROFILE`` env var or a ``BEE_PROFILE`` key in the plugin's
+``.env``. A daemon thread samples every thread's stack with
+``sys._current_frames`` and periodically writes collapsed-stack files
+(``frame;frame;frame count`` per line, flamegraph.pl / speedscope compatible) to
+``/data/plugins/<name>/profiles``.
+
+Usage:
+  profiler = beeutil.profiler.start('my-plugin')  # None unless enabled
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType, TracebackType
+
+from . import secrets
+
+ENV_VAR = "BEE_PROFILE"
+INTERVAL_ENV_VAR = "BEE_PROFILE_INTERVAL_MS"
+
+DEFAULT_INTERVAL_S = 0.02
+DEFAULT_FLUSH_INTERVAL_S = 60.0
+DEFAULT_MAX_FILES = 120
+DEFAULT_MAX_DEPTH = 64
+
+PROFILE_SUFFIX = ".folded"
+
+_TRUTHY = ("1", "true", "yes", "on")
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerError(Exception):
+    """Profiler could not be started."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None, max_depth: int = DEFAULT_MAX_DEPTH) -> list[str]:
+    """Return frame labels from outermost to innermost."""
+    labels: list[str] = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    """Low-overhead stack sampler that writes collapsed stacks to ``out_dir``."""
+
+    def __init__(
+        self,
+        out_dir: str,
+        interval_s: float = DEFAULT_INTERVAL_S,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+        max_files: int = DEFAULT_MAX_FILES,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ) -> None:
+        if interval_s <= 0:
+            raise ProfilerError(f"interval_s must be positive, got {interval_s}")
+        self.out_dir = out_dir
+        self.interval_s = interval_s
+        self.flush_interval_s = flush_interval_s
+        self.max_files = max_files
+        self.max_depth = max_depth
+        self.samples = 0
+        self._counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        """Record one stack sample of every thread except the sampler itself."""
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = collapse_stack(frame, self.max_depth)
+                if not stack:
+                    continue
+                thread_name = names.get(ident, f"thread-{ident}")
+                self._counts[";".join([thread_name, *stack])] += 1
+            self.samples += 1
+
+    def flush(self) -> str | None:
+        """Write accumulated samples to a new collapsed-stack file.
+
+        Returns the file path, or None if there was nothing to write.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"profile-{int(time.time() * 1000)}{PROFILE_SUFFIX}")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, path)
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        files = sorted(f for f in os.listdir(self.out_dir) if f.endswith(PROFILE_SUFFIX))
+        for name in files[: max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.out_dir, name))
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval_s
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self._safe_flush()
+                next_flush = time.monotonic() + self.flush_interval_s
+
+    def _safe_flush(self) -> None:
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Failed to write profile to {self.out_dir}: {e}")
+
+    def start(self) -> SamplingProfiler:
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bee-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling and write any remaining samples."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._safe_flush()
+
+    def __enter__(self) -> SamplingProfiler:
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+
+def profiles_dir(plugin_name: str) -> str:
+    return os.path.join(secrets.PLUGIN_DIR, plugin_name, "profiles")
+
+
+def _setting(plugin_name: str, key: str) -> str | None:
+    value = os.environ.get(key)
+    if value is not None:
+        return value
+    try:
+        return secrets.load(plugin_name).get(key)
+    except secrets.SecretsError:
+        return None
+
+
+def is_enabled(plugin_name: str) -> bool:
+    """True if profiling is requested by env var or the plugin's secrets."""
+    value = _setting(plugin_name, ENV_VAR)
+    return value is not None and value.strip().lower() in _TRUTHY
+
+
+_active: SamplingProfiler | None = None
+
+
+def start(
+    plugin_name: str,
+    interval_s: float | None = None,
+    flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+    max_files: int = DEFAULT_MAX_FILES,
+) -> SamplingProfiler | None:
+    """Start the process-wide profiler if enabled. Returns None when disabled."""
+    global _active
+
+    if _active is not None:
+        return _active
+    if not is_enabled(plugin_name):
+        return None
+
+    if interval_s is None:
+        interval_s = DEFAULT_INTERVAL_S
+        interval_ms = _setting(plugin_name, INTERVAL_ENV_VAR)
+        if interval_ms:
+            try:
+                parsed = float(interval_ms) / 1000
+            except ValueError:
+                parsed = 0.0
+            if parsed > 0:
+                interval_s = parsed
+            else:
+                logger.warning(f"Ignoring invalid {INTERVAL_ENV_VAR}={interval_ms!r}")
+
+    profiler = SamplingProfiler(
+        profiles_dir(plugin_name),
+        interval_s=interval_s,
+        flush_interval_s=flush_interval_s,
+        max_files=max_files,
+    )
+    _active = profiler.start()
+    logger.info(f"Sampling profiler writing to {profiler.out_dir}")
+    return _active
+
+
+def stop() -> None:
+    global _active
+
+    if _active is not None:
+        _active.stop()
+        _active = None
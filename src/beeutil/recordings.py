@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import Any, Callable, Literal, TypedDict, overload
 
 import requests
 
+from . import resilience
 from ._constants import ODC_API_BASE
+from .records import VideoRecord
 
 
 class VideoFile(TypedDict):
@@ -22,11 +24,35 @@ class RecordingsError(Exception):
     """Error querying recordings."""
 
 
-def get_videos_by_timerange(start_ms: int, end_ms: int) -> list[VideoFile]:
-    """Return video files within a time range."""
+@overload
+def get_videos_by_timerange(
+    start_ms: int, end_ms: int, as_records: Literal[False] = ...
+) -> list[VideoFile]: ...
+
+
+@overload
+def get_videos_by_timerange(
+    start_ms: int, end_ms: int, as_records: Literal[True]
+) -> list[VideoRecord]: ...
+
+
+@overload
+def get_videos_by_timerange(
+    start_ms: int, end_ms: int, as_records: bool = ...
+) -> list[VideoFile] | list[VideoRecord]: ...
+
+
+def get_videos_by_timerange(
+    start_ms: int, end_ms: int, as_records: bool = False
+) -> list[VideoFile] | list[VideoRecord]:
+    """Return video files within a time range.
+
+    Args:
+        as_records: Return slotted beeutil.records.VideoRecord objects.
+    """
     url = f"{ODC_API_BASE}/recordings/video/query-by-timestamp-ms/{start_ms}/{end_ms}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = resilience.get(url, endpoint="recordings", timeout=TIMEOUT)
     except requests.RequestException as e:
         raise RecordingsError(f"Failed to reach odc-api: {e}") from e
 
@@ -44,11 +70,12 @@ def get_videos_by_timerange(start_ms: int, end_ms: int) -> list[VideoFile]:
     if not isinstance(videos, list):
         raise RecordingsError("Response missing videos list")
 
+    make: Callable[..., Any] = VideoRecord if as_records else VideoFile
     return [
-        {
-            "filepath": item["filepath"],
-            "filename": item["filepath"].rsplit("/", 1)[-1],
-            "timestamp_ms": item["timestamp_ms"],
-        }
+        make(
+            filepath=item["filepath"],
+            filename=item["filepath"].rsplit("/", 1)[-1],
+            timestamp_ms=item["timestamp_ms"],
+        )
         for item in videos
     ]
@@ -0,0 +1,278 @@
+"""Records: compact stand-ins for the embeddings/recordings TypedDicts.
+
+The TypedDicts in ``beeutil.embeddings`` and ``beeutil.recordings`` are plain
+dicts at runtime: a hash table and boxed values per record. The classes here
+keep the same dict-style interface (``m["score"]``, ``m.get``, ``dict(m)``,
+equality with dicts) with less overhead:
+
+- ``EmbeddingRecord``, ``QueryRecord``, ``MatchRecord``, ``VideoRecord``:
+  ``__slots__`` objects, one per record. ``list_embeddings``,
+  ``load_query_embeddings``, ``find_matches`` and ``get_videos_by_timerange``
+  return them with ``as_records=True``.
+- ``MatchBatch``: a whole batch of matches as one NumPy structured array plus
+  the label vocabulary and image names. Indexing returns a lazy row view that
+  reads the arrays on access; slices and boolean masks return batches.
+
+``find_matches_batch(..., as_batch=True)`` and the other matchers return a
+``MatchBatch``.
+
+Usage:
+  frames = beeutil.embeddings.list_embeddings(since_ms=cursor + 1, as_records=True)
+  batch = beeutil.embeddings.find_matches_arrays(..., as_batch=True)
+  strong = batch[batch.column("score") >= 0.9]
+  for m in strong:
+      print(m["label"], m["image_name"])
+"""
+
+from __future__ import annotations
+
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Iterator,
+    Mapping,
+    Sequence,
+    TypeVar,
+    cast,
+    overload,
+)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from .embeddings import Match
+
+MATCH_FIELDS = ("label", "score", "timestamp_ms", "lat", "lon", "image_name")
+MATCH_DTYPE = np.dtype(
+    [
+        ("label_id", np.int32),
+        ("score", np.float64),
+        ("timestamp_ms", np.int64),
+        ("lat", np.float64),
+        ("lon", np.float64),
+    ]
+)
+
+R = TypeVar("R", bound="Record")
+
+
+class Record(Mapping[str, Any]):
+    """Dict-style access to a fixed set of slotted fields.
+
+    Fields listed in ``_optional`` may be left out; like a missing TypedDict key
+    they are then absent from ``in``, ``get`` and iteration.
+    """
+
+    __slots__: ClassVar[tuple[str, ...]] = ()
+    _fields: ClassVar[tuple[str, ...]] = ()
+    _optional: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if len(args) > len(self._fields):
+            raise TypeError(f"{type(self).__name__} takes {len(self._fields)} fields")
+        values = dict(zip(self._fields, args), **kwargs)
+        missing = set(self._fields) - set(self._optional) - set(values)
+        unknown = set(values) - set(self._fields)
+        if missing or unknown:
+            raise TypeError(
+                f"{type(self).__name__}: missing {sorted(missing)}, unknown {sorted(unknown)}"
+            )
+        for field, value in values.items():
+            setattr(self, field, value)
+
+    @classmethod
+    def from_dict(cls: type[R], item: Mapping[str, Any]) -> R:
+        fields = (field for field in cls._fields if field not in cls._optional or field in item)
+        return cls(**{field: item[field] for field in fields})
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self._fields:
+            if field not in self._optional or hasattr(self, field):
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {field: self[field] for field in self}
+
+
+class EmbeddingRecord(Record):
+    __slots__ = ("embeddings", "timestamp_ms", "lat", "lon", "image_name")
+    _fields = __slots__
+
+
+class QueryRecord(Record):
+    __slots__ = ("label", "embedding", "threshold")
+    _fields = __slots__
+    _optional = ("threshold",)
+
+
+class MatchRecord(Record):
+    __slots__ = MATCH_FIELDS
+    _fields = __slots__
+
+
+class VideoRecord(Record):
+    __slots__ = ("filepath", "filename", "timestamp_ms")
+    _fields = __slots__
+
+
+class MatchView(Record):
+    """Read-only row of a MatchBatch, resolved on access."""
+
+    __slots__ = ("_batch", "_index")
+    _fields = MATCH_FIELDS
+
+    def __init__(self, batch: MatchBatch, index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self._batch.value(self._index, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError("MatchBatch rows are read-only")
+
+
+class MatchBatch:
+    """Columnar batch of matches with dict-style rows."""
+
+    def __init__(
+        self,
+        columns: npt.NDArray[np.void],
+        labels: Sequence[str],
+        image_names: list[str],
+    ) -> None:
+        """
+        Args:
+            columns: MATCH_DTYPE rows; ``label_id`` indexes ``labels``.
+            labels: Label vocabulary.
+            image_names: One image name per row.
+        """
+        if len(columns) != len(image_names):
+            raise ValueError(f"{len(columns)} rows but {len(image_names)} image names")
+        self.columns = columns
+        self.labels = list(labels)
+        self.image_names = image_names
+
+    @classmethod
+    def from_columns(
+        cls,
+        labels: Sequence[str],
+        label_ids: npt.ArrayLike,
+        scores: npt.ArrayLike,
+        timestamps_ms: npt.ArrayLike,
+        lats: npt.ArrayLike,
+        lons: npt.ArrayLike,
+        image_names: list[str],
+    ) -> MatchBatch:
+        columns = np.empty(len(image_names), dtype=MATCH_DTYPE)
+        columns["label_id"] = label_ids
+        columns["score"] = scores
+        columns["timestamp_ms"] = timestamps_ms
+        columns["lat"] = lats
+        columns["lon"] = lons
+        return cls(columns, labels, image_names)
+
+    @classmethod
+    def from_matches(cls, matches: Sequence[Mapping[str, Any]]) -> MatchBatch:
+        labels: dict[str, int] = {}
+        columns = np.empty(len(matches), dtype=MATCH_DTYPE)
+        for i, m in enumerate(matches):
+            label_id = labels.setdefault(m["label"], len(labels))
+            columns[i] = (label_id, m["score"], m["timestamp_ms"], m["lat"], m["lon"])
+        return cls(columns, list(labels), [m["image_name"] for m in matches])
+
+    @classmethod
+    def empty(cls, labels: Sequence[str] = ()) -> MatchBatch:
+        return cls(np.empty(0, dtype=MATCH_DTYPE), labels, [])
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @overload
+    def __getitem__(self, index: int) -> Match: ...
+
+    @overload
+    def __getitem__(self, index: slice | npt.NDArray[Any]) -> MatchBatch: ...
+
+    def __getitem__(self, index: int | slice | npt.NDArray[Any]) -> Match | MatchBatch:
+        if isinstance(index, (int, np.integer)):
+            i = int(index)
+            if not -len(self) <= i < len(self):
+                raise IndexError(f"index {i} out of range for {len(self)} matches")
+            return cast("Match", MatchView(self, i % len(self)))
+        selected = np.arange(len(self))[index]
+        return MatchBatch(
+            self.columns[selected], self.labels, [self.image_names[i] for i in selected.tolist()]
+        )
+
+    def __iter__(self) -> Iterator[Match]:
+        for i in range(len(self)):
+            yield cast("Match", MatchView(self, i))
+
+    def __repr__(self) -> str:
+        return f"MatchBatch({len(self)} matches, {len(self.labels)} labels)"
+
+    def value(self, index: int, field: str) -> Any:
+        if field == "label":
+            return self.labels[self.columns["label_id"][index]]
+        if field == "image_name":
+            return self.image_names[index]
+        if field not in MATCH_FIELDS:
+            raise KeyError(field)
+        return self.columns[field][index].item()
+
+    def column(self, field: str) -> npt.NDArray[Any]:
+        """Whole column; ``label`` and ``image_name`` come back as object arrays."""
+        if field == "label":
+            label_ids: npt.NDArray[np.int32] = self.columns["label_id"]
+            return np.array(self.labels, dtype=object)[label_ids]
+        if field == "image_name":
+            return np.array(self.image_names, dtype=object)
+        if field not in MATCH_FIELDS:
+            raise KeyError(field)
+        column: npt.NDArray[Any] = self.columns[field]
+        return column
+
+    def to_list(self) -> list[Match]:
+        """Plain Match dicts, e.g. for JSON."""
+        labels = [self.labels[i] for i in self.columns["label_id"].tolist()]
+        return [
+            {
+                "label": label,
+                "score": score,
+                "timestamp_ms": ts,
+                "lat": lat,
+                "lon": lon,
+                "image_name": name,
+            }
+            for label, score, ts, lat, lon, name in zip(
+                labels,
+                self.columns["score"].tolist(),
+                self.columns["timestamp_ms"].tolist(),
+                self.columns["lat"].tolist(),
+                self.columns["lon"].tolist(),
+                self.image_names,
+            )
+        ]
@@ -0,0 +1,228 @@
+"""Resilience: retries, circuit breakers and request coalescing for odc-api calls.
+
+Every beeutil HTTP helper goes through ``get`` / ``post`` here:
+
+- Connection errors, timeouts and 429/502/503/504 responses are retried up to
+  ``RETRY_ATTEMPTS`` times with decorrelated jitter (each sleep is uniform in
+  ``[BACKOFF_BASE_S, 3 * previous]``, capped at ``BACKOFF_CAP_S``), so plugin
+  loops and upload threads don't retry in lockstep. POSTs are not retried.
+- Each endpoint has a circuit breaker. After ``BREAKER_FAILURES`` consecutive
+  failures of the retryable kind, calls fail fast with ``CircuitOpenError``
+  for ``BREAKER_RESET_S``; then a single trial call decides whether it closes.
+- Concurrent identical GETs share one in-flight request and its response
+  (e.g. upload threads listing the cache with the same cursor).
+
+``CircuitOpenError`` is a ``requests.ConnectionError``, so existing
+``except requests.RequestException`` handlers treat it as unreachable odc-api.
+
+Usage:
+  resp = beeutil.resilience.get(url, endpoint="embeddings", params=params, timeout=10)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Collection, Mapping
+from urllib.parse import urlsplit
+
+import requests
+
+RETRY_ENV_VAR = "BEE_HTTP_RETRIES"
+DEFAULT_RETRY_ATTEMPTS = 3
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+BACKOFF_BASE_S = 0.1
+BACKOFF_CAP_S = 2.0
+
+BREAKER_FAILURES = 5
+BREAKER_RESET_S = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_attempts() -> int:
+    value = os.environ.get(RETRY_ENV_VAR)
+    if value is None:
+        return DEFAULT_RETRY_ATTEMPTS
+    try:
+        attempts = int(value)
+    except ValueError:
+        attempts = -1
+    if attempts < 0:
+        logger.warning(f"Ignoring invalid {RETRY_ENV_VAR}={value!r}")
+        return DEFAULT_RETRY_ATTEMPTS
+    return attempts
+
+
+RETRY_ATTEMPTS = _retry_attempts()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Endpoint's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open trial -> closed."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_s: float = BREAKER_RESET_S) -> None:
+        self.failures = failures
+        self.reset_s = reset_s
+        self._consecutive = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_s:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor failed transiently."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class _Flight:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: requests.Response | None = None
+        self.error: BaseException | None = None
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_flights: dict[tuple[str, str], _Flight] = {}
+_lock = threading.Lock()
+
+
+def breaker(endpoint: str) -> CircuitBreaker:
+    with _lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker()
+        return _breakers[endpoint]
+
+
+def reset() -> None:
+    """Forget all breaker state."""
+    with _lock:
+        _breakers.clear()
+
+
+def backoff_delays(attempts: int = RETRY_ATTEMPTS) -> list[float]:
+    """Decorrelated-jitter sleeps before each retry."""
+    delays = []
+    delay = BACKOFF_BASE_S
+    for _ in range(attempts):
+        delay = min(BACKOFF_CAP_S, random.uniform(BACKOFF_BASE_S, delay * 3))
+        delays.append(delay)
+    return delays
+
+
+def request(
+    method: str,
+    url: str,
+    *args: Any,
+    endpoint: str | None = None,
+    retries: int | None = None,
+    retry_statuses: Collection[int] | None = None,
+    prepare: Callable[[], Mapping[str, Any]] | None = None,
+    session: requests.Session | None = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """One call through the endpoint's breaker, retrying transient failures.
+
+    After the last attempt a retryable response is returned as-is and a
+    connection error is re-raised, so callers keep their own error handling.
+
+    Args:
+        retry_statuses: Responses to retry (default RETRY_STATUSES).
+        prepare: Called before each attempt for keyword arguments that must be
+            fresh every time, e.g. a file body to re-read or a timestamped
+            signature. They are merged over ``kwargs``.
+        session: Send through this session instead of a new connection.
+    """
+    circuit = breaker(endpoint or urlsplit(url).path)
+    delays = backoff_delays(RETRY_ATTEMPTS if retries is None else retries)
+    statuses = RETRY_STATUSES if retry_statuses is None else retry_statuses
+    send = getattr(session or requests, method)
+    for attempt in range(len(delays) + 1):
+        if not circuit.allow():
+            raise CircuitOpenError(f"Circuit open for {endpoint or url}")
+        try:
+            fresh = kwargs if prepare is None else dict(kwargs, **prepare())
+            resp: requests.Response = send(url, *args, **fresh)
+        except (requests.ConnectionError, requests.Timeout):
+            circuit.record_failure()
+            if attempt == len(delays):
+                raise
+        except Exception:
+            circuit.release()
+            raise
+        else:
+            if resp.status_code not in statuses:
+                circuit.record_success()
+                return resp
+            circuit.record_failure()
+            if attempt == len(delays):
+                return resp
+        time.sleep(delays[attempt])
+    raise AssertionError("unreachable")
+
+
+def get(url: str, *, endpoint: str | None = None, **kwargs: Any) -> requests.Response:
+    """GET with retries; concurrent identical calls share one request."""
+    key = (url, repr(sorted(kwargs.items())))
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if flight is None:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        assert flight.response is not None
+        return flight.response
+
+    try:
+        flight.response = request("get", url, endpoint=endpoint, **kwargs)
+        return flight.response
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def post(url: str, *args: Any, endpoint: str | None = None, **kwargs: Any) -> requests.Response:
+    """POST through the endpoint's breaker, without retries (POSTs may not be idempotent)."""
+    return request("post", url, *args, endpoint=endpoint, retries=0, **kwargs)
@@ -0,0 +1,94 @@
+"""Response cache: TTL + LRU cache for idempotent odc-api GETs.
+
+Decoded JSON bodies are kept per endpoint for ``TTLS[endpoint]`` seconds, at
+most ``MAX_ENTRIES`` in total (least recently used evicted first). Error
+responses are never cached. Calls that change device state invalidate the
+endpoints they affect, e.g. ``enable_image_collection`` drops the cached
+``cache/status``.
+
+Usage:
+  status = beeutil.image_cache_status()  # served from cache for 2s
+  beeutil.response_cache.cache.stats()   # {"cache/status": {"hits": 4, "misses": 1}, ...}
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Seconds each endpoint's responses stay fresh; endpoints not listed are not cached.
+TTLS = {
+    "cache/status": 2.0,
+    "info": 60.0,
+    "secrets": 300.0,
+}
+MAX_ENTRIES = 64
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache keyed by (endpoint, request key)."""
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttls = dict(TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self._clock = clock
+        # (endpoint, key) -> (expires_at, value)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        counts = self._counts.setdefault(endpoint, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def cached(self, endpoint: str, key: str, fetch: Callable[[], T]) -> T:
+        """Return a fresh cached value for (endpoint, key), or call ``fetch`` and keep its result."""
+        ttl = self.ttls.get(endpoint, 0.0)
+        if ttl <= 0:
+            return fetch()
+
+        entry_key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(entry_key)
+                self._count(endpoint, "hits")
+                return copy.deepcopy(entry[1])  # type: ignore[no-any-return]
+            self._count(endpoint, "misses")
+
+        value = fetch()
+        with self._lock:
+            self._entries[entry_key] = (self._clock() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *endpoints: str) -> None:
+        """Drop cached responses for the given endpoints, or all of them."""
+        with self._lock:
+            if not endpoints:
+                self._entries.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] in endpoints]:
+                del self._entries[entry_key]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
+
+
+cache = ResponseCache()
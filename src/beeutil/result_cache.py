@@ -0,0 +1,220 @@
+"""Result cache: persistent per-frame match results keyed by query set.
+
+Re-scoring a window after a restart, or an overlapping catch-up window, costs
+the same as the first pass. ``ResultCache`` keeps each scored frame's hits in
+SQLite, keyed by (query key, timestamp_ms, image_name), where the query key
+hashes the labels, normalized vectors, thresholds and precision that produced
+them. Only the matched query columns and their scores are stored (12 bytes
+per hit); frames without matches are stored too, so a repeat is a lookup.
+
+The table holds at most ``max_rows`` frames; beyond that the least recently
+used are evicted down to ``EVICT_TO`` of the budget, oldest timestamps first
+among frames last used together.
+
+Usage:
+  results = beeutil.result_cache.ResultCache(f"/data/plugins/{PLUGIN_NAME}/results.db")
+  matches, cursor = beeutil.embeddings.fetch_and_match(since, qs, 0.8, result_cache=results)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+MAX_ROWS = 200_000
+EVICT_TO = 0.9
+
+HIT_DTYPE = np.dtype([("col", "<u4"), ("score", "<f8")])
+
+# (frame_rows, query_cols, scores), as returned by beeutil.parallel.score_hits
+Hits = Tuple["npt.NDArray[np.intp]", "npt.NDArray[np.intp]", "npt.NDArray[np.float64]"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    query TEXT NOT NULL,
+    timestamp_ms INTEGER NOT NULL,
+    image_name TEXT NOT NULL,
+    hits BLOB NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (query, timestamp_ms, image_name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+class ResultCacheError(Exception):
+    """Result cache database error."""
+
+
+def query_key(
+    labels: Sequence[str],
+    queries: npt.NDArray[np.float64],
+    thresholds: npt.NDArray[np.float64],
+    precision: str,
+) -> str:
+    """Identifies a scoring setup: stored columns index ``labels`` in this order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for label in labels:
+        digest.update(label.encode())
+        digest.update(b"\0")
+    digest.update(np.ascontiguousarray(queries, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(thresholds, dtype=np.float64).tobytes())
+    digest.update(precision.encode())
+    # Rows stored under another hit layout never match
+    digest.update(HIT_DTYPE.str.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed, size-bounded store of per-frame hits."""
+
+    def __init__(self, path: str, max_rows: int = MAX_ROWS) -> None:
+        """
+        Args:
+            path: Database file (created if missing), or ":memory:".
+            max_rows: Most frames kept across all query keys.
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM results"
+            ).fetchone()
+        except sqlite3.Error as e:
+            raise ResultCacheError(f"Cannot open {path}: {e}") from e
+        self._tick = int(row[0])
+        self._count = int(row[1])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results")
+            self._count = 0
+
+    def lookup(
+        self, key: str, timestamps_ms: Sequence[int], image_names: Sequence[str]
+    ) -> dict[int, npt.NDArray[np.void]]:
+        """Stored hits (HIT_DTYPE arrays) by frame index, for frames scored before."""
+        if not len(timestamps_ms):
+            return {}
+        lo, hi = min(timestamps_ms), max(timestamps_ms)
+        with self._lock, self._conn:
+            self._tick += 1
+            stored = {
+                (ts, name): blob
+                for ts, name, blob in self._conn.execute(
+                    "SELECT timestamp_ms, image_name, hits FROM results"
+                    " WHERE query = ? AND timestamp_ms BETWEEN ? AND ?",
+                    (key, lo, hi),
+                )
+            }
+            if stored:
+                self._conn.execute(
+                    "UPDATE results SET used = ? WHERE query = ? AND timestamp_ms BETWEEN ? AND ?",
+                    (self._tick, key, lo, hi),
+                )
+        found = {}
+        for i, frame_key in enumerate(zip(timestamps_ms, image_names)):
+            blob = stored.get(frame_key)
+            if blob is not None:
+                found[i] = np.frombuffer(blob, dtype=HIT_DTYPE)
+        self.hits += len(found)
+        self.misses += len(timestamps_ms) - len(found)
+        return found
+
+    def store(
+        self,
+        key: str,
+        timestamps_ms: Sequence[int],
+        image_names: Sequence[str],
+        hits: Sequence[npt.NDArray[np.void]],
+    ) -> None:
+        """Record each frame's hits (empty arrays for frames without matches)."""
+        if not len(timestamps_ms):
+            return
+        frame_keys = {(int(ts), name) for ts, name in zip(timestamps_ms, image_names)}
+        with self._lock, self._conn:
+            self._tick += 1
+            # Replaced frames don't grow the table; only the key's range is scanned
+            existing = self._conn.execute(
+                "SELECT timestamp_ms, image_name FROM results"
+                " WHERE query = ? AND timestamp_ms BETWEEN ? AND ?",
+                (key, min(ts for ts, _ in frame_keys), max(ts for ts, _ in frame_keys)),
+            )
+            added = len(frame_keys.difference(existing))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, int(ts), name, frame_hits.tobytes(), self._tick)
+                    for ts, name, frame_hits in zip(timestamps_ms, image_names, hits)
+                ],
+            )
+            count = self._count + added
+            if count > self.max_rows:
+                excess = count - int(self.max_rows * EVICT_TO)
+                evicted = self._conn.execute(
+                    "DELETE FROM results WHERE (query, timestamp_ms, image_name) IN"
+                    " (SELECT query, timestamp_ms, image_name FROM results"
+                    " ORDER BY used, timestamp_ms, query, image_name LIMIT ?)",
+                    (excess,),
+                )
+                count -= evicted.rowcount
+            self._count = count
+
+    def score(
+        self,
+        key: str,
+        timestamps_ms: Sequence[int],
+        image_names: Sequence[str],
+        score: Callable[[npt.NDArray[np.intp]], Hits],
+    ) -> Hits:
+        """Hits for all frames, calling ``score`` only for frames not stored yet.
+
+        ``score`` gets the indices of the frames to score and returns hits
+        with rows relative to that subset, in frame-major order.
+        """
+        found = self.lookup(key, timestamps_ms, image_names)
+        missing = np.array([i for i in range(len(timestamps_ms)) if i not in found], dtype=np.intp)
+        if len(missing):
+            rows, cols, scores = score(missing)
+            fresh = np.empty(len(rows), dtype=HIT_DTYPE)
+            fresh["col"] = cols
+            fresh["score"] = scores
+            bounds = np.searchsorted(rows, np.arange(len(missing) + 1))
+            per_frame = [fresh[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+            found.update(zip(missing.tolist(), per_frame))
+            self.store(
+                key,
+                [timestamps_ms[i] for i in missing.tolist()],
+                [image_names[i] for i in missing.tolist()],
+                per_frame,
+            )
+
+        ordered: list[npt.NDArray[Any]] = [found[i] for i in range(len(timestamps_ms))]
+        counts = [len(frame_hits) for frame_hits in ordered]
+        merged = np.concatenate(ordered) if ordered else np.empty(0, dtype=HIT_DTYPE)
+        return (
+            np.repeat(np.arange(len(ordered)), counts).astype(np.intp),
+            merged["col"].astype(np.intp),
+            merged["score"].astype(np.float64),
+        )
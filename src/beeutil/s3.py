@@ -0,0 +1,405 @@
+"""S3: upload cache files straight to S3-compatible storage, bypassing odc-api.
+
+``upload_to_s3`` asks odc-api to upload one object per call, with the AWS
+secret in a header. ``S3Uploader`` signs requests itself (SigV4, stdlib
+only) and streams files from ``/data/cache`` over one pooled
+``requests.Session``. Files up to ``MULTIPART_THRESHOLD`` go up in a single
+PUT; larger ones as a multipart upload whose parts are sent by ``workers``
+threads. Bodies are streamed from disk, not buffered, and sent with
+``UNSIGNED-PAYLOAD`` so nothing is hashed on the device; use https.
+
+With ``state_dir`` set, each multipart upload's id and finished parts are
+saved as they complete, so an upload interrupted by a dropped connection or
+a restart resumes with the missing parts only (if the file is unchanged).
+
+Failed calls are retried like odc-api calls (see ``resilience``), with the
+body reopened for each attempt. ``BEE_S3_ENDPOINT`` points the uploader at
+an S3 stand-in (see util/s3_server.py) with path-style URLs.
+
+Usage:
+  s3 = beeutil.s3.S3Uploader(bucket, region, aws_key, aws_secret,
+                             state_dir=f"/data/plugins/{PLUGIN_NAME}/s3")
+  s3.upload_handle(session, handle)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Mapping
+from urllib.parse import parse_qsl, quote, urlsplit
+
+import requests
+
+from . import resilience
+
+CACHE_DIR = "/data/cache"
+S3_ENDPOINT = os.environ.get("BEE_S3_ENDPOINT")
+
+# S3 rejects parts under 5 MiB (except the last) and uploads over 10000 parts.
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+PART_SIZE = 8 * 1024 * 1024
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+PART_WORKERS = 4
+TIMEOUT = 60
+RETRY_STATUSES = resilience.RETRY_STATUSES | {500}
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+_ALGORITHM = "AWS4-HMAC-SHA256"
+
+
+class S3Error(Exception):
+    """S3 request failed."""
+
+    def __init__(self, message: str, code: str | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _canonical_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return "&".join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(pairs))
+
+
+def sign(
+    method: str,
+    url: str,
+    headers: Mapping[str, str],
+    access_key: str,
+    secret_key: str,
+    region: str,
+    payload_hash: str = UNSIGNED_PAYLOAD,
+    now: float | None = None,
+) -> dict[str, str]:
+    """SigV4-sign a request.
+
+    ``url`` must already be URI-encoded. Every header in ``headers`` is signed.
+
+    Returns:
+        ``headers`` plus x-amz-date, x-amz-content-sha256 and Authorization.
+    """
+    parts = urlsplit(url)
+    amz_date = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(now))
+    date = amz_date[:8]
+    out = dict(headers, **{"x-amz-content-sha256": payload_hash, "x-amz-date": amz_date})
+
+    signed = {k.lower(): " ".join(str(v).split()) for k, v in out.items()}
+    signed["host"] = parts.netloc
+    names = sorted(signed)
+    canonical_request = "\n".join(
+        [
+            method,
+            parts.path or "/",
+            _canonical_query(parts.query),
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            ";".join(names),
+            payload_hash,
+        ]
+    )
+    scope = f"{date}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        [_ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+    )
+    key = _hmac(f"AWS4{secret_key}".encode(), date)
+    for part in (region, "s3", "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    out["Authorization"] = (
+        f"{_ALGORITHM} Credential={access_key}/{scope}, "
+        f"SignedHeaders={';'.join(names)}, Signature={signature}"
+    )
+    return out
+
+
+def _xml_text(body: bytes, tag: str) -> str | None:
+    """Text of the first element named ``tag``, ignoring XML namespaces."""
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return None
+    for element in root.iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text or ""
+    return None
+
+
+class _FileSlice:
+    """Read-only window onto a file, streamed by requests with a Content-Length."""
+
+    def __init__(self, path: str, offset: int, length: int) -> None:
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._length = length
+        self._left = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._left:
+            size = self._left
+        data = self._file.read(size)
+        self._left -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class S3Uploader:
+    """Streams files to one bucket with SigV4, multipart and resumable state."""
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        endpoint: str | None = None,
+        part_size: int = PART_SIZE,
+        multipart_threshold: int = MULTIPART_THRESHOLD,
+        workers: int = PART_WORKERS,
+        state_dir: str | None = None,
+        timeout: float = TIMEOUT,
+    ) -> None:
+        """
+        Args:
+            endpoint: Base URL of an S3-compatible service, addressed path-style.
+                Defaults to BEE_S3_ENDPOINT, else AWS virtual-hosted URLs.
+            part_size: Multipart part size (raised as needed to stay within
+                MIN_PART_SIZE and MAX_PARTS).
+            multipart_threshold: Files larger than this use multipart.
+            workers: Parts uploaded in parallel per file.
+            state_dir: Where multipart progress is kept for resuming; None
+                keeps it in memory only.
+        """
+        self.bucket = bucket
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        endpoint = endpoint or S3_ENDPOINT
+        if endpoint:
+            self.base_url = f"{endpoint.rstrip('/')}/{quote(bucket)}"
+        else:
+            self.base_url = f"https://{bucket}.s3.{region}.amazonaws.com"
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.multipart_threshold = multipart_threshold
+        self.workers = workers
+        self.state_dir = state_dir
+        self.timeout = timeout
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(workers, 1))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._state_lock = threading.Lock()
+        self._endpoint = f"s3:{urlsplit(self.base_url).netloc}"
+
+    def close(self) -> None:
+        self._session.close()
+
+    def url(self, key: str, query: str = "") -> str:
+        return f"{self.base_url}/{quote(key, safe='/-_.~')}" + (f"?{query}" if query else "")
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        body: Callable[[], Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> requests.Response:
+        """Signed request with retries; ``body`` makes a fresh payload per attempt."""
+        opened: list[_FileSlice] = []
+
+        def prepare() -> dict[str, Any]:
+            data = body() if body is not None else None
+            if isinstance(data, _FileSlice):
+                opened.append(data)
+            signed = sign(method, url, headers or {}, self.access_key, self.secret_key, self.region)
+            return {"data": data, "headers": signed}
+
+        try:
+            resp = resilience.request(
+                method.lower(),
+                url,
+                endpoint=self._endpoint,
+                retry_statuses=RETRY_STATUSES,
+                prepare=prepare,
+                session=self._session,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise S3Error(f"{method} {url} failed: {e}") from e
+        finally:
+            for data in opened:
+                data.close()
+        if resp.status_code in RETRY_STATUSES:
+            raise S3Error(f"{method} {url}: {resp.status_code}")
+        if resp.status_code >= 300:
+            code = _xml_text(resp.content, "Code")
+            raise S3Error(f"{method} {url}: {resp.status_code} {code or resp.text}", code)
+        return resp
+
+    def upload_handle(self, prefix: str, handle: str, cache_dir: str = CACHE_DIR) -> str:
+        """Upload a cache file as ``<prefix>/<handle>``, like ``upload_to_s3``."""
+        return self.upload_file(os.path.join(cache_dir, handle), f"{prefix}/{handle}")
+
+    def upload_file(self, path: str, key: str) -> str:
+        """Upload ``path`` as ``key``. Returns the object's ETag."""
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            raise S3Error(f"Cannot read {path}: {e}") from e
+        if size <= self.multipart_threshold:
+            return self._put(path, key, size)
+        return self._multipart(path, key, size)
+
+    def _headers(self, path: str) -> dict[str, str]:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return {"Content-Type": content_type}
+
+    def _put(self, path: str, key: str, size: int) -> str:
+        resp = self._request(
+            "PUT", self.url(key), lambda: _FileSlice(path, 0, size), self._headers(path)
+        )
+        return resp.headers.get("ETag", "")
+
+    def _state_path(self, key: str) -> str | None:
+        if not self.state_dir:
+            return None
+        name = hashlib.sha1(f"{self.bucket}/{key}".encode()).hexdigest()
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def _load_state(self, key: str, fingerprint: dict[str, Any]) -> dict[str, Any] | None:
+        state_path = self._state_path(key)
+        if state_path is None:
+            return None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            state = None  # truncated or corrupt
+        if not isinstance(state, dict):
+            state = {}
+        upload_id = state.get("upload_id")
+        if (
+            not isinstance(upload_id, str)
+            or "parts" not in state
+            or any(state.get(k) != v for k, v in fingerprint.items())
+        ):
+            # The file changed since, or the state is partial: start over.
+            if isinstance(upload_id, str):
+                self._abort(key, upload_id)
+            self._clear_state(key)
+            return None
+        return state
+
+    def _save_state(self, key: str, state: dict[str, Any]) -> None:
+        state_path = self._state_path(key)
+        if state_path is None:
+            return
+        with self._state_lock:
+            tmp = f"{state_path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, state_path)
+
+    def _clear_state(self, key: str) -> None:
+        state_path = self._state_path(key)
+        if state_path is not None and os.path.exists(state_path):
+            os.remove(state_path)
+
+    def _abort(self, key: str, upload_id: str) -> None:
+        try:
+            self._request("DELETE", self.url(key, f"uploadId={quote(upload_id, safe='')}"))
+        except S3Error:
+            pass  # Unreferenced parts expire with the bucket's lifecycle rules.
+
+    def _multipart(self, path: str, key: str, size: int) -> str:
+        stat = os.stat(path)
+        part_size = max(self.part_size, -(-size // MAX_PARTS))
+        fingerprint = {
+            "path": path,
+            "size": size,
+            "mtime_ns": stat.st_mtime_ns,
+            "part_size": part_size,
+        }
+        try:
+            return self._resume(path, key, size, self._load_state(key, fingerprint), fingerprint)
+        except S3Error as e:
+            if e.code != "NoSuchUpload":
+                raise
+        # The saved upload was aborted or expired server-side; start over.
+        self._clear_state(key)
+        return self._resume(path, key, size, None, fingerprint)
+
+    def _resume(
+        self,
+        path: str,
+        key: str,
+        size: int,
+        state: dict[str, Any] | None,
+        fingerprint: dict[str, Any],
+    ) -> str:
+        part_size: int = fingerprint["part_size"]
+        if state is None:
+            resp = self._request("POST", self.url(key, "uploads="), headers=self._headers(path))
+            upload_id = _xml_text(resp.content, "UploadId")
+            if not upload_id:
+                raise S3Error(f"No UploadId in response for {key}")
+            state = dict(fingerprint, upload_id=upload_id, parts={})
+            self._save_state(key, state)
+
+        upload_id = state["upload_id"]
+        parts: dict[str, str] = state["parts"]
+        n_parts = -(-size // part_size)
+        query_id = quote(upload_id, safe="")
+
+        def upload_part(number: int) -> None:
+            offset = (number - 1) * part_size
+            length = min(part_size, size - offset)
+            resp = self._request(
+                "PUT",
+                self.url(key, f"partNumber={number}&uploadId={query_id}"),
+                lambda: _FileSlice(path, offset, length),
+            )
+            with self._state_lock:
+                parts[str(number)] = resp.headers.get("ETag", "")
+            self._save_state(key, state)
+
+        missing = [n for n in range(1, n_parts + 1) if str(n) not in parts]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            for future in [pool.submit(upload_part, n) for n in missing]:
+                future.result()
+
+        body = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{parts[str(n)]}</ETag></Part>"
+            for n in range(1, n_parts + 1)
+        )
+        complete = f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode()
+        resp = self._request(
+            "POST",
+            self.url(key, f"uploadId={query_id}"),
+            lambda: complete,
+            {"Content-Type": "application/xml"},
+        )
+        # S3 can report a failed completion inside a 200 response.
+        if _xml_text(resp.content, "Error") is not None:
+            raise S3Error(f"Completing {key} failed: {_xml_text(resp.content, 'Code')}")
+        self._clear_state(key)
+        return _xml_text(resp.content, "ETag") or ""
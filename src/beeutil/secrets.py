@@ -23,6 +23,10 @@ from cryptography.hazmat.primitives import hashes, padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from . import resilience
+from ._constants import ODC_API_BASE
+from .response_cache import cache as response_cache
+
 SALT = b"hivemapper-plugin-secrets"
 PBKDF2_ITERATIONS = 100000
 KEY_LENGTH = 32
@@ -30,7 +34,6 @@ IV_LENGTH = 16
 BLOCK_SIZE = 128
 
 PLUGIN_DIR = "/data/plugins"
-ODC_API_BASE = "http://127.0.0.1:5000/api/1"
 
 logger = logging.getLogger(__name__)
 
@@ -128,7 +131,7 @@ def _dotenv_path(plugin_name: str) -> str:
 def _fetch_from_odc(plugin_name: str) -> tuple:
     url = f"{ODC_API_BASE}/plugin/secrets/{plugin_name}"
     try:
-        response = requests.get(url, timeout=10)
+        response = resilience.get(url, endpoint="secrets", timeout=10)
     except requests.RequestException as e:
         raise SecretsNetworkError(f"Failed to reach ODC API: {e}") from e
 
@@ -165,7 +168,9 @@ def _load(plugin_name: str) -> dict:
             logger.warning(f"Failed to parse {dotenv}: {e}")
 
     if not env:
-        plugin_id, encrypted_blob = _fetch_from_odc(plugin_name)
+        plugin_id, encrypted_blob = response_cache.cached(
+            "secrets", plugin_name, lambda: _fetch_from_odc(plugin_name)
+        )
         env = decrypt(plugin_id, encrypted_blob)
 
     for k, v in env.items():
@@ -184,6 +189,7 @@ def _load(plugin_name: str) -> dict:
 def clear_cache() -> None:
     global _cache
     _cache = None
+    response_cache.invalidate("secrets")
 
 
 def get(plugin_name: str, key: str) -> str:
@@ -0,0 +1,197 @@
+"""Upload queue: hand frames to upload workers by value instead of FIFO.
+
+A drop-in for the ``queue.Queue`` feeding ``upload_to_s3`` workers. Each
+handle gets a rank: ``DETECTION_BOOST`` for frames attached to a match,
+plus ``score_weight`` times its match score, plus its label's priority.
+Waiting adds one rank unit every ``aging_s`` seconds, so ordinary frames
+still go out under a steady stream of detections. Since aging raises every
+waiting item at the same rate, the order is fixed at insertion and a plain
+heap serves it in O(log n).
+
+Putting a queued handle again supersedes its entry if the new rank is
+higher (a frame that turns out to hold a detection jumps ahead); ``cancel``
+drops handles that are no longer wanted. Superseded and cancelled entries
+are skipped lazily when they reach the top. As with ``queue.Queue``, workers
+call ``task_done`` after each upload and ``join`` waits for all of them; a
+cancelled handle needs no ``task_done``.
+
+Usage:
+  uploads = beeutil.upload_queue.UploadQueue(label_priority={"stop_sign": 1.0})
+  uploads.put(handle)
+  uploads.put_matches(matches)
+  handle = uploads.get()  # in each upload worker
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Mapping
+
+AGING_S = 300.0
+DETECTION_BOOST = 1.0
+SCORE_WEIGHT = 1.0
+
+
+class _Entry:
+    __slots__ = ("key", "seq", "handle", "rank", "live")
+
+    def __init__(self, key: float, seq: int, handle: str, rank: float) -> None:
+        self.key = key
+        self.seq = seq
+        self.handle = handle
+        self.rank = rank
+        self.live = True
+
+    def __lt__(self, other: _Entry) -> bool:
+        return (self.key, self.seq) < (other.key, other.seq)
+
+
+class UploadQueue:
+    """Thread-safe priority queue of frame handles with aging and cancellation."""
+
+    def __init__(
+        self,
+        label_priority: Mapping[str, float] | None = None,
+        aging_s: float = AGING_S,
+        score_weight: float = SCORE_WEIGHT,
+        detection_boost: float = DETECTION_BOOST,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            label_priority: Extra rank per match label; unknown labels add 0.
+            aging_s: Seconds of waiting worth one rank unit.
+            score_weight: Rank per unit of match score.
+            detection_boost: Rank added to any frame put with a match.
+            clock: Seconds, overridable for tests.
+        """
+        self.label_priority = dict(label_priority or {})
+        self.aging_s = aging_s
+        self.score_weight = score_weight
+        self.detection_boost = detection_boost
+        self._clock = clock
+        self._heap: list[_Entry] = []
+        self._entries: dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        self._all_done = threading.Condition(lock)
+        self._unfinished = 0
+        self.superseded = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, handle: object) -> bool:
+        with self._cond:
+            return handle in self._entries
+
+    def qsize(self) -> int:
+        return len(self)
+
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def rank(self, score: float | None = None, label: str | None = None) -> float:
+        if score is None and label is None:
+            return 0.0
+        return (
+            self.detection_boost
+            + self.score_weight * (score or 0.0)
+            + self.label_priority.get(label or "", 0.0)
+        )
+
+    def put(self, handle: str, *, score: float | None = None, label: str | None = None) -> bool:
+        """Queue a handle, or raise a queued one's rank.
+
+        Returns:
+            False if the handle was already queued at an equal or higher rank.
+        """
+        rank = self.rank(score, label)
+        with self._cond:
+            current = self._entries.get(handle)
+            if current is not None:
+                if rank <= current.rank:
+                    return False
+                # Keep the original wait time: aging already earned counts.
+                key = current.key + current.rank - rank
+                current.live = False
+                self.superseded += 1
+            else:
+                key = self._clock() / self.aging_s - rank
+                self._unfinished += 1
+            entry = _Entry(key, next(self._seq), handle, rank)
+            self._entries[handle] = entry
+            heapq.heappush(self._heap, entry)
+            self._compact()
+            self._cond.notify()
+        return True
+
+    def put_matches(self, matches: Iterable[Mapping[str, Any]]) -> int:
+        """Queue (or boost) the frames of matches; returns how many moved."""
+        return sum(
+            self.put(match["image_name"], score=match["score"], label=match["label"])
+            for match in matches
+        )
+
+    def cancel(self, *handles: str) -> int:
+        """Drop queued handles, e.g. frames superseded by better ones."""
+        dropped = 0
+        with self._cond:
+            for handle in handles:
+                entry = self._entries.pop(handle, None)
+                if entry is not None:
+                    entry.live = False
+                    dropped += 1
+            self.cancelled += dropped
+            self._compact()
+            self._finish(dropped)
+        return dropped
+
+    def _finish(self, count: int) -> None:
+        if count > self._unfinished:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= count
+        if not self._unfinished:
+            self._all_done.notify_all()
+
+    def task_done(self) -> None:
+        """Mark a handle returned by ``get`` as processed."""
+        with self._cond:
+            self._finish(1)
+
+    def join(self) -> None:
+        """Block until every queued handle has been processed or cancelled."""
+        with self._all_done:
+            self._all_done.wait_for(lambda: not self._unfinished)
+
+    def _compact(self) -> None:
+        # Rebuild once dead entries dominate, so cancels don't grow the heap unbounded.
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if entry.live]
+            heapq.heapify(self._heap)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> str:
+        """Remove and return the highest-ranked handle.
+
+        Raises:
+            queue.Empty: Nothing queued (after ``timeout`` when blocking).
+        """
+        with self._cond:
+            if block and not self._cond.wait_for(lambda: self._entries, timeout):
+                raise queue.Empty
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if entry.live:
+                    del self._entries[entry.handle]
+                    return entry.handle
+            raise queue.Empty
+
+    def get_nowait(self) -> str:
+        return self.get(block=False)
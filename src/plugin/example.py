@@ -1,4 +1,3 @@
-import queue
 import threading
 import time
 import uuid
@@ -10,8 +9,23 @@ PLUGIN_NAME = "your-plugin-name"
 CAPTURE_STEREO = False
 LOOP_DELAY = 5
 UPLOAD_THREADS = 1
+UPLOAD_BATCH = 500
 VERBOSE = True
 
+# Only upload frames inside this fence, e.g.
+# beeutil.geo.Geofence(bboxes=[(37.70, -122.52, 37.83, -122.35)])
+GEOFENCE = None
+# Upload one frame per this many meters of travel; None uploads every frame
+DECIMATE_METERS = 10
+# Skip frames whose scene embedding is this similar to a recently uploaded one
+# (costs one embeddings fetch per loop); None disables
+DEDUP_SIMILARITY = None
+# Upload only up to this many visually distinct frames per minute of driving,
+# picked by on-device clustering (costs one embeddings fetch per loop); None disables
+SUMMARY_CLUSTERS = None
+# Upload straight to S3 (SigV4, multipart, resumable) instead of through odc-api
+DIRECT_S3 = False
+
 
 def vlog(msg):
     if VERBOSE:
@@ -36,12 +50,43 @@ def _setup(state):
         vlog(f"ERROR: Failed to load env: {e}")
         raise
 
-    vlog(f"initializing {UPLOAD_THREADS} upload workers")
-    state["uploadQueue"] = queue.Queue()
+    if beeutil.profiler.start(PLUGIN_NAME):
+        vlog("sampling profiler enabled")
 
-    def upload_worker():
+    state["governor"] = beeutil.governor.Governor()
+    if DECIMATE_METERS is not None:
+        state["decimator"] = beeutil.decimation.Decimator(distance_m=DECIMATE_METERS)
+    if DEDUP_SIMILARITY is not None:
+        state["dedup"] = beeutil.embeddings.NearDuplicateFilter(threshold=DEDUP_SIMILARITY)
+    if SUMMARY_CLUSTERS is not None:
+        state["clusters"] = beeutil.clustering.SceneClusters(k=SUMMARY_CLUSTERS)
+
+    vlog(f"initializing {UPLOAD_THREADS} upload workers")
+    # Ranked rather than FIFO; every frame here gets the same rank, so it drains
+    # oldest first (see "Prioritized Uploads" in the README to rank matches higher)
+    state["uploadQueue"] = beeutil.upload_queue.UploadQueue()
+
+    if DIRECT_S3:
+        state["s3"] = beeutil.s3.S3Uploader(
+            beeutil.secrets.get(PLUGIN_NAME, "AWS_BUCKET"),
+            beeutil.secrets.get(PLUGIN_NAME, "AWS_REGION"),
+            beeutil.secrets.get(PLUGIN_NAME, "AWS_KEY"),
+            beeutil.secrets.get(PLUGIN_NAME, "AWS_SECRET"),
+            state_dir=f"/data/plugins/{PLUGIN_NAME}/s3",
+        )
+
+    def upload_worker(index):
         while True:
+            # Park surplus workers while the device is under pressure
+            while index >= state["governor"].workers(UPLOAD_THREADS):
+                time.sleep(LOOP_DELAY)
             handle = state["uploadQueue"].get()
+            if state["s3"] is not None:
+                try:
+                    state["s3"].upload_handle(state["session"], handle)
+                except beeutil.s3.S3Error as e:
+                    vlog(f"ERROR: upload of {handle} failed: {e}")
+                continue
             beeutil.upload_to_s3(
                 state["session"],
                 handle,
@@ -52,26 +97,58 @@ def _setup(state):
             )
 
     state["threads"] = [
-        threading.Thread(target=upload_worker, daemon=True).start() for i in range(UPLOAD_THREADS)
+        threading.Thread(target=upload_worker, args=(i,), daemon=True).start()
+        for i in range(UPLOAD_THREADS)
     ]
-    state["uploadQueue"] = queue.Queue()
+
+
+def _filter_by_embeddings(state, contents, since_ms, until_ms):
+    try:
+        frames = beeutil.embeddings.list_embeddings(since_ms=since_ms, until_ms=until_ms)
+    except beeutil.EmbeddingsError as e:
+        vlog(f"WARNING: skipping embedding filters: {e}")
+        return contents
+    handles = set(contents)
+    frames = [f for f in frames if f["image_name"] in handles]
+    embedded = {f["image_name"] for f in frames}
+    unembedded = [h for h in contents if h not in embedded]
+    if state["dedup"] is not None:
+        frames = state["dedup"].filter(frames)
+    if state["clusters"] is not None:
+        # Representatives come out once their time bucket has closed
+        state["clusters"].partial_fit_frames(frames)
+        return unembedded + state["clusters"].pop_completed(until_ms)
+    survivors = {f["image_name"] for f in frames}
+    return [h for h in contents if h in survivors or h not in embedded]
 
 
 def _loop(state):
+    state["governor"].update()
     contents = beeutil.list_contents(state["last_checked"])
 
     if len(contents) == 0:
         vlog(f"no new content since {state['last_checked']}")
         return
 
+    contents = contents[: state["governor"].batch_size(UPLOAD_BATCH)]
+
+    first_ms = int(contents[0].split("_")[0])
     vlog(f"since {state['last_checked']}:")
+
+    # Advance the cursor past filtered-out frames too, or they are listed again every loop
+    state["last_checked"] = contents[-1].split("_")[0]
+    if GEOFENCE is not None:
+        contents = GEOFENCE.filter_names(contents)
+    if state["decimator"] is not None:
+        contents = state["decimator"].filter_names(contents)
+    if (state["dedup"] is not None or state["clusters"] is not None) and contents:
+        contents = _filter_by_embeddings(state, contents, first_ms, int(state["last_checked"]))
+
     vlog(contents)
 
     for handle in contents:
         state["uploadQueue"].put(handle)
 
-    state["last_checked"] = contents[-1].split("_")[0]
-
 
 def main():
     state = {
@@ -79,6 +156,11 @@ def main():
         "session": "",
         "threads": None,
         "uploadQueue": None,
+        "governor": None,
+        "decimator": None,
+        "dedup": None,
+        "clusters": None,
+        "s3": None,
     }
 
     vlog("setting up plugin")
@@ -87,4 +169,4 @@ def main():
     vlog("initializing run loop")
     while True:
         _loop(state)
-        time.sleep(LOOP_DELAY)
+        time.sleep(state["governor"].poll_interval(LOOP_DELAY))
@@ -0,0 +1,125 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.clustering import SceneClusters
+from beeutil.embeddings import DimensionMismatchError
+
+
+def _scenes(n_scenes=4, per_scene=50, dim=16, noise=0.05, seed=0):
+    """Frames from well-separated scenes, interleaved in time."""
+    rng = np.random.RandomState(seed)
+    anchors = np.eye(dim)[:n_scenes]
+    scene = np.tile(np.arange(n_scenes), per_scene)
+    vectors = anchors[scene] + rng.normal(scale=noise, size=(len(scene), dim))
+    times = np.arange(len(scene)) * 100
+    names = [f"{t}_{i}.jpg" for i, t in enumerate(times)]
+    return vectors, times.tolist(), names, scene
+
+
+def _frames(vectors, times, names):
+    return [
+        {"timestamp_ms": t, "image_name": n, "embeddings": v.tolist(), "lat": 0.0, "lon": 0.0}
+        for v, t, n in zip(vectors, times, names)
+    ]
+
+
+def test_recovers_separated_scenes():
+    vectors, times, names, scene = _scenes()
+    clusters = SceneClusters(k=4)
+    labels = clusters.partial_fit(vectors, times, names)
+    # Each scene maps to exactly one cluster and vice versa
+    pairs = set(zip(scene.tolist(), labels.tolist()))
+    assert len(pairs) == 4
+    assert len({c for _, c in pairs}) == 4
+
+
+def test_incremental_matches_single_batch_assignment():
+    vectors, times, names, scene = _scenes(per_scene=60)
+    clusters = SceneClusters(k=4)
+    labels = np.concatenate(
+        [
+            clusters.partial_fit(vectors[i : i + 37], times[i : i + 37], names[i : i + 37])
+            for i in range(0, 240, 37)
+        ]
+    )
+    assert len(set(zip(scene.tolist(), labels.tolist()))) == 4
+    assert clusters.counts.sum() == 240
+
+
+def test_representatives_are_closest_to_centroids():
+    vectors, times, names, scene = _scenes()
+    clusters = SceneClusters(k=4)
+    labels = clusters.partial_fit(vectors, times, names)
+    reps = clusters.representatives()
+    assert len(reps) == 4
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for cluster, rep in enumerate(reps):
+        members = np.nonzero(labels == cluster)[0]
+        sims = unit[members] @ clusters.centroids[cluster]
+        assert rep == names[members[np.argmax(sims)]]
+
+
+def test_memory_is_bounded():
+    clusters = SceneClusters(k=3, time_bucket_ms=1000, max_buckets=5)
+    rng = np.random.RandomState(1)
+    for window in range(20):
+        times = list(range(window * 1000, window * 1000 + 1000, 50))
+        names = [f"{t}.jpg" for t in times]
+        clusters.partial_fit(rng.normal(size=(len(times), 8)), times, names)
+    assert clusters.centroids.shape == (3, 8)
+    assert len(clusters.bucket_representatives()) == 5
+    assert all(len(reps) <= 3 for reps in clusters.bucket_representatives().values())
+
+
+def test_pop_completed_returns_each_bucket_once():
+    vectors, times, names, _ = _scenes(per_scene=50)  # 200 frames over 20 s
+    clusters = SceneClusters(k=4, time_bucket_ms=5000)
+    clusters.partial_fit(vectors, times, names)
+
+    first = clusters.pop_completed(10_000)
+    assert 0 < len(first) <= 8
+    assert all(int(n.split("_")[0]) < 10_000 for n in first)
+    assert first == sorted(first, key=lambda n: int(n.split("_")[0]))
+    assert clusters.pop_completed(10_000) == []
+
+    rest = clusters.pop_completed(20_000)
+    assert len(rest) == 8
+    assert not set(first) & set(rest)
+    assert clusters.bucket_representatives() == {}
+
+
+def test_covers_every_scene_per_bucket():
+    vectors, times, names, scene = _scenes(per_scene=50)
+    clusters = SceneClusters(k=4, time_bucket_ms=5000)
+    clusters.partial_fit_frames(_frames(vectors, times, names))
+    scene_of = dict(zip(names, scene.tolist()))
+    for reps in clusters.bucket_representatives().values():
+        assert sorted(scene_of[n] for n in reps) == [0, 1, 2, 3]
+
+
+def test_fewer_distinct_frames_than_k():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    clusters = SceneClusters(k=5)
+    clusters.partial_fit(vectors, [0, 1, 2], ["a", "b", "c"])
+    assert clusters.n_clusters == 2
+    assert sorted(clusters.representatives()) in (["a", "c"], ["b", "c"])
+
+
+def test_zero_vectors_are_skipped():
+    vectors = np.array([[0.0, 0.0], [1.0, 0.0]])
+    clusters = SceneClusters(k=2)
+    labels = clusters.partial_fit(vectors, [0, 1], ["zero", "x"])
+    assert labels.tolist() == [-1, 0]
+    assert clusters.representatives() == ["x"]
+
+
+def test_dimension_mismatch():
+    clusters = SceneClusters(k=2)
+    clusters.partial_fit(np.ones((2, 4)), [0, 1], ["a", "b"])
+    with pytest.raises(DimensionMismatchError):
+        clusters.partial_fit(np.ones((2, 3)), [2, 3], ["c", "d"])
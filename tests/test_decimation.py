@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.decimation import Decimator
+from beeutil.frames import FrameIndex
+from beeutil.geo import haversine_m
+
+SF_FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "sf")
+
+# ~1.11 m of latitude per 1e-5 degree
+METER_LAT = 1e-5 / 1.11195
+
+
+def _track(meters, start_time=0, step_ms=100, lon=-122.0):
+    """Frames heading north at the given cumulative distances."""
+    return (
+        [start_time + i * step_ms for i in range(len(meters))],
+        [37.0 + m * METER_LAT for m in meters],
+        [lon] * len(meters),
+    )
+
+
+def test_keeps_one_frame_per_distance():
+    decimator = Decimator(distance_m=10, heading_change_deg=None)
+    times, lats, lons = _track([i * 1.0 for i in range(50)])
+    keep = decimator.keep_mask(times, lats, lons)
+    assert [i for i, k in enumerate(keep) if k] == [0, 10, 20, 30, 40]
+    assert decimator.kept == 5
+    assert decimator.dropped == 45
+
+
+def test_stationary_vehicle_keeps_first_frame_only():
+    decimator = Decimator(distance_m=5)
+    times, lats, lons = _track([0.0] * 30)
+    assert sum(decimator.keep_mask(times, lats, lons)) == 1
+
+
+def test_state_carries_across_batches():
+    meters = [i * 1.5 for i in range(40)]
+    whole = Decimator(distance_m=7, heading_change_deg=None).keep_mask(*_track(meters))
+
+    split = Decimator(distance_m=7, heading_change_deg=None)
+    times, lats, lons = _track(meters)
+    chunked = []
+    for start in range(0, 40, 9):
+        chunked += split.keep_mask(
+            times[start : start + 9], lats[start : start + 9], lons[start : start + 9]
+        )
+    assert chunked == whole
+
+
+def test_min_interval_suppresses_fast_frames():
+    decimator = Decimator(distance_m=1, min_interval_ms=500, heading_change_deg=None)
+    times, lats, lons = _track([i * 5.0 for i in range(20)], step_ms=100)
+    kept_times = [t for t, k in zip(times, decimator.keep_mask(times, lats, lons)) if k]
+    assert kept_times == [0, 500, 1000, 1500]
+
+
+def test_heading_change_keeps_turn():
+    decimator = Decimator(distance_m=100, heading_change_deg=45)
+    # 20 m north, then turn east
+    times = list(range(0, 900, 100))
+    lats = [37.0 + m * METER_LAT for m in (0, 5, 10, 15, 20)] + [37.0 + 20 * METER_LAT] * 4
+    lons = [-122.0] * 5 + [-122.0 + d * 1e-4 for d in (0.5, 1.0, 1.5, 2.0)]
+    keep = decimator.keep_mask(times, lats, lons)
+    assert keep[0]
+    assert keep[5]
+    assert sum(keep) == 2
+
+
+def test_filter_names_on_fixture_drive():
+    index = FrameIndex.from_directory(SF_FIXTURE, read_sidecars=False)
+    names = index.names.tolist()
+    decimator = Decimator(distance_m=25, heading_change_deg=None)
+    kept = decimator.filter_names(list(reversed(names)) + ["notes.txt"])
+
+    assert kept[-1] == "notes.txt"
+    kept_index = [names.index(name) for name in kept[:-1]]
+    assert kept_index == sorted(kept_index)
+    assert kept[0] == names[0]
+    assert len(kept) - 1 < len(names)
+    # Consecutive kept frames are at least 25 m of travel apart
+    for a, b in zip(kept_index, kept_index[1:]):
+        travelled = haversine_m(
+            index.lat[a:b], index.lon[a:b], index.lat[a + 1 : b + 1], index.lon[a + 1 : b + 1]
+        ).sum()
+        assert travelled >= 25
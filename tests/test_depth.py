@@ -0,0 +1,143 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.depth import DepthController
+from beeutil.events import EventDetector
+from beeutil.image_cache import ImageCacheError
+
+LAT0, LON0 = 37.0, -122.0
+M_PER_DEG = 111195.0  # meters per degree of latitude
+
+
+class Toggles:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def enable(self):
+        if self.fail:
+            raise ImageCacheError("odc-api error 503: busy")
+        self.calls.append("on")
+
+    def disable(self):
+        self.calls.append("off")
+
+
+def _controller(toggles, **kwargs):
+    kwargs.setdefault("debounce_ms", 0)
+    kwargs.setdefault("min_on_ms", 0)
+    kwargs.setdefault("min_off_ms", 0)
+    return DepthController(enable=toggles.enable, disable=toggles.disable, **kwargs)
+
+
+def _frame(ts, north_m):
+    """A frame driving due north at a fixed longitude."""
+    return {"timestamp_ms": ts, "lat": LAT0 + north_m / M_PER_DEG, "lon": LON0}
+
+
+def _match(ts, north_m, score=0.9):
+    return dict(_frame(ts, north_m), label="sign", score=score, image_name=f"{ts}.jpg")
+
+
+def test_on_during_match_and_off_after_hold():
+    toggles = Toggles()
+    depth = _controller(toggles, hold_ms=2000, learn_targets=False)
+    assert not depth.update(now_ms=0)
+    assert depth.update([_match(1000, 0)], now_ms=1000)
+    assert depth.update(now_ms=2900)
+    assert not depth.update(now_ms=3100)
+    assert toggles.calls == ["on", "off"]
+    assert depth.on_ms == 2100
+
+
+def test_predicts_target_ahead_from_heading():
+    toggles = Toggles()
+    # 10 m/s northbound; target 60 m ahead, reachable within the 8 s lookahead
+    depth = _controller(toggles, targets=[(LAT0 + 100 / M_PER_DEG, LON0)])
+    track = [_frame(1000 * i, 10 * i) for i in range(5)]
+    assert depth.update(frames=track, now_ms=4000)
+    assert depth.motion()[2] < 1 or depth.motion()[2] > 359
+
+
+def test_ignores_targets_behind_or_off_path():
+    toggles = Toggles()
+    behind = (LAT0 - 100 / M_PER_DEG, LON0)
+    beside = (LAT0 + 60 / M_PER_DEG, LON0 + 200 / M_PER_DEG)
+    far_ahead = (LAT0 + 1000 / M_PER_DEG, LON0)
+    depth = _controller(toggles, targets=[behind, beside, far_ahead])
+    track = [_frame(1000 * i, 10 * i) for i in range(5)]
+    assert not depth.update(frames=track, now_ms=4000)
+    assert toggles.calls == []
+
+
+def test_learned_targets_trigger_next_pass():
+    toggles = Toggles()
+    depth = _controller(toggles, hold_ms=1000)
+    depth.update([_match(0, 500)], now_ms=0)
+    depth.update([_match(0, 500)], now_ms=0)  # same spot is not learned twice
+    assert len(depth.targets) == 1
+    depth.update(now_ms=20000)  # the last known position is stale by now
+    assert toggles.calls == ["on", "off"]
+
+    # Approaching the learned spot again turns depth on before any match
+    track = [_frame(60000 + 1000 * i, 400 + 10 * i) for i in range(3)]
+    assert depth.update(frames=track, now_ms=62000)
+
+
+def test_debounce_ignores_blips():
+    toggles = Toggles()
+    depth = _controller(toggles, debounce_ms=1500, hold_ms=500, learn_targets=False)
+    depth.update([_match(0, 0)], now_ms=0)
+    assert not depth.update(now_ms=400)  # wanted, not yet held long enough
+    depth.update(now_ms=1000)  # hold expired before the debounce did
+    assert not depth.update(now_ms=2000)
+    assert toggles.calls == []
+
+
+def test_minimum_dwell_limits_switching():
+    toggles = Toggles()
+    depth = _controller(toggles, hold_ms=0, min_on_ms=10000, min_off_ms=5000, learn_targets=False)
+    depth.update([_match(0, 0)], now_ms=0)
+    assert depth.update(now_ms=5000)  # would be off, but on for only 5 s
+    assert not depth.update(now_ms=10000)
+    assert not depth.update([_match(11000, 0)], now_ms=11000)  # off for only 1 s
+    assert depth.update([_match(15000, 0)], now_ms=15000)
+    assert toggles.calls == ["on", "off", "on"]
+    assert depth.switches == 3
+
+
+def test_open_events_keep_depth_on():
+    toggles = Toggles()
+    detector = EventDetector(enter_threshold=0.8)
+    depth = _controller(toggles, detector=detector, hold_ms=0, learn_targets=False)
+    detector.update([_match(0, 0)])
+    assert depth.update(now_ms=10000)
+    detector.flush()
+    assert not depth.update(now_ms=10001)
+
+
+def test_trigger_threshold_and_toggle_errors():
+    toggles = Toggles()
+    depth = _controller(toggles, trigger_threshold=0.85, learn_targets=False)
+    assert not depth.update([_match(0, 0, score=0.8)], now_ms=0)
+    toggles.fail = True
+    assert not depth.update([_match(1, 0)], now_ms=1)
+    assert depth.errors == 1
+    toggles.fail = False
+    assert depth.update(now_ms=2)
+    depth.close(now_ms=3)
+    assert toggles.calls == ["on", "off"]
+
+
+def test_default_now_is_newest_capture_time():
+    toggles = Toggles()
+    depth = _controller(toggles)
+    # Capture timestamps far behind the wall clock still hold depth on.
+    assert depth.update([_match(1000, 0)])
+    assert depth.update(frames=[_frame(5500, 50)])
+    assert not depth.update(frames=[_frame(6500, 60)])
+    depth.update([_match(7000, 70)])
+    depth.close()
+    assert depth.on_ms == 5500
@@ -6,15 +6,22 @@ import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+import numpy as np
+
+import beeutil.embeddings as embeddings
 from beeutil.embeddings import (
     DimensionMismatchError,
     EmbeddingsError,
+    NearDuplicateFilter,
+    QuerySet,
     cosine_similarity,
     fetch_and_match,
     find_matches,
+    find_matches_batch,
     list_embeddings,
     load_query_embeddings,
 )
+from beeutil.parallel import score_hits, score_hits_sharded
 
 # --- cosine_similarity tests ---
 
@@ -117,6 +124,262 @@ def test_find_matches_dimension_mismatch_query_vs_embedding():
         find_matches(item, qe, default_threshold=0.5)
 
 
+# --- find_matches_batch tests ---
+
+
+def _random_frames(n, dim=16, seed=0):
+    rng = np.random.RandomState(seed)
+    return [
+        _make_embedding_item(rng.randn(dim).tolist(), ts=1000 + i, filename=f"{i}.json")
+        for i in range(n)
+    ]
+
+
+def _random_queries(n, dim=16, seed=1):
+    rng = np.random.RandomState(seed)
+    return [
+        {"label": f"q{i}", "embedding": rng.randn(dim).tolist(), "threshold": 0.2 + 0.05 * i}
+        for i in range(n)
+    ]
+
+
+def test_find_matches_batch_equals_per_frame():
+    frames = _random_frames(200)
+    qe = _random_queries(4)
+    expected = [m for frame in frames for m in find_matches(frame, qe, 0.3)]
+    result = find_matches_batch(frames, qe, 0.3)
+    assert expected
+    assert [(m["image_name"], m["label"]) for m in result] == [
+        (m["image_name"], m["label"]) for m in expected
+    ]
+    assert [m["score"] for m in result] == pytest.approx([m["score"] for m in expected])
+
+
+def test_find_matches_batch_dimension_mismatch():
+    frames = [_make_embedding_item([1.0, 0.0, 0.0]), _make_embedding_item([1.0, 0.0])]
+    qe = [{"label": "test", "embedding": [1.0, 0.0, 0.0]}]
+    with pytest.raises(DimensionMismatchError):
+        find_matches_batch(frames, qe, default_threshold=0.5)
+
+
+def test_find_matches_batch_zero_vector_never_matches():
+    frames = [_make_embedding_item([0.0, 0.0, 0.0])]
+    qe = [{"label": "test", "embedding": [1.0, 0.0, 0.0], "threshold": -1.0}]
+    assert find_matches_batch(frames, qe, default_threshold=0.5) == []
+
+
+def test_find_matches_batch_empty_inputs():
+    assert find_matches_batch([], _random_queries(2), 0.5) == []
+    assert find_matches_batch(_random_frames(3), [], 0.5) == []
+
+
+def test_score_hits_sharded_equals_in_process():
+    rng = np.random.RandomState(3)
+    frames = rng.randn(101, 8)
+    frames /= np.linalg.norm(frames, axis=1, keepdims=True)
+    queries = rng.randn(3, 8)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    thresholds = np.array([0.1, 0.3, 0.5])
+
+    expected = score_hits(frames, queries, thresholds)
+    result = score_hits_sharded(frames, queries, thresholds, processes=2)
+    np.testing.assert_array_equal(result[0], expected[0])
+    np.testing.assert_array_equal(result[1], expected[1])
+    np.testing.assert_allclose(result[2], expected[2])
+
+
+def test_find_matches_batch_parallel_above_size_threshold(monkeypatch):
+    monkeypatch.setattr(embeddings, "PARALLEL_MIN_FRAMES", 50)
+    frames = _random_frames(120)
+    qe = _random_queries(3)
+    expected = find_matches_batch(frames, qe, 0.3)
+
+    with patch("beeutil.embeddings.score_hits", side_effect=AssertionError):
+        result = find_matches_batch(frames, qe, 0.3, processes=2)
+    assert [m["image_name"] for m in result] == [m["image_name"] for m in expected]
+
+
+def test_find_matches_batch_small_batch_stays_in_process():
+    frames = _random_frames(10)
+    with patch("beeutil.embeddings.score_hits_sharded", side_effect=AssertionError):
+        find_matches_batch(frames, _random_queries(2), 0.3, processes=4)
+
+
+# --- NearDuplicateFilter tests ---
+
+
+def _drive_frames(vectors, start_ms=1000):
+    return [
+        {
+            "image_name": f"{start_ms + 100 * i}.jpg",
+            "timestamp_ms": start_ms + 100 * i,
+            "lat": 37.0,
+            "lon": -122.0,
+            "embeddings": list(v),
+        }
+        for i, v in enumerate(vectors)
+    ]
+
+
+def test_near_duplicate_filter_drops_stationary_frames():
+    rng = np.random.RandomState(0)
+    scene_a, scene_b = rng.randn(2, 16)
+    noise = rng.randn(10, 16) * 0.01
+    vectors = [scene_a + n for n in noise[:5]] + [scene_b + n for n in noise[5:]]
+    dedup = NearDuplicateFilter(threshold=0.95)
+    assert dedup.surviving_names(_drive_frames(vectors)) == ["1000.jpg", "1500.jpg"]
+    assert dedup.kept == 2
+    assert dedup.dropped == 8
+
+
+def test_near_duplicate_filter_state_persists_across_calls():
+    rng = np.random.RandomState(1)
+    vectors = rng.randn(30, 16)
+    vectors[10:20] = vectors[9] + rng.randn(10, 16) * 0.01
+    frames = _drive_frames(vectors)
+    whole = NearDuplicateFilter(threshold=0.95).surviving_names(frames)
+
+    dedup = NearDuplicateFilter(threshold=0.95)
+    chunked = []
+    for start in range(0, 30, 7):
+        chunked += dedup.surviving_names(frames[start : start + 7])
+    assert chunked == whole
+    assert len(whole) == 20
+
+
+def test_near_duplicate_filter_window_is_bounded():
+    rng = np.random.RandomState(2)
+    scenes = rng.randn(4, 16)
+    # a b c d a: with a window of 3 the second "a" is no longer remembered
+    vectors = [scenes[0], scenes[1], scenes[2], scenes[3], scenes[0]]
+    assert len(NearDuplicateFilter(threshold=0.95, window=3).filter(_drive_frames(vectors))) == 5
+    assert len(NearDuplicateFilter(threshold=0.95, window=4).filter(_drive_frames(vectors))) == 4
+
+
+def test_near_duplicate_filter_rejects_empty_window():
+    with pytest.raises(ValueError, match="window must be at least 1"):
+        NearDuplicateFilter(window=0)
+
+
+def test_near_duplicate_filter_keeps_zero_vectors_and_sorts():
+    frames = _drive_frames([[1.0, 0.0], [0.0, 0.0], [0.0, 0.0], [1.0, 0.0]])
+    kept = NearDuplicateFilter(threshold=0.9).filter(list(reversed(frames)))
+    assert [f["image_name"] for f in kept] == ["1000.jpg", "1100.jpg", "1200.jpg"]
+
+
+def test_near_duplicate_filter_dimension_mismatch():
+    dedup = NearDuplicateFilter()
+    dedup.keep_mask(np.ones((1, 3)))
+    with pytest.raises(DimensionMismatchError):
+        dedup.keep_mask(np.ones((1, 4)))
+
+
+def test_fetch_and_match_skips_duplicates():
+    vectors = [[1.0, 0.0, 0.0]] * 4 + [[0.0, 1.0, 0.0]]
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = _drive_frames(vectors)
+    qe = [{"label": "target", "embedding": [1.0, 0.0, 0.0]}]
+
+    with patch("beeutil.embeddings.requests.get", return_value=mock_resp):
+        matches, last_ts = fetch_and_match(0, qe, 0.5, dedup=NearDuplicateFilter())
+    assert [m["image_name"] for m in matches] == ["1000.jpg"]
+    assert last_ts == 1400
+
+
+# --- QuerySet tests ---
+
+
+def _query_list(n, dim=8, seed=0):
+    rng = np.random.RandomState(seed)
+    return [
+        {"label": f"q{i}", "embedding": rng.randn(dim).tolist(), "threshold": 0.2 + i / 100}
+        for i in range(n)
+    ]
+
+
+def _as_set(matches):
+    return {(m["image_name"], m["label"], round(m["score"], 12)) for m in matches}
+
+
+def test_query_set_matches_list_results():
+    queries = _query_list(5)
+    queries[2].pop("threshold")
+    frames = _random_frames(50, dim=8)
+    expected = find_matches_batch(frames, queries, 0.25)
+    assert _as_set(find_matches_batch(frames, QuerySet(queries), 0.25)) == _as_set(expected)
+
+
+def test_query_set_update_only_touches_changed_rows():
+    queries = _query_list(4)
+    qs = QuerySet(queries)
+    assert qs.version == 1
+    before = qs.matrix.copy()
+    buffer = qs.matrix
+
+    assert not qs.update(queries)
+    assert qs.version == 1
+
+    changed = [dict(q) for q in queries]
+    changed[1]["embedding"] = [1.0] + [0.0] * 7
+    changed[3]["threshold"] = 0.9
+    assert qs.update(changed)
+    assert qs.version == 2
+    assert np.shares_memory(qs.matrix, buffer)
+    assert np.array_equal(qs.matrix[[0, 2, 3]], before[[0, 2, 3]])
+    assert qs.matrix[1].tolist() == [1.0] + [0.0] * 7
+    assert qs.thresholds(0.5)[3] == 0.9
+
+
+def test_query_set_add_and_remove_labels():
+    queries = _query_list(4)
+    qs = QuerySet(queries)
+    updated = [queries[0], queries[3], *_query_list(6, seed=1)[4:]]
+    updated[2]["label"] = "new-a"
+    updated[3]["label"] = "new-b"
+    assert qs.update(updated)
+    assert sorted(qs.labels) == ["new-a", "new-b", "q0", "q3"]
+
+    frames = _random_frames(40, dim=8)
+    assert _as_set(find_matches_batch(frames, qs, 0.3)) == _as_set(
+        find_matches_batch(frames, updated, 0.3)
+    )
+
+
+def test_query_set_content_hash_is_order_independent():
+    queries = _query_list(3)
+    a = QuerySet(queries)
+    b = QuerySet(list(reversed(queries)))
+    assert a.content_hash == b.content_hash
+    b.update([*queries[:2], {**queries[2], "threshold": 0.99}])
+    assert a.content_hash != b.content_hash
+
+
+def test_query_set_new_model_dimension_rebuilds():
+    qs = QuerySet(_query_list(3, dim=8))
+    qs.update(_query_list(2, dim=4))
+    assert qs.dim == 4
+    assert len(qs) == 2
+    with pytest.raises(DimensionMismatchError):
+        qs.update([*_query_list(1, dim=4), {"label": "x", "embedding": [1.0, 0.0]}])
+
+
+@patch("beeutil.embeddings.requests.get")
+def test_query_set_reload(mock_get):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = {"queryEmbeddings": _query_list(2)}
+    mock_get.return_value = mock_resp
+    qs = QuerySet()
+    assert qs.reload("test-plugin")
+    assert not qs.reload("test-plugin")
+    assert qs.version == 1
+
+
+def test_query_set_empty_returns_no_matches():
+    assert find_matches_batch(_random_frames(3, dim=8), QuerySet(), 0.5) == []
+
+
 # --- list_embeddings tests ---
 
 
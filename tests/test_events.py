@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.events import EventDetector
+
+# ~1.11 m of latitude per 1e-5 degree
+METER_LAT = 1e-5 / 1.11195
+
+
+def _match(t, score, label="sign", meters=0.0):
+    return {
+        "label": label,
+        "score": score,
+        "timestamp_ms": t,
+        "lat": 37.0 + meters * METER_LAT,
+        "lon": -122.0,
+        "image_name": f"{t}.jpg",
+    }
+
+
+def _pass(start_ms, scores, label="sign", start_m=0.0, step_ms=100, step_m=1.0):
+    return [
+        _match(start_ms + i * step_ms, s, label, start_m + i * step_m) for i, s in enumerate(scores)
+    ]
+
+
+def test_one_event_per_object():
+    detector = EventDetector(enter_threshold=0.8, exit_threshold=0.7)
+    matches = _pass(1000, [0.72, 0.81, 0.9, 0.95, 0.85, 0.74, 0.71])
+    assert detector.update(matches) == []
+    assert detector.open_labels == ["sign"]
+
+    (event,) = detector.flush()
+    assert event["label"] == "sign"
+    assert event["start_ms"] == 1100  # the 0.72 before entering does not open it
+    assert event["end_ms"] == 1600
+    assert event["frames"] == 6
+    assert event["best"]["score"] == 0.95
+    assert event["best"]["image_name"] == "1300.jpg"
+    assert detector.flush() == []
+
+
+def test_hysteresis_keeps_event_open_through_dip():
+    detector = EventDetector(enter_threshold=0.8, exit_threshold=0.6)
+    detector.update(_pass(0, [0.85, 0.65, 0.62, 0.9]))
+    (event,) = detector.flush()
+    assert event["frames"] == 4
+
+
+def test_time_gap_splits_events():
+    detector = EventDetector(enter_threshold=0.8, max_gap_ms=500)
+    closed = detector.update(_pass(0, [0.9, 0.9]) + _pass(5000, [0.9, 0.9], start_m=2.0))
+    assert [(e["start_ms"], e["end_ms"]) for e in closed] == [(0, 100)]
+    assert [(e["start_ms"], e["end_ms"]) for e in detector.flush()] == [(5000, 5100)]
+
+
+def test_distance_gap_splits_events():
+    detector = EventDetector(enter_threshold=0.8, max_gap_ms=10000, max_gap_m=20)
+    closed = detector.update([_match(0, 0.9), _match(100, 0.9, meters=100)])
+    assert len(closed) == 1
+    assert closed[0]["frames"] == 1
+    assert detector.open_labels == ["sign"]
+
+
+def test_labels_are_independent():
+    detector = EventDetector(enter_threshold=0.8)
+    matches = _pass(0, [0.9, 0.9, 0.9], label="sign") + _pass(50, [0.85, 0.86], label="hydrant")
+    detector.update(list(reversed(matches)))
+    events = sorted(detector.flush(), key=lambda e: e["label"])
+    assert [(e["label"], e["frames"]) for e in events] == [("hydrant", 2), ("sign", 3)]
+
+
+def test_state_persists_across_cursor_batches():
+    matches = _pass(0, [0.9, 0.75, 0.95, 0.8, 0.9, 0.7, 0.92, 0.9])
+    whole = EventDetector(enter_threshold=0.85, exit_threshold=0.72)
+    expected = whole.update(matches) + whole.flush()
+
+    detector = EventDetector(enter_threshold=0.85, exit_threshold=0.72)
+    events = []
+    for start in range(0, len(matches), 3):
+        batch = matches[start : start + 3]
+        events += detector.update(batch, now_ms=batch[-1]["timestamp_ms"])
+    assert events + detector.flush() == expected
+    assert len(expected) == 1
+
+
+def test_advance_closes_idle_events():
+    detector = EventDetector(enter_threshold=0.8, max_gap_ms=1000)
+    detector.update(_pass(0, [0.9, 0.9]))
+    assert detector.advance(1000) == []
+    (event,) = detector.update([], now_ms=1101)
+    assert event["end_ms"] == 100
+    assert detector.open_labels == []
+
+
+def test_invalid_thresholds():
+    with pytest.raises(ValueError, match="exit_threshold"):
+        EventDetector(enter_threshold=0.7, exit_threshold=0.8)
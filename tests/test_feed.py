@@ -0,0 +1,282 @@
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil import precision
+from beeutil.embeddings import fetch_and_match
+from beeutil.feed import FeedClient, FeedError, FeedServer, _Ring
+from beeutil.result_cache import ResultCache
+
+DIM = 8
+
+
+def _frames(n, start_ms=1000, seed=0):
+    rng = np.random.RandomState(seed)
+    return [
+        {
+            "timestamp_ms": start_ms + 100 * i,
+            "image_name": f"{start_ms + 100 * i}_37.0_-122.0.jpg",
+            "lat": 37.0 + i / 1000,
+            "lon": -122.0,
+            # float32-representable so feed and direct results compare exactly
+            "embeddings": rng.randn(DIM).astype(np.float32).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+class FakeOdc:
+    """list_embeddings stand-in over a growing list of frames."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, since_ms=None, until_ms=None):
+        with self.lock:
+            self.calls += 1
+            return [
+                f
+                for f in self.frames
+                if (since_ms is None or f["timestamp_ms"] >= since_ms)
+                and (until_ms is None or f["timestamp_ms"] <= until_ms)
+            ]
+
+
+@pytest.fixture
+def feed(tmp_path):
+    odc = FakeOdc(_frames(50))
+    server = FeedServer(
+        socket_path=str(tmp_path / "feed.sock"), refresh_interval_s=60, capacity=30, fetch=odc
+    )
+    server.start()
+    yield server, odc
+    server.close()
+
+
+def test_ring_keeps_newest_and_tracks_eviction():
+    ring = _Ring(capacity=10)
+    frames = _frames(25)
+    for start in range(0, 25, 4):
+        ring.extend(frames[start : start + 4])
+    assert len(ring) == 10
+    assert ring.newest == frames[-1]["timestamp_ms"]
+    assert ring.evicted_through == frames[14]["timestamp_ms"]
+    window = ring.range(frames[20]["timestamp_ms"], frames[22]["timestamp_ms"])
+    assert window["image_name"] == [f["image_name"] for f in frames[20:23]]
+    assert window["vectors"].dtype == np.float32
+
+
+def test_ring_ignores_already_held_frames():
+    ring = _Ring(capacity=10)
+    frames = _frames(5)
+    assert ring.extend(frames) == 5
+    assert ring.extend(frames) == 0
+    assert ring.extend(list(reversed(_frames(8)))) == 3
+
+
+def test_ring_oversized_batch():
+    ring = _Ring(capacity=4)
+    frames = _frames(10)
+    ring.extend(frames)
+    assert ring.range(None, None)["image_name"] == [f["image_name"] for f in frames[-4:]]
+    assert ring.evicted_through == frames[5]["timestamp_ms"]
+
+
+def test_ring_compacts_within_slack():
+    ring = _Ring(capacity=8)
+    frames = _frames(60)
+    appended = []
+    for size in [1, 7, 2, 8, 3, 5, 6, 4, 8, 1, 7, 8]:
+        batch = frames[len(appended) : len(appended) + size]
+        ring.extend(batch)
+        appended += batch
+        held = ring.range(None, None)["image_name"]
+        assert held == [f["image_name"] for f in appended[-8:]]
+        if len(appended) > 8:
+            assert ring.evicted_through == appended[-9]["timestamp_ms"]
+    assert len(ring._ts) == 10
+
+
+def test_ring_stores_precision_dtype():
+    ring = _Ring(capacity=10, dtype=np.float16)
+    frames = _frames(5)
+    ring.extend(frames)
+    window = ring.range(None, None)
+    assert window["vectors"].dtype == np.float16
+    expected = np.array([f["embeddings"] for f in frames], dtype=np.float16)
+    assert np.array_equal(window["vectors"], expected)
+
+
+def test_client_matches_direct_list_embeddings(feed):
+    server, odc = feed
+    client = FeedClient(server.socket_path, fallback=False)
+    expected = odc(since_ms=3000, until_ms=4500)
+    assert client.list_embeddings(3000, 4500) == expected
+
+
+def test_subscribers_share_one_fetch(feed):
+    server, odc = feed
+    clients = [FeedClient(server.socket_path, fallback=False) for _ in range(3)]
+    for client in clients:
+        client.list_embeddings(since_ms=4000)
+    for client in clients:
+        client.list_embeddings(since_ms=4500)
+    assert odc.calls == 1
+    assert server.fetches == 1
+
+
+def test_evicted_history_is_fetched_from_odc(feed):
+    server, odc = feed
+    client = FeedClient(server.socket_path, fallback=False)
+    assert client.list_embeddings() == odc()
+    assert odc.calls == 3  # initial fill, the evicted range and the comparison itself
+
+
+def test_refresh_picks_up_new_frames(feed):
+    server, odc = feed
+    client = FeedClient(server.socket_path, fallback=False)
+    assert client.list_embeddings(since_ms=5901) == []
+    odc.frames += _frames(3, start_ms=6000, seed=1)
+    server.refresh()
+    assert [f["timestamp_ms"] for f in client.list_embeddings(since_ms=5901)] == [6000, 6100, 6200]
+
+
+def test_fetch_and_match_parity_with_http(feed):
+    server, odc = feed
+    frames = odc.frames
+    qe = [{"label": "a", "embedding": frames[40]["embeddings"], "threshold": 0.3}]
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = [f for f in frames if f["timestamp_ms"] >= 3500]
+    with patch("beeutil.embeddings.requests.get", return_value=mock_resp):
+        expected, expected_cursor = fetch_and_match(3500, qe, 0.3)
+
+    client = FeedClient(server.socket_path, fallback=False)
+    matches, cursor = client.fetch_and_match(3500, qe, 0.3)
+    assert cursor == expected_cursor
+    assert client.cursor == cursor
+    assert [(m["image_name"], m["label"]) for m in matches] == [
+        (m["image_name"], m["label"]) for m in expected
+    ]
+    assert [m["score"] for m in matches] == pytest.approx([m["score"] for m in expected])
+
+
+def test_client_fallback_without_feed(tmp_path):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = _frames(2)
+    client = FeedClient(str(tmp_path / "missing.sock"))
+    with patch("beeutil.embeddings.requests.get", return_value=mock_resp):
+        assert client.list_embeddings() == _frames(2)
+
+    with pytest.raises(FeedError, match="No feed"):
+        FeedClient(str(tmp_path / "missing.sock"), fallback=False).list_embeddings()
+
+
+def _stale_socket(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.close()  # leaves the file behind with nothing listening
+    return path
+
+
+def test_client_fallback_with_stale_socket(tmp_path):
+    path = _stale_socket(str(tmp_path / "feed.sock"))
+    client = FeedClient(path)
+    assert not client.available()
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = _frames(2)
+    with patch("beeutil.embeddings.requests.get", return_value=mock_resp):
+        assert client.list_embeddings() == _frames(2)
+
+    with pytest.raises(FeedError, match="No feed"):
+        FeedClient(path, fallback=False).list_embeddings()
+
+
+def test_server_replaces_stale_socket(tmp_path):
+    path = _stale_socket(str(tmp_path / "feed.sock"))
+    server = FeedServer(socket_path=path, fetch=FakeOdc(_frames(3)))
+    server.start()
+    try:
+        client = FeedClient(path, fallback=False)
+        assert client.available()
+        assert len(client.list_embeddings()) == 3
+    finally:
+        server.close()
+
+
+def test_server_refuses_live_socket(feed):
+    server, _ = feed
+    with pytest.raises(FeedError, match="already serving"):
+        FeedServer(socket_path=server.socket_path, fetch=FakeOdc([]))
+    assert FeedClient(server.socket_path).available()
+
+
+def test_poll_logs_refresh_failures(tmp_path, caplog):
+    def failing(since_ms=None, until_ms=None):
+        raise FeedError("odc-api down")
+
+    server = FeedServer(
+        socket_path=str(tmp_path / "feed.sock"), refresh_interval_s=0.01, fetch=failing
+    )
+    server.start()
+    try:
+        with caplog.at_level(logging.WARNING, logger="beeutil.feed"):
+            deadline = time.monotonic() + 2
+            while not caplog.records and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        server.close()
+    assert "odc-api down" in caplog.records[0].getMessage()
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_fetch_and_match_precision(tmp_path, mode):
+    frames = _frames(40)
+    qe = [{"label": "a", "embedding": frames[5]["embeddings"]}]
+    server = FeedServer(
+        socket_path=str(tmp_path / "feed.sock"), fetch=FakeOdc(frames), precision=mode
+    )
+    server.start()
+    try:
+        client = FeedClient(server.socket_path, fallback=False)
+        assert client.embedding_arrays(precision=mode)["vectors"].dtype == precision.storage_dtype(
+            mode
+        )
+        expected, _ = client.fetch_and_match(0, qe, -1.0, precision="float64")
+        matches, cursor = client.fetch_and_match(0, qe, -1.0, precision=mode)
+    finally:
+        server.close()
+    assert cursor == frames[-1]["timestamp_ms"]
+    assert [m["image_name"] for m in matches] == [m["image_name"] for m in expected]
+    assert [m["score"] for m in matches] == pytest.approx(
+        [m["score"] for m in expected], abs=2 * precision.MAX_SCORE_ERROR[mode]
+    )
+
+
+def test_fetch_and_match_result_cache_and_batch(feed):
+    server, odc = feed
+    frames = odc.frames
+    qe = [{"label": "a", "embedding": frames[40]["embeddings"], "threshold": 0.3}]
+    client = FeedClient(server.socket_path, fallback=False)
+    expected, _ = client.fetch_and_match(3500, qe, 0.3)
+    results = ResultCache(":memory:")
+    cached, _ = client.fetch_and_match(3500, qe, 0.3, result_cache=results)
+    batch, cursor = client.fetch_and_match(3500, qe, 0.3, result_cache=results, as_batch=True)
+    results.close()
+    assert cursor == frames[-1]["timestamp_ms"]
+    assert results.hits == 25
+    assert cached == expected
+    assert batch.to_list() == expected
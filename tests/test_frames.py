@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.frames import FrameIndex, FrameIndexError, open_index, parse_frame_name
+
+SF_FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "sf")
+
+
+def _sf_names():
+    return sorted(n for n in os.listdir(SF_FIXTURE) if n.endswith(".jpg"))
+
+
+def _copy_frames(names, dest):
+    for name in names:
+        stem = name[:-4]
+        shutil.copy(os.path.join(SF_FIXTURE, name), dest)
+        shutil.copy(os.path.join(SF_FIXTURE, stem + ".json"), dest)
+
+
+def test_parse_frame_name():
+    assert parse_frame_name("1765835621771_37.79_-122.39.jpg") == (1765835621771, 37.79, -122.39)
+    with pytest.raises(ValueError, match="Not a frame name"):
+        parse_frame_name("calibration.json")
+
+
+def test_index_matches_sidecars():
+    index = FrameIndex.from_directory(SF_FIXTURE)
+    names = _sf_names()
+    assert len(index) == len(names)
+    assert np.all(np.diff(index.time) >= 0)
+    assert index.columns["time"].dtype == np.int64
+    assert index.columns["img_id"].dtype == np.int32
+
+    record = index.records([0])[0]
+    with open(os.path.join(SF_FIXTURE, record["name"][:-4] + ".json")) as f:
+        sidecar = json.load(f)
+    assert record["time"] == sidecar["time"]
+    assert record["gnss_time"] == sidecar["gnss_time"]
+    assert record["img_id"] == sidecar["img_id"]
+    assert record["lat"] == pytest.approx(sidecar["lat"])
+
+
+def test_without_sidecars_uses_filename():
+    index = FrameIndex.from_directory(SF_FIXTURE, read_sidecars=False)
+    assert np.array_equal(index.columns["gnss_time"], index.time)
+    assert np.all(index.columns["img_id"] == -1)
+
+
+def test_incremental_update(tmp_path):
+    names = _sf_names()
+    _copy_frames(names[10:20], tmp_path)
+    index = FrameIndex.from_directory(str(tmp_path))
+    assert len(index) == 10
+
+    assert index.update(str(tmp_path)) == 0
+
+    _copy_frames(names[:10] + names[20:25], tmp_path)
+    assert index.update(str(tmp_path)) == 15
+    assert index.names.tolist() == names[:25]
+
+
+def test_time_range_and_bbox():
+    index = FrameIndex.from_directory(SF_FIXTURE)
+    times = index.time.tolist()
+
+    window = index.time_range(times[5], times[9])
+    assert index.names[window].tolist() == _sf_names()[5:10]
+    assert len(index.records(index.time_range(times[-1] + 1))) == 0
+
+    lats, lons = index.lat, index.lon
+    box = (lats[3], lons[3], lats[3], lons[3])
+    lo_lat, hi_lat = min(lats[2], lats[4]), max(lats[2], lats[4])
+    lo_lon, hi_lon = min(lons[2], lons[4]), max(lons[2], lons[4])
+    assert 3 in index.bbox(*box).tolist()
+    assert index.bbox(lo_lat, lo_lon, hi_lat, hi_lon, since=times[3]).tolist() == [3, 4]
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = FrameIndex.from_directory(SF_FIXTURE)
+    path = str(tmp_path / "frames.npz")
+    index.save(path)
+    loaded = FrameIndex.load(path)
+    assert loaded.names.tolist() == index.names.tolist()
+    for key, col in index.columns.items():
+        assert np.array_equal(loaded.columns[key], col)
+        assert loaded.columns[key].dtype == col.dtype
+
+
+def test_load_rejects_bad_file(tmp_path):
+    path = tmp_path / "bad.npz"
+    path.write_bytes(b"not an npz")
+    with pytest.raises(FrameIndexError):
+        FrameIndex.load(str(path))
+
+
+def test_open_index_persists_new_frames(tmp_path):
+    names = _sf_names()
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    _copy_frames(names[:5], cache)
+    path = str(tmp_path / "frames.npz")
+
+    assert len(open_index(str(cache), path)) == 5
+    _copy_frames(names[5:8], cache)
+    assert len(open_index(str(cache), path)) == 8
+    assert len(FrameIndex.load(path)) == 8
+
+
+def test_update_drops_rotated_out_frames(tmp_path):
+    names = _sf_names()
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    _copy_frames(names[:10], cache)
+    path = str(tmp_path / "frames.npz")
+    index = open_index(str(cache), path)
+
+    for name in names[:4]:
+        os.remove(cache / name)
+        os.remove(cache / (name[:-4] + ".json"))
+    _copy_frames(names[10:12], cache)
+    assert index.update(str(cache)) == 6
+    assert index.names.tolist() == names[4:12]
+    assert len(index.time) == 8
+    assert index.records(index.time_range())[0]["name"] == names[4]
+
+    # The persisted index forgets them too
+    os.remove(cache / names[4])
+    assert FrameIndex.load(path).names.tolist() == names[:10]
+    assert open_index(str(cache), path).names.tolist() == names[5:12]
+    assert FrameIndex.load(path).names.tolist() == names[5:12]
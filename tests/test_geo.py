@@ -0,0 +1,184 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.embeddings import fetch_and_match
+from beeutil.geo import Geofence, GeofenceError, bearing_deg, haversine_m, points_in_polygon
+
+# Unit square with a square hole in the middle
+SQUARE = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+HOLE = [(0.4, 0.4), (0.4, 0.6), (0.6, 0.6), (0.6, 0.4)]
+TRIANGLE = [(2.0, 2.0), (2.0, 3.0), (3.0, 2.0)]
+
+
+def _scalar_pip(lat, lon, rings):
+    inside = False
+    for ring in rings:
+        for i in range(len(ring)):
+            (ya, xa), (yb, xb) = ring[i], ring[(i + 1) % len(ring)]
+            if (ya > lat) != (yb > lat) and lon < xa + (lat - ya) * (xb - xa) / (yb - ya):
+                inside = not inside
+    return inside
+
+
+def test_haversine_known_distance():
+    # One degree of latitude is ~111.2 km
+    assert haversine_m(0.0, 0.0, 1.0, 0.0) == pytest.approx(111195, rel=1e-3)
+    assert haversine_m(37.0, -122.0, 37.0, -122.0) == 0.0
+
+
+def test_haversine_broadcasts():
+    lats = np.array([0.0, 1.0, 2.0])
+    distances = haversine_m(lats[:-1], 0.0, lats[1:], 0.0)
+    assert distances.shape == (2,)
+    assert distances[0] == pytest.approx(distances[1])
+
+
+def test_bearing_cardinal_directions():
+    assert bearing_deg(0, 0, 1, 0) == pytest.approx(0.0)
+    assert bearing_deg(0, 0, 0, 1) == pytest.approx(90.0)
+    assert bearing_deg(0, 0, -1, 0) == pytest.approx(180.0)
+    assert bearing_deg(0, 0, 0, -1) == pytest.approx(270.0)
+
+
+def test_points_in_polygon_matches_scalar():
+    rng = np.random.RandomState(0)
+    lats = rng.uniform(-0.5, 1.5, 2000)
+    lons = rng.uniform(-0.5, 1.5, 2000)
+    rings = [SQUARE, HOLE]
+    expected = [_scalar_pip(lat, lon, rings) for lat, lon in zip(lats, lons)]
+    assert points_in_polygon(lats, lons, rings).tolist() == expected
+
+
+def test_geofence_polygons_and_bboxes():
+    fence = Geofence(polygons=[[SQUARE, HOLE], [TRIANGLE]], bboxes=[(10, 10, 11, 11)])
+    assert fence.contains_point(0.2, 0.2)
+    assert not fence.contains_point(0.5, 0.5)  # in the hole
+    assert fence.contains_point(2.2, 2.2)
+    assert not fence.contains_point(2.9, 2.9)  # outside the triangle, inside its bounds
+    assert fence.contains_point(10.5, 10.5)
+    assert not fence.contains_point(5.0, 5.0)
+    assert not fence.contains_point(-50.0, 0.0)
+
+
+def test_geofence_grid_matches_brute_force():
+    fence = Geofence(
+        polygons=[[SQUARE, HOLE], [TRIANGLE]], bboxes=[(1.5, -1, 1.8, 0.5)], grid_size=16
+    )
+    rng = np.random.RandomState(1)
+    lats = rng.uniform(-1, 3.5, 5000)
+    lons = rng.uniform(-1.5, 3.5, 5000)
+    expected = (
+        points_in_polygon(lats, lons, [SQUARE, HOLE])
+        | points_in_polygon(lats, lons, [TRIANGLE])
+        | ((lats >= 1.5) & (lats <= 1.8) & (lons >= -1) & (lons <= 0.5))
+    )
+    assert fence.contains(lats, lons).tolist() == expected.tolist()
+
+
+def test_geofence_interior_cells_skip_exact_test():
+    fence = Geofence(polygons=[[SQUARE, HOLE]], grid_size=32)
+    rng = np.random.RandomState(2)
+    lats = rng.uniform(-0.2, 1.2, 5000)
+    lons = rng.uniform(-0.2, 1.2, 5000)
+    expected = points_in_polygon(lats, lons, [SQUARE, HOLE])
+    with patch("beeutil.geo.points_in_polygon", side_effect=points_in_polygon) as exact:
+        assert fence.contains(lats, lons).tolist() == expected.tolist()
+    tested = sum(len(call.args[0]) for call in exact.call_args_list)
+    assert tested < len(lats) / 2
+
+
+def test_geofence_interior_with_long_diagonal_edges():
+    diamond = [(0.0, 1.0), (1.0, 2.0), (2.0, 1.0), (1.0, 0.0)]
+    fence = Geofence(polygons=[[diamond]], grid_size=64)
+    rng = np.random.RandomState(3)
+    lats = rng.uniform(0, 2, 20000)
+    lons = rng.uniform(0, 2, 20000)
+    expected = points_in_polygon(lats, lons, [diamond])
+    assert fence.contains(lats, lons).tolist() == expected.tolist()
+
+
+def test_geofence_nan_and_empty():
+    fence = Geofence(bboxes=[(0, 0, 1, 1)])
+    assert fence.contains([np.nan, 0.5], [0.5, np.nan]).tolist() == [False, False]
+    assert fence.contains([], []).tolist() == []
+    assert not Geofence().contains_point(0.5, 0.5)
+
+
+def test_geofence_from_geojson():
+    fence = Geofence.from_geojson(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [
+                            [[-122.5, 37.7], [-122.3, 37.7], [-122.3, 37.8], [-122.5, 37.7]]
+                        ],
+                    },
+                }
+            ],
+        }
+    )
+    assert fence.contains_point(37.72, -122.32)
+    assert not fence.contains_point(37.79, -122.49)
+    with pytest.raises(GeofenceError, match="Unsupported"):
+        Geofence.from_geojson({"type": "Point", "coordinates": [0, 0]})
+
+
+def test_invalid_shapes():
+    with pytest.raises(GeofenceError, match="at least 3"):
+        Geofence(polygons=[[[(0, 0), (1, 1)]]])
+    with pytest.raises(GeofenceError, match="Invalid bbox"):
+        Geofence(bboxes=[(1, 0, 0, 1)])
+
+
+def test_filter_names_keeps_unparseable():
+    fence = Geofence(bboxes=[(37.0, -123.0, 38.0, -122.0)])
+    names = [
+        "1000_37.5_-122.5.jpg",
+        "1100_40.0_-122.5.jpg",
+        "readme.txt",
+        "1200_37.6_-122.4.jpg",
+    ]
+    assert fence.filter_names(names) == [
+        "1000_37.5_-122.5.jpg",
+        "readme.txt",
+        "1200_37.6_-122.4.jpg",
+    ]
+
+
+@patch("beeutil.embeddings.requests.get")
+def test_fetch_and_match_geofence_keeps_cursor(mock_get):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = [
+        {
+            "timestamp_ms": 1000,
+            "lat": 37.5,
+            "lon": -122.5,
+            "image_name": "a.jpg",
+            "embeddings": [1, 0],
+        },
+        {
+            "timestamp_ms": 2000,
+            "lat": 40.0,
+            "lon": -122.5,
+            "image_name": "b.jpg",
+            "embeddings": [1, 0],
+        },
+    ]
+    mock_get.return_value = mock_resp
+    fence = Geofence(bboxes=[(37.0, -123.0, 38.0, -122.0)])
+
+    matches, cursor = fetch_and_match(0, [{"label": "x", "embedding": [1, 0]}], 0.5, geofence=fence)
+
+    assert [m["image_name"] for m in matches] == ["a.jpg"]
+    assert cursor == 2000
@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.governor import (
+    Governor,
+    read_loadavg,
+    read_max_temp_c,
+    read_rss_kb,
+)
+
+
+def _fake_root(tmp_path, load1=0.1, rss_kb=50000, temps_mc=(40000,)):
+    (tmp_path / "proc" / "self").mkdir(parents=True, exist_ok=True)
+    (tmp_path / "proc" / "loadavg").write_text(f"{load1} 0.50 0.40 1/123 4567\n")
+    (tmp_path / "proc" / "self" / "status").write_text(
+        f"Name:\tpython3\nVmPeak:\t  900000 kB\nVmRSS:\t  {rss_kb} kB\nThreads:\t4\n"
+    )
+    for i, temp in enumerate(temps_mc):
+        zone = tmp_path / "sys" / "class" / "thermal" / f"thermal_zone{i}"
+        zone.mkdir(parents=True, exist_ok=True)
+        (zone / "temp").write_text(f"{temp}\n")
+    return str(tmp_path)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_readers_parse_fake_root(tmp_path):
+    root = _fake_root(tmp_path, load1=1.75, rss_kb=12345, temps_mc=(41000, 68500))
+    assert read_loadavg(root) == pytest.approx(1.75)
+    assert read_rss_kb(root) == 12345
+    assert read_max_temp_c(root) == pytest.approx(68.5)
+
+
+def test_readers_missing_files(tmp_path):
+    root = str(tmp_path)
+    assert read_loadavg(root) == 0.0
+    assert read_rss_kb(root) is None
+    assert read_max_temp_c(root) is None
+
+
+def test_shrinks_under_load_and_recovers(tmp_path):
+    root = _fake_root(tmp_path, load1=4.0)
+    gov = Governor(root=root, cpu_count=4, sample_interval_s=0)
+
+    assert gov.update() == pytest.approx(0.5)
+    assert gov.update() == pytest.approx(0.25)
+    assert gov.batch_size(500) == 125
+    assert gov.workers(4) == 1
+    assert gov.poll_interval(5) == pytest.approx(20)
+
+    for _ in range(10):
+        gov.update()
+    assert gov.scale == pytest.approx(gov.min_scale)
+
+    _fake_root(tmp_path, load1=0.2)
+    gov.update()
+    assert gov.scale == pytest.approx(gov.min_scale + 0.125)
+    for _ in range(10):
+        gov.update()
+    assert gov.scale == 1.0
+
+
+def test_holds_between_watermarks(tmp_path):
+    root = _fake_root(tmp_path, load1=4.0)
+    gov = Governor(root=root, cpu_count=4, sample_interval_s=0)
+    gov.update()
+
+    _fake_root(tmp_path, load1=2.8)  # 0.7 per core: neither high nor low
+    assert gov.update() == pytest.approx(0.5)
+
+
+def test_thermal_pressure(tmp_path):
+    root = _fake_root(tmp_path, load1=0.1, temps_mc=(80000,))
+    gov = Governor(root=root, cpu_count=4, sample_interval_s=0)
+    assert gov.update() == pytest.approx(0.5)
+
+
+def test_rss_pressure_only_with_ceiling(tmp_path):
+    root = _fake_root(tmp_path, rss_kb=300000)
+    assert Governor(root=root, cpu_count=4, sample_interval_s=0).update() == 1.0
+    gov = Governor(root=root, cpu_count=4, rss_high_kb=200000, sample_interval_s=0)
+    assert gov.update() == pytest.approx(0.5)
+
+
+def test_update_is_rate_limited(tmp_path):
+    root = _fake_root(tmp_path, load1=4.0)
+    clock = FakeClock()
+    gov = Governor(root=root, cpu_count=4, sample_interval_s=5, clock=clock)
+
+    assert gov.update() == pytest.approx(0.5)
+    clock.now = 1.0
+    assert gov.update() == pytest.approx(0.5)
+    clock.now = 6.0
+    assert gov.update() == pytest.approx(0.25)
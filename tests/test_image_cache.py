@@ -0,0 +1,97 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import beeutil.image_cache as image_cache
+from beeutil.image_cache import _LocalCacheIndex, list_contents
+
+
+def _touch(directory, time_ms, ext=".jpg"):
+    name = f"{time_ms}_37.79_-122.39{ext}"
+    with open(os.path.join(directory, name), "w") as f:
+        f.write("x")
+    return name
+
+
+@pytest.fixture
+def local_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(image_cache, "CACHE_LIST_MODE", "auto")
+    monkeypatch.setattr(image_cache, "_local_index", None)
+    yield tmp_path
+    if image_cache._local_index is not None:
+        image_cache._local_index.close()
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_local_index_since_until(tmp_path, use_inotify):
+    names = [_touch(tmp_path, t) for t in (3000, 1000, 2000)]
+    _touch(tmp_path, 1500, ext=".json")
+    index = _LocalCacheIndex(str(tmp_path), use_inotify=use_inotify)
+    try:
+        assert index.list() == sorted(names)
+        assert index.list(since=1000) == sorted(names)[1:]
+        assert index.list(since="1000", until="2000") == [sorted(names)[1]]
+        assert index.list(until=999) == []
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_local_index_picks_up_changes(tmp_path, use_inotify):
+    first = _touch(tmp_path, 1000)
+    index = _LocalCacheIndex(str(tmp_path), use_inotify=use_inotify)
+    try:
+        assert index.list() == [first]
+
+        later = _touch(tmp_path, 3000)
+        earlier = _touch(tmp_path, 500)
+        assert index.list() == [earlier, first, later]
+
+        os.remove(os.path.join(tmp_path, first))
+        assert index.list() == [earlier, later]
+    finally:
+        index.close()
+
+
+def test_mtime_mode_skips_rescan_when_unchanged(tmp_path, monkeypatch):
+    _touch(tmp_path, 1000)
+    index = _LocalCacheIndex(str(tmp_path), use_inotify=False)
+    monkeypatch.setattr(image_cache, "MTIME_SETTLE_S", -1.0)
+    with patch.object(index, "_rescan") as rescan:
+        index.list()
+        rescan.assert_not_called()
+
+
+def test_list_contents_uses_local_cache_dir(local_cache):
+    name = _touch(local_cache, 1000)
+    with patch("beeutil.image_cache.requests.get") as mock_get:
+        assert list_contents() == [name]
+        mock_get.assert_not_called()
+
+
+def test_list_contents_falls_back_to_http(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path / "missing"))
+    monkeypatch.setattr(image_cache, "CACHE_LIST_MODE", "auto")
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = ["1000_37.79_-122.39.jpg"]
+
+    with patch("beeutil.image_cache.requests.get", return_value=mock_resp) as mock_get:
+        assert list_contents(since=5, until=10) == ["1000_37.79_-122.39.jpg"]
+        assert mock_get.call_args.args[0].endswith("/cache/list?since=5&until=10")
+
+
+def test_http_mode_ignores_local_dir(local_cache, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_LIST_MODE", "http")
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = []
+
+    with patch("beeutil.image_cache.requests.get", return_value=mock_resp) as mock_get:
+        assert list_contents() == []
+        mock_get.assert_called_once()
@@ -0,0 +1,222 @@
+import os
+import sqlite3
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import beeutil.localdb as localdb
+from beeutil import precision
+from beeutil.embeddings import EmbeddingsError, fetch_and_match, list_embeddings
+from beeutil.localdb import LocalDBError
+from beeutil.recordings import RecordingsError, get_videos_by_timerange
+from beeutil.records import EmbeddingRecord, VideoRecord
+
+DIM = 8
+
+
+def _frames(n=30, seed=0):
+    rng = np.random.RandomState(seed)
+    vectors = rng.randn(n, DIM).astype(np.float32)
+    return [
+        {
+            "timestamp_ms": 1000 + 100 * i,
+            "image_name": f"{1000 + 100 * i}_37.{i:02d}_-122.00.jpg",
+            "lat": 37.0 + i / 100,
+            "lon": -122.0,
+            "embeddings": vectors[i].tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+def _videos():
+    return [
+        {"filepath": f"/data/recording/video/{t}.mp4", "timestamp_ms": t}
+        for t in range(0, 5000, 1000)
+    ]
+
+
+@pytest.fixture
+def fixture_db(tmp_path):
+    """WAL-mode DB with a writer connection held open, as on the device."""
+    path = str(tmp_path / "recording.db")
+    writer = sqlite3.connect(path)
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute(
+        "CREATE TABLE embeddings (timestamp_ms INTEGER, image_name TEXT, lat REAL, lon REAL, "
+        "embedding BLOB)"
+    )
+    writer.execute("CREATE INDEX embeddings_ts ON embeddings (timestamp_ms)")
+    writer.execute("CREATE TABLE videos (filepath TEXT, timestamp_ms INTEGER)")
+    writer.executemany(
+        "INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                f["timestamp_ms"],
+                f["image_name"],
+                f["lat"],
+                f["lon"],
+                np.array(f["embeddings"], dtype="<f4").tobytes(),
+            )
+            for f in reversed(_frames())
+        ],
+    )
+    writer.executemany(
+        "INSERT INTO videos VALUES (?, ?)", [(v["filepath"], v["timestamp_ms"]) for v in _videos()]
+    )
+    writer.commit()
+    yield path
+    localdb.close_all()
+    writer.close()
+
+
+def _http_response(payload):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = payload
+    return mock_resp
+
+
+def _http_embeddings(since_ms=None, until_ms=None):
+    items = [
+        f
+        for f in _frames()
+        if (since_ms is None or f["timestamp_ms"] >= since_ms)
+        and (until_ms is None or f["timestamp_ms"] <= until_ms)
+    ]
+    return _http_response(items)
+
+
+@pytest.mark.parametrize(
+    ("since", "until"), [(None, None), (1500, None), (1500, 2200), (9999, None)]
+)
+def test_list_embeddings_parity(fixture_db, since, until):
+    with patch("beeutil.embeddings.requests.get", return_value=_http_embeddings(since, until)):
+        expected = list_embeddings(since_ms=since, until_ms=until)
+    assert localdb.list_embeddings(since, until, db_path=fixture_db) == expected
+
+
+def test_fetch_and_match_parity(fixture_db):
+    frames = _frames()
+    qe = [
+        {"label": "a", "embedding": frames[3]["embeddings"], "threshold": 0.5},
+        {"label": "b", "embedding": frames[17]["embeddings"]},
+    ]
+    with patch("beeutil.embeddings.requests.get", return_value=_http_embeddings(1200)):
+        expected, expected_cursor = fetch_and_match(1200, qe, default_threshold=0.4)
+
+    matches, cursor = localdb.fetch_and_match(1200, qe, default_threshold=0.4, db_path=fixture_db)
+    assert cursor == expected_cursor
+    assert [(m["image_name"], m["label"]) for m in matches] == [
+        (m["image_name"], m["label"]) for m in expected
+    ]
+    assert [m["score"] for m in matches] == pytest.approx([m["score"] for m in expected])
+
+
+def test_fetch_and_match_as_batch(fixture_db):
+    frames = _frames()
+    qe = [{"label": "a", "embedding": frames[3]["embeddings"]}]
+    expected, _ = localdb.fetch_and_match(0, qe, -0.2, db_path=fixture_db)
+    batch, cursor = localdb.fetch_and_match(0, qe, -0.2, db_path=fixture_db, as_batch=True)
+    assert cursor == frames[-1]["timestamp_ms"]
+    assert len(batch) == len(expected) > 0
+    assert batch.to_list() == expected
+
+
+def test_fetch_and_match_no_rows_keeps_cursor(fixture_db):
+    assert localdb.fetch_and_match(10**9, [], 0.5, db_path=fixture_db) == ([], 10**9)
+
+
+def test_videos_parity(fixture_db):
+    with patch(
+        "beeutil.recordings.requests.get",
+        return_value=_http_response({"videos": _videos()[1:4]}),
+    ):
+        expected = get_videos_by_timerange(1000, 3000)
+    assert localdb.get_videos_by_timerange(1000, 3000, db_path=fixture_db) == expected
+
+
+def test_records_parity(fixture_db):
+    frames = localdb.list_embeddings(db_path=fixture_db, as_records=True)
+    assert all(isinstance(f, EmbeddingRecord) for f in frames)
+    assert frames == localdb.list_embeddings(db_path=fixture_db)
+    videos = localdb.get_videos_by_timerange(1000, 3000, db_path=fixture_db, as_records=True)
+    assert all(isinstance(v, VideoRecord) for v in videos)
+    assert videos == localdb.get_videos_by_timerange(1000, 3000, db_path=fixture_db)
+
+
+def test_embedding_arrays_dtypes(fixture_db):
+    arrays = localdb.embedding_arrays(db_path=fixture_db)
+    assert arrays["timestamp_ms"].dtype == np.int64
+    assert arrays["vectors"].dtype == np.float32
+    assert arrays["vectors"].shape == (30, DIM)
+    assert np.all(np.diff(arrays["timestamp_ms"]) > 0)
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_fetch_and_match_precision(fixture_db, mode):
+    frames = _frames()
+    qe = [{"label": "a", "embedding": frames[3]["embeddings"]}]
+    stored = localdb.embedding_arrays(db_path=fixture_db, precision=mode)["vectors"]
+    assert stored.dtype == precision.storage_dtype(mode)
+
+    expected, _ = localdb.fetch_and_match(0, qe, -1.0, db_path=fixture_db)
+    matches, _ = localdb.fetch_and_match(0, qe, -1.0, db_path=fixture_db, precision=mode)
+    assert [m["image_name"] for m in matches] == [m["image_name"] for m in expected]
+    assert [m["score"] for m in matches] == pytest.approx(
+        [m["score"] for m in expected], abs=precision.MAX_SCORE_ERROR[mode]
+    )
+
+
+def test_connection_is_read_only(fixture_db):
+    conn = localdb.connect(fixture_db)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM embeddings")
+    finally:
+        conn.close()
+
+
+def test_find_db_by_table(fixture_db, tmp_path):
+    sqlite3.connect(str(tmp_path / "other.db")).close()
+    assert localdb.find_db("videos", str(tmp_path)) == fixture_db
+    with pytest.raises(LocalDBError):
+        localdb.find_db("missing", str(tmp_path))
+
+
+def test_errors_are_drop_in_compatible(tmp_path):
+    with pytest.raises(EmbeddingsError):
+        localdb.list_embeddings(db_path=str(tmp_path / "missing.db"))
+    with pytest.raises(RecordingsError):
+        localdb.get_videos_by_timerange(0, 1, db_path=str(tmp_path / "missing.db"))
+
+
+def test_fetch_and_match_geofence(fixture_db):
+    from beeutil.geo import Geofence
+
+    frames = _frames()
+    qe = [{"label": "a", "embedding": frames[3]["embeddings"]}]
+    fence = Geofence(bboxes=[(37.10, -123.0, 38.0, -121.0)])
+    matches, cursor = localdb.fetch_and_match(
+        0, qe, default_threshold=-1.0, db_path=fixture_db, geofence=fence
+    )
+    assert cursor == frames[-1]["timestamp_ms"]
+    assert {m["image_name"] for m in matches} == {f["image_name"] for f in frames[10:]}
+
+
+def test_fetch_and_match_dedup_matches_http(fixture_db):
+    from beeutil.embeddings import NearDuplicateFilter
+
+    frames = _frames()
+    qe = [{"label": "a", "embedding": frames[3]["embeddings"]}]
+    with patch("beeutil.embeddings.requests.get", return_value=_http_embeddings(0)):
+        expected, _ = fetch_and_match(0, qe, -1.0, dedup=NearDuplicateFilter(threshold=0.3))
+    matches, _ = localdb.fetch_and_match(
+        0, qe, -1.0, db_path=fixture_db, dedup=NearDuplicateFilter(threshold=0.3)
+    )
+    assert [m["image_name"] for m in matches] == [m["image_name"] for m in expected]
+    assert len(matches) < len(frames)
@@ -0,0 +1,236 @@
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil import outbox as outbox_module
+from beeutil import resilience
+from beeutil.outbox import Outbox
+
+
+class Sink(ThreadingHTTPServer):
+    """Local HTTP endpoint recording gzipped JSON batches."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.batches = []
+        self.status = 200
+        self.max_items = None  # larger batches get 413
+        self.poison = set()  # batches holding these image names get poison_status
+        self.poison_status = 400
+        self.attempts = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ingest"
+
+    @property
+    def items(self):
+        return [entry for batch in self.batches for entry in batch["items"]]
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        assert self.headers["Content-Encoding"] == "gzip"
+        batch = json.loads(gzip.decompress(body))
+        names = {entry["item"]["image_name"] for entry in batch["items"]}
+        with self.server.lock:
+            self.server.attempts.append(len(batch["items"]))
+            status = self.server.status
+            if self.server.max_items is not None and len(names) > self.server.max_items:
+                status = 413
+            elif names & self.server.poison:
+                status = self.server.poison_status
+            if status == 200:
+                self.server.batches.append(batch)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def sink():
+    server = Sink()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+    thread.start()
+    resilience.reset()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(outbox_module, "BACKOFF_BASE_S", 0.0)
+    monkeypatch.setattr(outbox_module, "BACKOFF_CAP_S", 0.0)
+
+
+def _match(i):
+    return {
+        "label": "sign",
+        "score": 0.9,
+        "timestamp_ms": 1000 + i,
+        "lat": 37.0,
+        "lon": -122.0,
+        "image_name": f"{1000 + i}.jpg",
+    }
+
+
+def test_flushes_full_batches_in_order(tmp_path, sink):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=10, max_age_s=3600)
+    box.put_many([_match(i) for i in range(25)])
+    assert box.flush() == 20
+    assert [len(b["items"]) for b in sink.batches] == [10, 10]
+    assert box.backlog == 5
+    assert box.flush() == 0  # partial batch is not due yet
+    assert box.flush(force=True) == 5
+    assert [e["item"]["timestamp_ms"] for e in sink.items] == [1000 + i for i in range(25)]
+    assert {e["kind"] for e in sink.items} == {"match"}
+    box.close()
+
+
+def test_partial_batch_due_by_age_or_size(tmp_path, sink):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=100, max_age_s=0.05)
+    box.put(_match(0))
+    assert not box.due()
+    time.sleep(0.06)
+    assert box.due()
+
+    sized = Outbox(str(tmp_path / "sized.db"), sink.url, batch_size=100, max_bytes=300)
+    sized.put_many([_match(i) for i in range(5)])
+    assert sized.due()
+    sized.flush()
+    assert all(len(json.dumps([e["item"] for e in b["items"]])) <= 400 for b in sink.batches)
+    box.close()
+    sized.close()
+
+
+def test_keeps_items_until_connectivity_returns(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=5)
+    box.put_many([_match(i) for i in range(5)], kind="event")
+    sink.status = 503
+    assert box.flush() == 0
+    assert box.backlog == 5
+    assert box.stats()["failures"] == 1
+
+    sink.status = 200
+    assert box.flush() == 5
+    assert box.backlog == 0
+    assert box.stats()["sent"] == 5
+    assert sink.items[0]["kind"] == "event"
+    box.close()
+
+
+def test_unreachable_backend_backs_off(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), "http://127.0.0.1:9/ingest", batch_size=1, timeout=1)
+    box.put(_match(0))
+    assert box.flush() == 0
+    assert box.flush() == 0  # within backoff: no attempt
+    assert box.stats()["failures"] == 1
+    assert box.backlog == 1
+    box.close()
+
+
+def test_rejected_batches_are_dropped(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=2)
+    box.put_many([_match(i) for i in range(2)])
+    sink.status = 400
+    assert box.flush() == 0
+    assert box.backlog == 0
+    assert box.stats()["rejected"] == 2
+    box.close()
+
+
+def test_oversized_batches_are_split(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=8)
+    box.put_many([_match(i) for i in range(16)])
+    sink.max_items = 3
+    assert box.flush() == 16
+    assert [entry["item"]["timestamp_ms"] for entry in sink.items] == [1000 + i for i in range(16)]
+    assert box.stats()["rejected"] == 0
+    # 8 -> 4 -> 2, and the smaller size sticks for the rest of the queue
+    assert sink.attempts[:3] == [8, 4, 2]
+    assert max(sink.attempts[3:]) == 2
+    box.close()
+
+
+def test_only_the_refused_item_is_dropped(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=8)
+    box.put_many([_match(i) for i in range(16)])
+    sink.poison = {_match(5)["image_name"]}
+    assert box.flush() == 15
+    assert box.backlog == 0
+    assert box.stats()["rejected"] == 1
+    delivered = [entry["item"]["timestamp_ms"] for entry in sink.items]
+    assert delivered == [1000 + i for i in range(16) if i != 5]
+    # Full-size batches again once the refused item is gone
+    assert sink.attempts[-1] == 8
+    box.close()
+
+
+def test_single_oversized_item_is_dropped(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=4)
+    box.put_many([_match(i) for i in range(4)])
+    sink.max_items = 0
+    assert box.flush(force=True) == 0
+    assert box.backlog == 0
+    assert box.stats()["rejected"] == 4
+    box.close()
+
+
+def test_full_batches_resume_after_oversized_item(tmp_path, sink, no_backoff):
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=8)
+    box.put_many([_match(i) for i in range(8)])
+    sink.poison = {_match(3)["image_name"]}
+    sink.poison_status = 413
+    assert box.flush() == 7
+    assert sink.attempts == [8, 4, 2, 2, 1, 1, 4]
+    assert box.stats()["rejected"] == 1
+
+    sink.attempts.clear()
+    box.put_many([_match(i) for i in range(100, 108)])
+    assert box.flush() == 8
+    assert sink.attempts == [8]
+    box.close()
+
+
+def test_backlog_survives_restart(tmp_path, sink):
+    path = str(tmp_path / "outbox.db")
+    first = Outbox(path, sink.url, batch_size=10)
+    first.put_many([_match(i) for i in range(3)])
+    first.close()
+
+    second = Outbox(path, sink.url, batch_size=10)
+    stats = second.stats()
+    assert stats["backlog"] == 3
+    assert stats["backlog_bytes"] > 0
+    assert stats["oldest_age_s"] >= 0
+    second.close(flush=True)
+    assert len(sink.items) == 3
+
+
+def test_background_thread_flushes(tmp_path, sink, monkeypatch):
+    monkeypatch.setattr(outbox_module, "POLL_INTERVAL_S", 0.02)
+    box = Outbox(str(tmp_path / "outbox.db"), sink.url, batch_size=4)
+    box.start()
+    box.put_many([_match(i) for i in range(8)])
+    deadline = time.time() + 5
+    while len(sink.items) < 8 and time.time() < deadline:
+        time.sleep(0.01)
+    box.close()
+    assert len(sink.items) == 8
@@ -0,0 +1,155 @@
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import beeutil.embeddings as embeddings
+from beeutil import precision
+from beeutil.embeddings import QuerySet, find_matches_arrays, find_matches_batch
+from beeutil.precision import MAX_SCORE_ERROR, PRECISIONS, PrecisionError
+
+
+def _unit_rows(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _dataset(dim, n_frames=1500, n_queries=12, seed=0):
+    """Random frames plus a block of frames close to the queries, so scores span [-1, 1]."""
+    rng = np.random.RandomState(seed)
+    queries = _unit_rows(rng.randn(n_queries, dim))
+    frames = rng.randn(n_frames, dim)
+    near = rng.randint(0, n_queries, n_frames // 3)
+    frames[: len(near)] = queries[near] + rng.randn(len(near), dim) * rng.uniform(
+        0.05, 1.0, (len(near), 1)
+    )
+    return _unit_rows(frames), queries
+
+
+@pytest.mark.parametrize("dim", [16, 128, 512, 1024])
+@pytest.mark.parametrize("mode", PRECISIONS)
+def test_score_error_within_bound(mode, dim):
+    frames, queries = _dataset(dim)
+    reference = frames @ queries.T
+    scores = precision.dot(precision.encode(frames, mode), precision.encode(queries, mode))
+    assert np.abs(scores - reference).max() <= MAX_SCORE_ERROR[mode]
+
+
+def test_storage_sizes():
+    frames, _ = _dataset(256, n_frames=100)
+    sizes = {mode: precision.encode(frames, mode)[0].nbytes for mode in PRECISIONS}
+    assert sizes["float32"] == sizes["float64"] // 2
+    assert sizes["float16"] == sizes["float64"] // 4
+    assert sizes["int8"] == sizes["float64"] // 8
+
+
+def _frame_items(matrix):
+    return [
+        {
+            "embeddings": row.tolist(),
+            "timestamp_ms": 1000 + i,
+            "lat": 37.0,
+            "lon": -122.0,
+            "image_name": f"{i}.jpg",
+        }
+        for i, row in enumerate(matrix)
+    ]
+
+
+@pytest.mark.parametrize("mode", ["float32", "float16", "int8"])
+def test_threshold_decisions_only_flip_inside_error_band(mode):
+    frames, queries = _dataset(256, n_frames=600)
+    qe = [
+        {"label": f"q{i}", "embedding": q.tolist(), "threshold": t}
+        for i, (q, t) in enumerate(zip(queries, np.linspace(0.2, 0.9, len(queries))))
+    ]
+    reference = frames @ queries.T
+    thresholds = np.array([q["threshold"] for q in qe])
+
+    expected = {
+        (m["image_name"], m["label"]) for m in find_matches_batch(_frame_items(frames), qe, 0.5)
+    }
+    got = find_matches_batch(_frame_items(frames), qe, 0.5, precision=mode)
+    flipped = expected ^ {(m["image_name"], m["label"]) for m in got}
+    for name, label in flipped:
+        row, col = int(name.split(".")[0]), int(label[1:])
+        assert abs(reference[row, col] - thresholds[col]) <= MAX_SCORE_ERROR[mode]
+    assert len(expected) > 10
+
+
+@pytest.mark.parametrize("mode", PRECISIONS)
+def test_arrays_path_and_zero_vectors(mode):
+    frames, queries = _dataset(64, n_frames=50)
+    frames[7] = 0.0
+    qe = [{"label": "q", "embedding": queries[0].tolist()}]
+    matches = find_matches_arrays(
+        frames.astype(np.float32),
+        np.arange(50, dtype=np.int64),
+        np.zeros(50),
+        np.zeros(50),
+        [f"{i}.jpg" for i in range(50)],
+        qe,
+        -1.0,
+        precision=mode,
+    )
+    names = {m["image_name"] for m in matches}
+    assert "7.jpg" not in names
+    assert len(names) == 49
+
+
+def test_int8_sharded_equals_in_process(monkeypatch):
+    monkeypatch.setattr(embeddings, "PARALLEL_MIN_FRAMES", 1)
+    frames, queries = _dataset(32, n_frames=200)
+    qe = [{"label": f"q{i}", "embedding": q.tolist()} for i, q in enumerate(queries[:3])]
+    items = _frame_items(frames)
+    in_process = find_matches_batch(items, qe, 0.3, precision="int8")
+    sharded = find_matches_batch(items, qe, 0.3, processes=2, precision="int8")
+    assert sharded == in_process
+
+
+def test_module_default_and_unknown_mode(monkeypatch):
+    monkeypatch.setattr(embeddings, "PRECISION", "bfloat16")
+    with pytest.raises(PrecisionError, match="Unknown precision"):
+        find_matches_batch(_frame_items(np.eye(2)), [{"label": "a", "embedding": [1, 0]}], 0.5)
+
+
+@pytest.mark.parametrize("dim", [16, 512, 1024])
+@pytest.mark.parametrize("mode", PRECISIONS)
+def test_storage_dtype_scores_within_bound(mode, dim):
+    frames, queries = _dataset(dim, n_frames=500)
+    reference = frames @ queries.T
+    raw = frames * np.random.RandomState(1).uniform(0.5, 20, (len(frames), 1))
+    qe = [{"label": f"q{i}", "embedding": q.tolist()} for i, q in enumerate(queries)]
+    matches = find_matches_arrays(
+        raw.astype(precision.storage_dtype(mode)),
+        np.arange(len(frames), dtype=np.int64),
+        np.zeros(len(frames)),
+        np.zeros(len(frames)),
+        [str(i) for i in range(len(frames))],
+        qe,
+        -2.0,
+        precision=mode,
+    )
+    assert len(matches) == reference.size
+    for m in matches:
+        expected = reference[int(m["image_name"]), int(m["label"][1:])]
+        assert abs(m["score"] - expected) <= MAX_SCORE_ERROR[mode]
+
+
+def test_query_set_encodes_once_per_change():
+    frames, queries = _dataset(32, n_frames=40)
+    qs = QuerySet([{"label": f"q{i}", "embedding": q.tolist()} for i, q in enumerate(queries)])
+    items = _frame_items(frames)
+    with patch("beeutil.embeddings._precision.encode", wraps=precision.encode) as encode:
+        first = find_matches_batch(items, qs, 0.3, precision="int8")
+        assert find_matches_batch(items, qs, 0.3, precision="int8") == first
+        assert encode.call_count == 3  # queries once, frames per call
+
+        qs.update([{"label": "q0", "embedding": queries[1].tolist()}])
+        find_matches_batch(items, qs, 0.3, precision="int8")
+        assert encode.call_count == 5
+    assert qs.encoded("float16")[0].dtype == np.float16
+    assert qs.encoded("float16") is qs.encoded("float16")
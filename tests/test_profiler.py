@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import beeutil.profiler as profiler
+import beeutil.secrets as secrets
+from beeutil.profiler import ProfilerError, SamplingProfiler, collapse_stack
+
+
+def _busy_marker(stop):
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def test_collapse_stack_outermost_first():
+    def inner():
+        return collapse_stack(sys._getframe())
+
+    stack = inner()
+    assert stack[-1].startswith("inner (test_profiler.py:")
+    assert any(label.startswith("test_collapse_stack_outermost_first") for label in stack)
+
+
+def test_sample_records_other_threads(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_marker, args=(stop,), name="worker")
+    worker.start()
+    try:
+        prof = SamplingProfiler(str(tmp_path))
+        for _ in range(5):
+            prof.sample()
+    finally:
+        stop.set()
+        worker.join()
+
+    path = prof.flush()
+    assert path is not None
+    with open(path) as f:
+        lines = f.read().splitlines()
+    worker_lines = [line for line in lines if line.startswith("worker;")]
+    assert worker_lines
+    assert "_busy_marker" in worker_lines[0]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in worker_lines) == 5
+
+
+def test_flush_without_samples_returns_none(tmp_path):
+    assert SamplingProfiler(str(tmp_path)).flush() is None
+
+
+def test_flush_prunes_old_files(tmp_path):
+    prof = SamplingProfiler(str(tmp_path), max_files=2)
+    old_ms = int(time.time() * 1000) - 1000
+    for i in range(4):
+        with open(tmp_path / f"profile-{old_ms + i}.folded", "w") as f:
+            f.write("t;f 1\n")
+    sampler = threading.Thread(target=prof.sample)
+    sampler.start()
+    sampler.join()
+    path = prof.flush()
+    assert path is not None
+    assert sorted(os.listdir(tmp_path)) == [f"profile-{old_ms + 3}.folded", os.path.basename(path)]
+
+
+def test_background_thread_writes_on_stop(tmp_path):
+    with SamplingProfiler(str(tmp_path), interval_s=0.001) as prof:
+        time.sleep(0.05)
+    assert prof.samples > 0
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".folded")]
+
+
+def test_invalid_interval():
+    with pytest.raises(ProfilerError):
+        SamplingProfiler("/tmp", interval_s=0)
+
+
+def test_start_disabled_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv(profiler.ENV_VAR, raising=False)
+    monkeypatch.setattr(secrets, "PLUGIN_DIR", str(tmp_path))
+    secrets.clear_cache()
+    os.makedirs(tmp_path / "p")
+    with open(tmp_path / "p" / ".env", "w") as f:
+        f.write("OTHER=1\n")
+    try:
+        assert profiler.start("p") is None
+    finally:
+        secrets.clear_cache()
+        os.environ.pop("OTHER", None)
+
+
+def test_start_enabled_from_dotenv(monkeypatch, tmp_path):
+    monkeypatch.delenv(profiler.ENV_VAR, raising=False)
+    monkeypatch.setattr(secrets, "PLUGIN_DIR", str(tmp_path))
+    secrets.clear_cache()
+    os.makedirs(tmp_path / "p")
+    with open(tmp_path / "p" / ".env", "w") as f:
+        f.write("BEE_PROFILE=true\nBEE_PROFILE_INTERVAL_MS=5\n")
+    try:
+        prof = profiler.start("p")
+        assert prof is not None
+        assert prof.interval_s == pytest.approx(0.005)
+        assert prof.out_dir == os.path.join(str(tmp_path), "p", "profiles")
+        assert profiler.start("p") is prof
+    finally:
+        profiler.stop()
+        secrets.clear_cache()
+        os.environ.pop("BEE_PROFILE", None)
+        os.environ.pop("BEE_PROFILE_INTERVAL_MS", None)
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "fast"])
+def test_start_ignores_bad_interval(monkeypatch, tmp_path, value):
+    monkeypatch.setenv(profiler.ENV_VAR, "1")
+    monkeypatch.setenv(profiler.INTERVAL_ENV_VAR, value)
+    monkeypatch.setattr(secrets, "PLUGIN_DIR", str(tmp_path))
+    secrets.clear_cache()
+    try:
+        prof = profiler.start("p")
+        assert prof is not None
+        assert prof.interval_s == profiler.DEFAULT_INTERVAL_S
+    finally:
+        profiler.stop()
+        secrets.clear_cache()
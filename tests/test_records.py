@@ -0,0 +1,194 @@
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.embeddings import (
+    EmbeddingsError,
+    QuerySet,
+    find_matches,
+    find_matches_arrays,
+    find_matches_batch,
+    list_embeddings,
+    load_query_embeddings,
+)
+from beeutil.recordings import get_videos_by_timerange
+from beeutil.records import EmbeddingRecord, MatchBatch, MatchRecord, QueryRecord, VideoRecord
+
+
+def _frames(n=40, dim=8, seed=0):
+    rng = np.random.RandomState(seed)
+    vectors = rng.randn(n, dim)
+    return [
+        {
+            "timestamp_ms": 1000 + 100 * i,
+            "image_name": f"{1000 + 100 * i}_37.0_-122.0.jpg",
+            "lat": 37.0 + i / 1000,
+            "lon": -122.0 - i / 1000,
+            "embeddings": vectors[i].tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+def _queries(frames):
+    return [
+        {"label": "a", "embedding": frames[3]["embeddings"], "threshold": 0.3},
+        {"label": "b", "embedding": frames[17]["embeddings"], "threshold": 0.2},
+    ]
+
+
+def test_record_dict_access():
+    video = VideoRecord("/v/1.mp4", "1.mp4", 1)
+    assert video["filename"] == "1.mp4"
+    assert video.get("missing") is None
+    assert video == {"filepath": "/v/1.mp4", "filename": "1.mp4", "timestamp_ms": 1}
+    assert dict(video) == video.to_dict()
+    assert "timestamp_ms" in video
+    video["timestamp_ms"] = 2
+    assert video.timestamp_ms == 2
+    with pytest.raises(KeyError):
+        video["nope"] = 1
+    assert not hasattr(video, "__dict__")
+
+
+def test_record_requires_every_field():
+    with pytest.raises(TypeError, match="missing"):
+        VideoRecord(filepath="/v/1.mp4")
+    with pytest.raises(TypeError, match="unknown"):
+        VideoRecord("/v/1.mp4", "1.mp4", 1, extra=True)
+
+
+def test_record_from_dict():
+    frame = _frames(1)[0]
+    record = EmbeddingRecord.from_dict(frame)
+    assert record == frame
+    assert record["embeddings"] is frame["embeddings"]
+
+
+def test_optional_fields_behave_like_missing_keys():
+    query = QueryRecord.from_dict({"label": "a", "embedding": [1.0, 0.0]})
+    assert "threshold" not in query
+    assert query.get("threshold", 0.7) == 0.7
+    assert dict(query) == {"label": "a", "embedding": [1.0, 0.0]}
+    with pytest.raises(KeyError):
+        query["threshold"]
+    query["threshold"] = 0.5
+    assert len(query) == 3
+
+
+def _response(payload):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.json.return_value = payload
+    return resp
+
+
+def test_apis_return_records_on_request():
+    frames = _frames(3)
+    with patch("beeutil.embeddings.requests.get", return_value=_response(frames)):
+        records = list_embeddings(as_records=True)
+    assert all(isinstance(r, EmbeddingRecord) for r in records)
+    assert records == frames
+
+    queries = [{"label": "a", "embedding": frames[0]["embeddings"]}]
+    with patch(
+        "beeutil.embeddings.requests.get", return_value=_response({"queryEmbeddings": queries})
+    ):
+        loaded = load_query_embeddings("plugin", as_records=True)
+    assert isinstance(loaded[0], QueryRecord)
+    assert loaded == queries
+
+    matches = find_matches(records[0], loaded, 0.5, as_records=True)
+    assert isinstance(matches[0], MatchRecord)
+    assert matches == find_matches(frames[0], queries, 0.5)
+
+    videos = {"videos": [{"filepath": "/v/1.mp4", "timestamp_ms": 1}]}
+    with patch("beeutil.recordings.requests.get", return_value=_response(videos)):
+        [video] = get_videos_by_timerange(0, 2, as_records=True)
+    assert isinstance(video, VideoRecord)
+    assert video == {"filepath": "/v/1.mp4", "filename": "1.mp4", "timestamp_ms": 1}
+
+
+def test_malformed_records_raise_embeddings_error():
+    with patch("beeutil.embeddings.requests.get", return_value=_response([{"lat": 1.0}])):
+        with pytest.raises(EmbeddingsError, match="EmbeddingRecord"):
+            list_embeddings(as_records=True)
+
+
+def test_batch_matches_dict_results():
+    frames = _frames()
+    qe = _queries(frames)
+    expected = find_matches_batch(frames, qe, 0.25)
+    batch = find_matches_batch(frames, qe, 0.25, as_batch=True)
+    assert len(batch) == len(expected) > 2
+    assert batch.to_list() == expected
+    assert list(batch) == expected
+    assert batch[0] == expected[0]
+    assert batch[-1]["image_name"] == expected[-1]["image_name"]
+
+
+def test_batch_from_arrays_and_queryset():
+    frames = _frames()
+    qs = QuerySet(_queries(frames))
+    vectors = np.array([f["embeddings"] for f in frames])
+    columns = (
+        vectors,
+        np.array([f["timestamp_ms"] for f in frames], dtype=np.int64),
+        np.array([f["lat"] for f in frames]),
+        np.array([f["lon"] for f in frames]),
+        [f["image_name"] for f in frames],
+    )
+    expected = find_matches_arrays(*columns, qs, 0.25)
+    batch = find_matches_arrays(*columns, qs, 0.25, as_batch=True)
+    assert batch.to_list() == expected
+    assert batch.labels == ["a", "b"]
+
+
+def test_batch_columns_and_selection():
+    frames = _frames()
+    batch = find_matches_batch(frames, _queries(frames), 0.25, as_batch=True)
+    scores = batch.column("score")
+    strong = batch[scores >= 0.5]
+    assert len(strong) == int((scores >= 0.5).sum())
+    assert all(m["score"] >= 0.5 for m in strong)
+    assert list(batch.column("label")) == [m["label"] for m in batch]
+    assert batch[1:3].to_list() == batch.to_list()[1:3]
+    with pytest.raises(IndexError):
+        batch[len(batch)]
+
+
+def test_batch_rows_are_read_only_views():
+    batch = MatchBatch.from_matches(
+        [{"label": "a", "score": 0.9, "timestamp_ms": 1, "lat": 1.0, "lon": 2.0, "image_name": "x"}]
+    )
+    row = batch[0]
+    with pytest.raises(TypeError):
+        row["score"] = 0.1
+    batch.columns["score"][0] = 0.5
+    assert row["score"] == 0.5
+    assert json.dumps(batch.to_list())
+
+
+def test_from_matches_round_trip():
+    matches = [
+        MatchRecord("b", 0.8, 5, 1.0, 2.0, "5.jpg"),
+        MatchRecord("a", 0.7, 6, 1.5, 2.5, "6.jpg"),
+        MatchRecord("b", 0.9, 7, 1.0, 2.0, "7.jpg"),
+    ]
+    batch = MatchBatch.from_matches(matches)
+    assert batch.labels == ["b", "a"]
+    assert batch.to_list() == matches
+
+
+def test_empty_batch():
+    frames = _frames(3)
+    batch = find_matches_batch(frames, [], 0.5, as_batch=True)
+    assert len(batch) == 0
+    assert batch.to_list() == []
+    assert list(MatchBatch.empty().column("label")) == []
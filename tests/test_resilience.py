@@ -0,0 +1,210 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil import resilience
+from beeutil.embeddings import EmbeddingsError, list_embeddings
+from beeutil.image_cache import ImageCacheError, purge_data
+from beeutil.resilience import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    resilience.reset()
+    monkeypatch.setattr(resilience, "BACKOFF_BASE_S", 0.0001)
+    monkeypatch.setattr(resilience, "BACKOFF_CAP_S", 0.001)
+    yield
+    resilience.reset()
+
+
+def _resp(status, body=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.json.return_value = body
+    resp.text = str(body)
+    return resp
+
+
+def test_retries_connection_errors_then_succeeds():
+    ok = _resp(200, [])
+    with patch(
+        "beeutil.resilience.requests.get", side_effect=[requests.ConnectionError(), ok]
+    ) as mock_get:
+        assert resilience.get("http://odc/x", endpoint="x") is ok
+    assert mock_get.call_count == 2
+
+
+def test_gives_back_last_retryable_response():
+    busy = _resp(503)
+    with patch("beeutil.resilience.requests.get", return_value=busy) as mock_get:
+        assert resilience.get("http://odc/x", endpoint="x").status_code == 503
+    assert mock_get.call_count == resilience.RETRY_ATTEMPTS + 1
+
+
+def test_reraises_after_last_connection_error():
+    with patch("beeutil.resilience.requests.get", side_effect=requests.Timeout("slow")) as mock_get:
+        with pytest.raises(requests.Timeout):
+            resilience.get("http://odc/x", endpoint="x")
+    assert mock_get.call_count == resilience.RETRY_ATTEMPTS + 1
+
+
+def test_prepare_gives_each_attempt_fresh_arguments():
+    session = MagicMock()
+    session.put.side_effect = [_resp(500), requests.ConnectionError(), _resp(200)]
+    bodies = iter(["first", "second", "third"])
+    resp = resilience.request(
+        "put",
+        "http://s3/k",
+        endpoint="s3",
+        retry_statuses={500},
+        prepare=lambda: {"data": next(bodies)},
+        session=session,
+        timeout=5,
+    )
+    assert resp.status_code == 200
+    assert [call.kwargs for call in session.put.call_args_list] == [
+        {"data": "first", "timeout": 5},
+        {"data": "second", "timeout": 5},
+        {"data": "third", "timeout": 5},
+    ]
+
+
+@pytest.mark.parametrize("status", [200, 404, 500])
+def test_non_transient_statuses_are_not_retried(status):
+    with patch("beeutil.resilience.requests.get", return_value=_resp(status)) as mock_get:
+        resilience.get("http://odc/x", endpoint="x")
+    mock_get.assert_called_once()
+
+
+def test_posts_are_not_retried():
+    with patch("beeutil.resilience.requests.post", return_value=_resp(503)) as mock_post:
+        resilience.post("http://odc/x", {"a": 1}, endpoint="x")
+    mock_post.assert_called_once_with("http://odc/x", {"a": 1})
+
+
+def test_backoff_delays_are_jittered_and_capped():
+    for _ in range(50):
+        delays = resilience.backoff_delays(8)
+        assert len(delays) == 8
+        assert all(resilience.BACKOFF_BASE_S <= d <= resilience.BACKOFF_CAP_S for d in delays)
+        assert all(b <= 3 * a for a, b in zip(delays, delays[1:]))
+    assert len({tuple(resilience.backoff_delays(3)) for _ in range(10)}) > 1
+
+
+def test_breaker_opens_then_half_opens(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failures=3, reset_s=10)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    now[0] = 11.0
+    assert breaker.allow()  # one trial call
+    assert not breaker.allow()
+    breaker.record_failure()  # trial failed: open for another reset_s
+    assert not breaker.allow()
+
+    now[0] = 22.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_open_breaker_fails_fast_per_endpoint():
+    with patch(
+        "beeutil.resilience.requests.get", side_effect=requests.ConnectionError()
+    ) as mock_get:
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                resilience.get("http://odc/a", endpoint="a")
+        calls = mock_get.call_count
+        assert calls >= resilience.BREAKER_FAILURES
+        with pytest.raises(CircuitOpenError):
+            resilience.get("http://odc/a", endpoint="a")
+        assert mock_get.call_count == calls
+
+    with patch("beeutil.resilience.requests.get", return_value=_resp(200)):
+        assert resilience.get("http://odc/b", endpoint="b").status_code == 200
+
+
+def test_open_breaker_surfaces_as_module_error():
+    resilience.breaker("embeddings").failures = 1
+    resilience.breaker("embeddings").record_failure()
+    with patch("beeutil.embeddings.requests.get") as mock_get:
+        with pytest.raises(EmbeddingsError, match="Circuit open"):
+            list_embeddings()
+    mock_get.assert_not_called()
+
+
+def test_concurrent_identical_gets_share_one_request():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_get(url, **kwargs):
+        started.set()
+        release.wait(5)
+        return _resp(200, kwargs["params"])
+
+    results = []
+    with patch("beeutil.resilience.requests.get", side_effect=slow_get) as mock_get:
+        leader = threading.Thread(
+            target=lambda: results.append(resilience.get("http://odc/list", params={"since": 1}))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(
+                    resilience.get("http://odc/list", params={"since": 1})
+                )
+            )
+            for _ in range(4)
+        ]
+        for t in followers:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in [leader, *followers]:
+            t.join(5)
+        mock_get.assert_called_once()
+
+        assert resilience.get("http://odc/list", params={"since": 2}).json() == {"since": 2}
+        assert mock_get.call_count == 2
+    assert len(results) == 5
+    assert all(r is results[0] for r in results)
+
+
+def test_image_cache_error_with_non_json_body():
+    resp = _resp(500)
+    resp.json.side_effect = ValueError("not json")
+    resp.text = "<html>busy</html>"
+    with patch("beeutil.image_cache.requests.get", return_value=resp):
+        with pytest.raises(ImageCacheError, match="500: <html>busy</html>"):
+            purge_data()
+
+
+@pytest.mark.parametrize(("value", "expected"), [(None, 3), ("0", 0), ("5", 5)])
+def test_retry_attempts_from_environment(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv(resilience.RETRY_ENV_VAR, raising=False)
+    else:
+        monkeypatch.setenv(resilience.RETRY_ENV_VAR, value)
+    assert resilience._retry_attempts() == expected
+
+
+@pytest.mark.parametrize("value", ["three", "", "-1", "2.5"])
+def test_retry_attempts_ignores_bad_values(monkeypatch, caplog, value):
+    monkeypatch.setenv(resilience.RETRY_ENV_VAR, value)
+    assert resilience._retry_attempts() == resilience.DEFAULT_RETRY_ATTEMPTS
+    assert resilience.RETRY_ENV_VAR in caplog.text
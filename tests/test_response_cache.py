@@ -0,0 +1,121 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil import device, resilience, response_cache
+from beeutil.device import DeviceError
+from beeutil.image_cache import enable_image_collection, image_cache_status
+from beeutil.response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    response_cache.cache.invalidate()
+    resilience.reset()
+    yield
+    response_cache.cache.invalidate()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _resp(status, body=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.json.return_value = body
+    resp.text = str(body)
+    return resp
+
+
+def test_serves_from_cache_until_ttl_expires():
+    clock = Clock()
+    cache = ResponseCache(ttls={"info": 10}, clock=clock)
+    fetch = MagicMock(side_effect=[{"v": 1}, {"v": 2}])
+
+    assert cache.cached("info", "k", fetch) == {"v": 1}
+    clock.now = 9.9
+    assert cache.cached("info", "k", fetch) == {"v": 1}
+    clock.now = 10.0
+    assert cache.cached("info", "k", fetch) == {"v": 2}
+    assert fetch.call_count == 2
+    assert cache.stats() == {"info": {"hits": 1, "misses": 2}}
+
+
+def test_endpoints_without_ttl_are_not_cached():
+    cache = ResponseCache(ttls={"info": 10})
+    fetch = MagicMock(return_value=[])
+    cache.cached("cache/list", "k", fetch)
+    cache.cached("cache/list", "k", fetch)
+    assert fetch.call_count == 2
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(ttls={"e": 60}, max_entries=2)
+    cache.cached("e", "a", lambda: "a")
+    cache.cached("e", "b", lambda: "b")
+    cache.cached("e", "a", lambda: "unused")  # a is now most recent
+    cache.cached("e", "c", lambda: "c")
+    assert len(cache) == 2
+    assert cache.cached("e", "a", lambda: "refetched") == "a"
+    assert cache.cached("e", "b", lambda: "refetched") == "refetched"
+
+
+def test_invalidate_by_endpoint():
+    cache = ResponseCache(ttls={"x": 60, "y": 60})
+    cache.cached("x", "k", lambda: 1)
+    cache.cached("y", "k", lambda: 1)
+    cache.invalidate("x")
+    assert cache.cached("x", "k", lambda: 2) == 2
+    assert cache.cached("y", "k", lambda: 2) == 1
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache(ttls={"x": 60})
+    with pytest.raises(RuntimeError, match="down"):
+        cache.cached("x", "k", MagicMock(side_effect=RuntimeError("down")))
+    assert cache.cached("x", "k", lambda: "up") == "up"
+
+
+def test_callers_cannot_mutate_cached_value():
+    cache = ResponseCache(ttls={"x": 60})
+    first = cache.cached("x", "k", lambda: {"items": [1]})
+    first["items"].append(2)
+    assert cache.cached("x", "k", lambda: None) == {"items": [1]}
+
+
+def test_image_cache_status_is_cached_and_invalidated():
+    status = {"enabled": False, "frames": 3}
+    with patch("beeutil.image_cache.requests.get", return_value=_resp(200, status)) as mock_get:
+        assert image_cache_status() == status
+        assert image_cache_status() == status
+        assert mock_get.call_count == 1
+
+        enable_image_collection()
+        assert image_cache_status() == status
+        assert mock_get.call_count == 3
+
+
+def test_device_info_cached():
+    with patch(
+        "beeutil.device.requests.get", return_value=_resp(200, {"serial": "abc"})
+    ) as mock_get:
+        assert device.info() == {"serial": "abc"}
+        assert device.info() == {"serial": "abc"}
+    mock_get.assert_called_once()
+    assert response_cache.cache.stats()["info"]["hits"] >= 1
+
+
+def test_device_info_error():
+    with patch("beeutil.device.requests.get", return_value=_resp(404, "nope")):
+        with pytest.raises(DeviceError, match="404"):
+            device.info()
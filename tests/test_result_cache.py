@@ -0,0 +1,211 @@
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import beeutil.embeddings as embeddings
+from beeutil.embeddings import QuerySet, find_matches_arrays, find_matches_batch
+from beeutil.result_cache import HIT_DTYPE, ResultCache
+
+DIM = 8
+
+
+def _frames(n=60, start=0, seed=0):
+    rng = np.random.RandomState(seed)
+    vectors = rng.randn(start + n, DIM)
+    return [
+        {
+            "timestamp_ms": 1000 + 100 * i,
+            "image_name": f"{1000 + 100 * i}_37.0_-122.0.jpg",
+            "lat": 37.0,
+            "lon": -122.0,
+            "embeddings": vectors[i].tolist(),
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def _queries():
+    rng = np.random.RandomState(1)
+    return [
+        {"label": "a", "embedding": rng.randn(DIM).tolist(), "threshold": 0.3},
+        {"label": "b", "embedding": rng.randn(DIM).tolist()},
+    ]
+
+
+@pytest.fixture
+def cache():
+    results = ResultCache(":memory:")
+    yield results
+    results.close()
+
+
+def _scored_frames():
+    """Patch the scoring kernel and count the frames it sees."""
+    seen = []
+    real = embeddings._score
+
+    def counting(frame_matrix, *args):
+        seen.append(len(frame_matrix))
+        return real(frame_matrix, *args)
+
+    return seen, patch("beeutil.embeddings._score", side_effect=counting)
+
+
+def test_cached_results_match_fresh(cache):
+    frames, qe = _frames(), _queries()
+    expected = find_matches_batch(frames, qe, 0.2)
+    assert len(expected) > 5
+    assert find_matches_batch(frames, qe, 0.2, result_cache=cache) == expected
+    assert find_matches_batch(frames, qe, 0.2, result_cache=cache) == expected
+    assert cache.hits == len(frames)
+    assert cache.misses == len(frames)
+
+
+def test_repeat_is_a_lookup(cache):
+    frames, qe = _frames(), _queries()
+    find_matches_batch(frames, qe, 0.2, result_cache=cache)
+    seen, patched = _scored_frames()
+    with patched:
+        find_matches_batch(frames, qe, 0.2, result_cache=cache)
+    assert seen == []
+
+
+def test_overlapping_window_scores_only_new_frames(cache):
+    qe = _queries()
+    find_matches_batch(_frames(40), qe, 0.2, result_cache=cache)
+    window = _frames(40, start=20)
+    seen, patched = _scored_frames()
+    with patched:
+        matches = find_matches_batch(window, qe, 0.2, result_cache=cache)
+    assert seen == [20]
+    assert matches == find_matches_batch(window, qe, 0.2)
+
+
+def test_query_changes_use_a_new_key(cache):
+    frames, qe = _frames(), _queries()
+    find_matches_batch(frames, qe, 0.2, result_cache=cache)
+    for kwargs in [{"default_threshold": 0.5}, {"default_threshold": 0.2, "precision": "float32"}]:
+        seen, patched = _scored_frames()
+        with patched:
+            matches = find_matches_batch(frames, qe, result_cache=cache, **kwargs)
+        assert seen == [len(frames)]
+        assert matches == find_matches_batch(frames, qe, **kwargs)
+
+
+def test_arrays_path_shares_cache(cache):
+    frames = _frames()
+    qs = QuerySet(_queries())
+    find_matches_batch(frames, qs, 0.2, result_cache=cache)
+    columns = (
+        np.array([f["embeddings"] for f in frames]),
+        np.array([f["timestamp_ms"] for f in frames], dtype=np.int64),
+        np.array([f["lat"] for f in frames]),
+        np.array([f["lon"] for f in frames]),
+        [f["image_name"] for f in frames],
+    )
+    seen, patched = _scored_frames()
+    with patched:
+        batch = find_matches_arrays(*columns, qs, 0.2, result_cache=cache, as_batch=True)
+    assert seen == []
+    assert batch.to_list() == find_matches_batch(frames, qs, 0.2)
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "results.db")
+    frames, qe = _frames(), _queries()
+    first = ResultCache(path)
+    expected = find_matches_batch(frames, qe, 0.2, result_cache=first)
+    first.close()
+
+    second = ResultCache(path)
+    seen, patched = _scored_frames()
+    with patched:
+        assert find_matches_batch(frames, qe, 0.2, result_cache=second) == expected
+    assert seen == []
+    assert len(second) == len(frames)
+    second.close()
+
+
+def test_evicts_least_recently_used():
+    cache = ResultCache(":memory:", max_rows=50)
+    qe = _queries()
+    find_matches_batch(_frames(30), qe, 0.2, result_cache=cache)
+    find_matches_batch(_frames(30, start=30), qe, 0.2, result_cache=cache)
+    assert len(cache) <= 50
+
+    # The newer window survived eviction
+    seen, patched = _scored_frames()
+    with patched:
+        find_matches_batch(_frames(30, start=30), qe, 0.2, result_cache=cache)
+    assert seen == []
+    cache.close()
+
+
+def _store(cache, frames):
+    empty = np.empty(0, dtype=HIT_DTYPE)
+    cache.store(
+        "k",
+        [f["timestamp_ms"] for f in frames],
+        [f["image_name"] for f in frames],
+        [empty] * len(frames),
+    )
+
+
+def _stored_names(cache, frames):
+    found = cache.lookup(
+        "k", [f["timestamp_ms"] for f in frames], [f["image_name"] for f in frames]
+    )
+    return [frames[i]["image_name"] for i in sorted(found)]
+
+
+def test_single_store_over_budget_keeps_newest():
+    cache = ResultCache(":memory:", max_rows=10)
+    frames = _frames(15)
+    _store(cache, frames)
+    assert len(cache) == 9
+    assert _stored_names(cache, frames) == [f["image_name"] for f in frames[6:]]
+    cache.close()
+
+
+def test_store_crossing_budget_evicts_only_the_excess():
+    cache = ResultCache(":memory:", max_rows=10)
+    frames = _frames(12)
+    _store(cache, frames[:8])
+    _store(cache, frames[8:])
+    assert len(cache) == 9
+    # Three of the earlier store's frames go, oldest first; the newer store stays whole.
+    assert _stored_names(cache, frames) == [f["image_name"] for f in frames[3:]]
+    cache.close()
+
+
+def test_restoring_frames_does_not_grow_the_count(tmp_path):
+    path = str(tmp_path / "results.db")
+    cache = ResultCache(path, max_rows=10)
+    frames = _frames(8)
+    _store(cache, frames[:6])
+    _store(cache, frames[2:8])
+    assert len(cache) == 8
+    cache.close()
+
+    cache = ResultCache(path, max_rows=10)
+    assert len(cache) == 8
+    _store(cache, _frames(4, start=8))
+    assert len(cache) == 9
+    cache.clear()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_query_columns_beyond_u16():
+    cache = ResultCache(":memory:")
+    frame = _frames(1)[0]
+    hits = np.array([(70_000, 0.9)], dtype=HIT_DTYPE)
+    cache.store("k", [frame["timestamp_ms"]], [frame["image_name"]], [hits])
+    found = cache.lookup("k", [frame["timestamp_ms"]], [frame["image_name"]])
+    assert found[0]["col"].tolist() == [70_000]
+    cache.close()
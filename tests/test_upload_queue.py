@@ -0,0 +1,136 @@
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from beeutil.upload_queue import UploadQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _drain(uploads):
+    handles = []
+    while not uploads.empty():
+        handles.append(uploads.get_nowait())
+    return handles
+
+
+def _match(name, score, label="sign"):
+    return {
+        "label": label,
+        "score": score,
+        "timestamp_ms": 0,
+        "lat": 0.0,
+        "lon": 0.0,
+        "image_name": name,
+    }
+
+
+def test_plain_handles_are_fifo():
+    uploads = UploadQueue()
+    for handle in ["a", "b", "c"]:
+        uploads.put(handle)
+    assert _drain(uploads) == ["a", "b", "c"]
+
+
+def test_ranks_by_detection_score_and_label():
+    uploads = UploadQueue(label_priority={"stop": 1.0})
+    uploads.put("plain")
+    uploads.put("weak", score=0.5, label="sign")
+    uploads.put("strong", score=0.9, label="sign")
+    uploads.put("stop", score=0.5, label="stop")
+    assert _drain(uploads) == ["stop", "strong", "weak", "plain"]
+
+
+def test_aging_prevents_starvation():
+    clock = Clock()
+    uploads = UploadQueue(aging_s=10, clock=clock)
+    uploads.put("old")
+    clock.now = 15  # waited 1.5 rank units
+    uploads.put("match", score=0.2, label="sign")  # rank 1.2
+    uploads.put("better", score=0.8, label="sign")  # rank 1.8
+    assert _drain(uploads) == ["better", "old", "match"]
+
+
+def test_detection_jumps_ahead_of_queued_frame():
+    clock = Clock()
+    uploads = UploadQueue(aging_s=10, clock=clock)
+    for i in range(5):
+        clock.now = i
+        uploads.put(f"{i}.jpg")
+    assert uploads.put_matches([_match("3.jpg", 0.9), _match("3.jpg", 0.5)]) == 1
+    assert not uploads.put("3.jpg")  # plain re-put does not demote it
+    assert len(uploads) == 5
+    assert uploads.superseded == 1
+    assert _drain(uploads) == ["3.jpg", "0.jpg", "1.jpg", "2.jpg", "4.jpg"]
+
+
+def test_cancel_skips_entries():
+    uploads = UploadQueue()
+    for handle in ["a", "b", "c"]:
+        uploads.put(handle)
+    assert uploads.cancel("b", "missing") == 1
+    assert "b" not in uploads
+    assert _drain(uploads) == ["a", "c"]
+    with pytest.raises(queue.Empty):
+        uploads.get_nowait()
+
+
+def test_cancelled_entries_are_compacted():
+    uploads = UploadQueue()
+    for i in range(500):
+        uploads.put(str(i))
+        uploads.cancel(str(i))
+    assert len(uploads._heap) <= 64 + 1
+    assert uploads.cancelled == 500
+
+
+def test_get_blocks_until_put():
+    uploads = UploadQueue()
+    got = []
+    worker = threading.Thread(target=lambda: got.append(uploads.get(timeout=5)))
+    worker.start()
+    uploads.put("a")
+    worker.join()
+    assert got == ["a"]
+    with pytest.raises(queue.Empty):
+        uploads.get(timeout=0.01)
+
+
+def test_join_waits_for_task_done():
+    uploads = UploadQueue()
+    for handle in ("a", "b", "c"):
+        uploads.put(handle)
+    uploads.put("a", score=0.9)  # superseding is not another task
+    uploads.cancel("c")
+    done = []
+
+    def worker():
+        while True:
+            try:
+                handle = uploads.get(timeout=0.1)
+            except queue.Empty:
+                return
+            done.append(handle)
+            uploads.task_done()
+
+    threading.Thread(target=worker).start()
+    uploads.join()
+    assert sorted(done) == ["a", "b"]
+    with pytest.raises(ValueError, match="too many times"):
+        uploads.task_done()
+
+
+def test_score_and_label_are_keyword_only():
+    with pytest.raises(TypeError):
+        UploadQueue().put("a", 0.9)
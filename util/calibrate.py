@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Calibrate query embedding thresholds offline.
+
+The frame x query cosine score matrix is computed once. Each label's scores are
+then sorted, so every candidate threshold costs one searchsorted into cumulative
+counts. With ground truth (image_name -> labels) the report gives precision and
+recall per threshold; without it, only match volume. Suggested thresholds are
+written back in the plugin data store's `queryEmbeddings` format.
+
+Usage:
+    python3 util/calibrate.py --embeddings dump.json --queries queries.json \
+        --truth truth.json --target-precision 0.95 --out queries.calibrated.json
+    python3 util/calibrate.py --fixtures sf tokyo --synthetic-queries 5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from util.odc_server import FRAMES_PER_SCENE, SyntheticEmbeddings, load_fixture_frames
+
+THRESHOLD_MIN = 0.0
+THRESHOLD_MAX = 1.0
+THRESHOLD_STEP = 0.005
+DEFAULT_THRESHOLD = 0.8
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_queries(path):
+    """Accepts a bare list or the data store's {"queryEmbeddings": [...]}."""
+    data = load_json(path)
+    return data["queryEmbeddings"] if isinstance(data, dict) else data
+
+
+def load_truth(path):
+    """{image_name: [label, ...]} -> {label: set(image_name)}."""
+    by_label = {}
+    for image_name, labels in load_json(path).items():
+        for label in [labels] if isinstance(labels, str) else labels:
+            by_label.setdefault(label, set()).add(image_name)
+    return by_label
+
+
+def fixture_dataset(fixtures, n_queries=5, dim=64, seed=0):
+    """Frames, queries and ground truth from the stand-in's synthetic embeddings.
+
+    Frame i is a positive for `scene-k` when anchor k is its nearest anchor.
+    """
+    frames = load_fixture_frames(fixtures)
+    synthetic = SyntheticEmbeddings(len(frames), dim, seed)
+    queries = synthetic.queries(n_queries, DEFAULT_THRESHOLD)
+    items = [
+        {
+            "image_name": f["name"],
+            "timestamp_ms": f["time"],
+            "lat": f["lat"],
+            "lon": f["lon"],
+            "embeddings": synthetic.vectors[i],
+        }
+        for i, f in enumerate(frames)
+    ]
+    truth = {}
+    for i, f in enumerate(frames):
+        nearest = int(round(i / FRAMES_PER_SCENE))
+        truth.setdefault(f"scene-{nearest}", set()).add(f["name"])
+    return items, queries, truth
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def score_matrix(frames, queries):
+    """(n_frames, n_queries) cosine similarities."""
+    frame_matrix = _normalize(np.array([f["embeddings"] for f in frames], dtype=np.float64))
+    query_matrix = _normalize(np.array([q["embedding"] for q in queries], dtype=np.float64))
+    return frame_matrix @ query_matrix.T
+
+
+def sweep(scores, positives, thresholds):
+    """Match counts, true positives, precision and recall at each threshold.
+
+    scores: (n_frames,) scores for one query; positives: bool mask or None.
+    """
+    order = np.argsort(scores)
+    ascending = scores[order]
+    # Frames with score >= t are the suffix starting at searchsorted(t, "left")
+    counts = len(scores) - np.searchsorted(ascending, thresholds, side="left")
+    result = {"thresholds": thresholds, "matches": counts}
+    if positives is None:
+        return result
+
+    # tp_suffix[i] = positives among ascending[i:]
+    sorted_pos = positives[order].astype(np.int64)
+    tp_suffix = np.concatenate([np.cumsum(sorted_pos[::-1])[::-1], [0]])
+    tp = tp_suffix[len(scores) - counts]
+    total = int(positives.sum())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["true_positives"] = tp
+        result["precision"] = np.where(counts > 0, tp / counts, 1.0)
+        result["recall"] = tp / total if total else np.zeros(len(thresholds))
+    return result
+
+
+def suggest(result, n_frames, target_precision=None, target_rate=None, beta=1.0):
+    """Index into the sweep of the suggested threshold.
+
+    With ground truth: the lowest threshold reaching target_precision, or the
+    best F-beta. Without it: the lowest threshold at or below target_rate
+    matches per 1000 frames.
+    """
+    thresholds = result["thresholds"]
+    if "precision" in result:
+        precision, recall = result["precision"], result["recall"]
+        if target_precision is not None:
+            ok = np.nonzero((precision >= target_precision) & (result["matches"] > 0))[0]
+            if len(ok):
+                return int(ok[0])
+        b2 = beta * beta
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f = (1 + b2) * precision * recall / (b2 * precision + recall)
+        return int(np.nanargmax(np.where(np.isfinite(f), f, -1.0)))
+
+    rate = result["matches"] * 1000.0 / max(n_frames, 1)
+    target = 1.0 if target_rate is None else target_rate
+    ok = np.nonzero(rate <= target)[0]
+    return int(ok[0]) if len(ok) else len(thresholds) - 1
+
+
+def calibrate(
+    frames,
+    queries,
+    truth=None,
+    thresholds=None,
+    target_precision=None,
+    target_rate=None,
+    beta=1.0,
+):
+    """Per-label report rows plus the full sweep for each label."""
+    if thresholds is None:
+        thresholds = np.arange(THRESHOLD_MIN, THRESHOLD_MAX + THRESHOLD_STEP / 2, THRESHOLD_STEP)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    scores = score_matrix(frames, queries)
+    names = [f["image_name"] for f in frames]
+
+    report = []
+    for col, query in enumerate(queries):
+        positives = None
+        if truth is not None:
+            wanted = truth.get(query["label"], set())
+            positives = np.array([name in wanted for name in names], dtype=bool)
+        result = sweep(scores[:, col], positives, thresholds)
+        best = suggest(result, len(frames), target_precision, target_rate, beta)
+        row = {
+            "label": query["label"],
+            "current_threshold": query.get("threshold"),
+            "suggested_threshold": round(float(thresholds[best]), 6),
+            "matches": int(result["matches"][best]),
+            "matches_per_1000": round(float(result["matches"][best]) * 1000 / len(frames), 3),
+        }
+        if positives is not None:
+            row["positives"] = int(positives.sum())
+            row["precision"] = round(float(result["precision"][best]), 4)
+            row["recall"] = round(float(result["recall"][best]), 4)
+        row["sweep"] = result
+        report.append(row)
+    return report
+
+
+def calibrated_queries(queries, report):
+    by_label = {row["label"]: row["suggested_threshold"] for row in report}
+    return [dict(q, threshold=by_label.get(q["label"], q.get("threshold"))) for q in queries]
+
+
+def print_report(report):
+    columns = ["label", "current_threshold", "suggested_threshold", "matches_per_1000"]
+    if report and "precision" in report[0]:
+        columns += ["precision", "recall", "positives"]
+    print("  ".join(f"{c:>20}" for c in columns))
+    for row in report:
+        print("  ".join(f"{str(row[c]):>20}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate query embedding thresholds.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--embeddings", help="JSON list of frames as returned by /embeddings")
+    source.add_argument("--fixtures", nargs="+", help="Fixture sets with synthetic embeddings")
+    parser.add_argument("--queries", help="queryEmbeddings JSON (required with --embeddings)")
+    parser.add_argument("--truth", help="JSON {image_name: [label, ...]}")
+    parser.add_argument("--synthetic-queries", type=int, default=5)
+    parser.add_argument("--target-precision", type=float)
+    parser.add_argument("--target-rate", type=float, help="Matches per 1000 frames")
+    parser.add_argument("--beta", type=float, default=1.0, help="F-beta when no precision target")
+    parser.add_argument("--step", type=float, default=THRESHOLD_STEP)
+    parser.add_argument("--out", help="Write calibrated queryEmbeddings JSON here")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        frames, queries, truth = fixture_dataset(args.fixtures, args.synthetic_queries)
+        if args.queries:
+            queries = load_queries(args.queries)
+    else:
+        if not args.queries:
+            parser.error("--queries is required with --embeddings")
+        frames, queries = load_json(args.embeddings), load_queries(args.queries)
+        truth = None
+    if args.truth:
+        truth = load_truth(args.truth)
+
+    thresholds = np.arange(THRESHOLD_MIN, THRESHOLD_MAX + args.step / 2, args.step)
+    report = calibrate(
+        frames, queries, truth, thresholds, args.target_precision, args.target_rate, args.beta
+    )
+    print(f"{len(frames)} frames x {len(queries)} queries")
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"queryEmbeddings": calibrated_queries(queries, report)}, f, indent=2)
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
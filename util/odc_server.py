@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Stdlib-only odc-api stand-in backed by fixture data, for load testing off-device.
+
+Serves the endpoints beeutil talks to from `fixtures/<name>` directories:
+
+    GET  /cache/list?since=&until=           frame handles (since exclusive, until inclusive)
+    GET  /cache/status|enable|disable|purge
+    POST /cache/enableDepthFlag|disableDepthFlag
+    POST /cache/uploadS3/<handle>            recorded, not uploaded
+    GET  /cache/<file>                       raw fixture .jpg/.json
+    GET  /api/1/embeddings?since=&until=     synthetic scene embeddings per frame
+    GET  /api/1/recordings/video/query-by-timestamp-ms/<start>/<end>
+    GET  /api/1/plugin/dataStore/<name>/queryEmbeddings
+    GET  /api/1/plugin/secrets/<name>        only when --secret KEY=VALUE is given
+    GET  /api/1/info
+    GET  /__stats                            request counters and upload log
+
+Latency, jitter, error injection and page sizes are configurable.
+
+Usage:
+    python3 util/odc_server.py --fixtures sf tokyo --latency-ms 20 --jitter-ms 10
+    BEE_ODC_HOST=http://127.0.0.1:5000 PYTHONPATH=src python3 -c "import plugin; plugin.main()"
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fixtures")
+
+DEFAULT_EMBEDDING_DIM = 256
+FRAMES_PER_SCENE = 20
+SCENE_NOISE = 0.05
+VIDEO_SEGMENT_MS = 10000
+STANDIN_PLUGIN_ID = "000000000000000000000000"
+
+
+def parse_frame_name(name):
+    """Split `<time>_<lat>_<lon>.<ext>` into (time_ms, lat, lon)."""
+    stem = name.rsplit(".", 1)[0]
+    time_ms, lat, lon = stem.split("_")
+    return int(time_ms), float(lat), float(lon)
+
+
+def load_fixture_frames(fixtures, fixtures_dir=FIXTURES_DIR):
+    """Return frame dicts for all .jpg files in the given fixture sets, sorted by time."""
+    frames = []
+    for fixture in fixtures:
+        fixture_dir = fixture if os.path.isdir(fixture) else os.path.join(fixtures_dir, fixture)
+        for entry in os.scandir(fixture_dir):
+            if not entry.name.endswith(".jpg"):
+                continue
+            time_ms, lat, lon = parse_frame_name(entry.name)
+            frames.append(
+                {
+                    "name": entry.name,
+                    "time": time_ms,
+                    "lat": lat,
+                    "lon": lon,
+                    "dir": fixture_dir,
+                }
+            )
+    frames.sort(key=lambda f: (f["time"], f["name"]))
+    return frames
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class SyntheticEmbeddings:
+    """Deterministic scene embeddings: frames drift between random scene anchors.
+
+    Consecutive frames are near-duplicates and frames near anchor k score highly
+    against query `scene-k`, so matching and dedup have something to find.
+    """
+
+    def __init__(self, n_frames, dim=DEFAULT_EMBEDDING_DIM, seed=0):
+        rng = random.Random(seed)
+        n_scenes = n_frames // FRAMES_PER_SCENE + 2
+        self.anchors = [_unit([rng.gauss(0, 1) for _ in range(dim)]) for _ in range(n_scenes)]
+
+        noise = SCENE_NOISE / math.sqrt(dim)
+        self.vectors = []
+        for i in range(n_frames):
+            a = self.anchors[i // FRAMES_PER_SCENE]
+            b = self.anchors[i // FRAMES_PER_SCENE + 1]
+            w = (i % FRAMES_PER_SCENE) / FRAMES_PER_SCENE
+            self.vectors.append(
+                _unit([(1 - w) * x + w * y + noise * rng.gauss(0, 1) for x, y in zip(a, b)])
+            )
+
+    def queries(self, n_queries=5, threshold=0.8):
+        step = max(1, (len(self.anchors) - 1) // max(1, n_queries))
+        return [
+            {"label": f"scene-{k}", "embedding": self.anchors[k], "threshold": threshold}
+            for k in range(0, len(self.anchors) - 1, step)[:n_queries]
+        ]
+
+
+class OdcStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 5000),
+        fixtures=("sf", "tokyo"),
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        error_rate=0.0,
+        page_size=None,
+        embedding_dim=DEFAULT_EMBEDDING_DIM,
+        n_queries=5,
+        query_threshold=0.8,
+        secrets=None,
+        seed=0,
+        fixtures_dir=FIXTURES_DIR,
+    ):
+        self.frames = load_fixture_frames(fixtures, fixtures_dir)
+        self.times = [f["time"] for f in self.frames]
+        self.by_name = {}
+        for f in self.frames:
+            self.by_name[f["name"]] = f
+            self.by_name[f["name"][:-4] + ".json"] = f
+        self.embeddings = SyntheticEmbeddings(len(self.frames), embedding_dim, seed)
+        self.query_embeddings = self.embeddings.queries(n_queries, query_threshold)
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.secrets = secrets
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.stats = {"requests": {}, "errors_injected": 0}
+        self.uploads = []
+        self.cache_state = {"enabled": False, "depth": False}
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def visible_frames(self):
+        """Indices of frames visible to clients. Replay narrows this over time."""
+        return range(len(self.frames))
+
+    def frames_in_range(self, since=None, until=None, since_exclusive=False):
+        out = []
+        for i in self.visible_frames():
+            t = self.times[i]
+            if since is not None and (t < since or (since_exclusive and t == since)):
+                continue
+            if until is not None and t > until:
+                continue
+            out.append(i)
+            if self.page_size and len(out) >= self.page_size:
+                break
+        return out
+
+    def record(self, route):
+        with self.lock:
+            self.stats["requests"][route] = self.stats["requests"].get(route, 0) + 1
+
+    def record_upload(self, handle, query):
+        with self.lock:
+            self.uploads.append(
+                {
+                    "handle": handle,
+                    "prefix": query.get("prefix"),
+                    "bucket": query.get("bucket"),
+                    "time": time.time(),
+                }
+            )
+
+    def delay(self):
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            delay_ms += self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def inject_error(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            with self.lock:
+                self.stats["errors_injected"] += 1
+            return True
+        return False
+
+
+def _int_param(query, key):
+    values = query.get(key)
+    if not values or values[0] in ("", "None", "null"):
+        return None
+    return int(values[0])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: OdcStandIn
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path, content_type):
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+        route = "/" + "/".join(parts[:3])
+
+        if url.path == "/__stats":
+            return self._send_json(self._stats())
+
+        self.server.record(route)
+        self.server.delay()
+        if self.server.inject_error():
+            return self._send_json({"error": "injected"}, status=503)
+
+        try:
+            if parts[0] == "cache":
+                return self._cache(method, parts[1:], query)
+            if parts[:2] == ["api", "1"]:
+                return self._api(method, parts[2:], query)
+        except (ValueError, IndexError) as e:
+            return self._send_json({"error": str(e)}, status=400)
+        self._send_json({"error": f"unknown route {url.path}"}, status=404)
+
+    def _stats(self):
+        with self.server.lock:
+            return {
+                "requests": dict(self.server.stats["requests"]),
+                "errors_injected": self.server.stats["errors_injected"],
+                "uploads": list(self.server.uploads),
+            }
+
+    def _cache(self, method, parts, query):
+        server = self.server
+        action = parts[0] if parts else ""
+
+        if action == "list":
+            idx = server.frames_in_range(
+                _int_param(query, "since"), _int_param(query, "until"), since_exclusive=True
+            )
+            return self._send_json([server.frames[i]["name"] for i in idx])
+        if action == "status":
+            return self._send_json(dict(server.cache_state, frames=len(server.visible_frames())))
+        if action in ("enable", "disable"):
+            server.cache_state["enabled"] = action == "enable"
+            return self._send_json({"status": f"{action}d"})
+        if action == "purge":
+            return self._send_json({"status": "purged"})
+        if action in ("enableDepthFlag", "disableDepthFlag") and method == "POST":
+            server.cache_state["depth"] = action == "enableDepthFlag"
+            return self._send_json({"depth": server.cache_state["depth"]})
+        if action == "uploadS3" and method == "POST" and len(parts) == 2:
+            handle = parts[1]
+            if handle not in server.by_name:
+                return self._send_json({"error": f"unknown handle {handle}"}, status=404)
+            server.record_upload(handle, {k: v[0] for k, v in query.items()})
+            return self._send_json({"uploaded": handle})
+
+        frame = server.by_name.get(action)
+        if frame is not None and len(parts) == 1:
+            content_type = "image/jpeg" if action.endswith(".jpg") else "application/json"
+            return self._send_file(os.path.join(frame["dir"], action), content_type)
+        return self._send_json({"error": f"unknown cache route {action}"}, status=404)
+
+    def _api(self, method, parts, query):
+        server = self.server
+
+        if parts == ["embeddings"]:
+            idx = server.frames_in_range(_int_param(query, "since"), _int_param(query, "until"))
+            vectors = server.embeddings.vectors
+            return self._send_json(
+                [
+                    {
+                        "image_name": server.frames[i]["name"],
+                        "timestamp_ms": server.frames[i]["time"],
+                        "lat": server.frames[i]["lat"],
+                        "lon": server.frames[i]["lon"],
+                        "embeddings": vectors[i],
+                    }
+                    for i in idx
+                ]
+            )
+
+        if parts[:3] == ["recordings", "video", "query-by-timestamp-ms"] and len(parts) == 5:
+            start_ms, end_ms = int(parts[3]), int(parts[4])
+            first = start_ms - start_ms % VIDEO_SEGMENT_MS
+            videos = [
+                {"filepath": f"/data/recording/video/{t}.mp4", "timestamp_ms": t}
+                for t in range(first, end_ms + 1, VIDEO_SEGMENT_MS)
+            ]
+            return self._send_json({"videos": videos})
+
+        if parts[:2] == ["plugin", "dataStore"] and parts[3:] == ["queryEmbeddings"]:
+            return self._send_json({"queryEmbeddings": server.query_embeddings})
+
+        if parts[:2] == ["plugin", "secrets"] and len(parts) == 3:
+            if not server.secrets:
+                return self._send_json({"error": "not found"}, status=404)
+            # Only needed when serving secrets; keeps the stand-in stdlib-only otherwise.
+            sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+            from beeutil.secrets import encrypt
+
+            return self._send_json(
+                {
+                    "_id": STANDIN_PLUGIN_ID,
+                    "encrypted_secrets": encrypt(STANDIN_PLUGIN_ID, server.secrets),
+                }
+            )
+
+        if parts == ["plugin", "setPausePluginUpdates"] and method == "POST":
+            return self._send_json({"ok": True})
+
+        if parts == ["info"]:
+            return self._send_json(
+                {"serial": "odc-standin", "frames": len(server.frames), "api": "odc-standin"}
+            )
+
+        return self._send_json({"error": f"unknown api route {'/'.join(parts)}"}, status=404)
+
+
+def serve_in_thread(**kwargs):
+    """Start a stand-in on an ephemeral port (unless given). Caller must call shutdown()."""
+    kwargs.setdefault("address", ("127.0.0.1", 0))
+    server = OdcStandIn(**kwargs)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="odc-api stand-in backed by fixture data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--fixtures", nargs="+", default=["sf", "tokyo"])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument("--page-size", type=int, default=None, help="Max items per list")
+    parser.add_argument("--embedding-dim", type=int, default=DEFAULT_EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=5, help="Synthetic query embeddings")
+    parser.add_argument(
+        "--secret", action="append", default=[], help="KEY=VALUE served as plugin secrets"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    secrets = dict(s.split("=", 1) for s in args.secret) or None
+    server = OdcStandIn(
+        address=(args.host, args.port),
+        fixtures=args.fixtures,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        page_size=args.page_size,
+        embedding_dim=args.embedding_dim,
+        n_queries=args.queries,
+        secrets=secrets,
+        seed=args.seed,
+    )
+    print(f"odc-api stand-in serving {len(server.frames)} frames at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Merge collapsed-stack profiles pulled from a device and summarize them.
+
+The merged output is a single flamegraph-ready file (flamegraph.pl, speedscope,
+inferno) plus a text table of the hottest functions.
+
+Usage:
+    python3 util/profile_summary.py profiles/ [--top 25] [--out merged.folded]
+"""
+
+import argparse
+import os
+from collections import Counter
+
+PROFILE_SUFFIX = ".folded"
+MERGED_FILENAME = "merged.folded"
+
+
+def read_collapsed(path, counts=None):
+    counts = Counter() if counts is None else counts
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if not stack:
+                continue
+            try:
+                counts[stack] += int(count)
+            except ValueError:
+                continue
+    return counts
+
+
+def merge_profiles(profile_dir):
+    counts = Counter()
+    for name in sorted(os.listdir(profile_dir)):
+        if name.endswith(PROFILE_SUFFIX) and name != MERGED_FILENAME:
+            read_collapsed(os.path.join(profile_dir, name), counts)
+    return counts
+
+
+def write_collapsed(counts, path):
+    with open(path, "w") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def function_totals(counts):
+    """Return (self_counts, inclusive_counts) per frame label, excluding thread names."""
+    self_counts = Counter()
+    inclusive = Counter()
+    for stack, count in counts.items():
+        frames = stack.split(";")[1:]
+        if not frames:
+            continue
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    return self_counts, inclusive
+
+
+def summarize(counts, top=25):
+    total = sum(counts.values())
+    if total == 0:
+        return "No samples."
+
+    self_counts, inclusive = function_totals(counts)
+    lines = [f"{total} samples", "", f"{'self%':>7} {'total%':>7}  function"]
+    for frame, count in self_counts.most_common(top):
+        lines.append(f"{100 * count / total:6.1f}% {100 * inclusive[frame] / total:6.1f}%  {frame}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize collapsed-stack profiles.")
+    parser.add_argument("profile_dir", help="Directory of .folded files pulled from the device")
+    parser.add_argument("--top", type=int, default=25, help="Number of functions to show")
+    parser.add_argument("--out", help=f"Merged output path (default: <dir>/{MERGED_FILENAME})")
+    args = parser.parse_args()
+
+    counts = merge_profiles(args.profile_dir)
+    out = args.out or os.path.join(args.profile_dir, MERGED_FILENAME)
+    write_collapsed(counts, out)
+    print(summarize(counts, args.top))
+    print(f"\nWrote flamegraph input to {out}")
+
+
+if __name__ == "__main__":
+    main()
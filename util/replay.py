@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Replay fixture drives through the odc-api stand-in at real time or N x speed.
+
+Frames become visible in `/cache/list` and `/api/1/embeddings` as the replay
+clock passes their capture timestamps, while a plugin entry point runs against
+the stand-in. The report covers capture-to-upload latency, throughput and
+backlog growth, i.e. whether the plugin keeps up at that frame rate.
+
+Usage:
+    python3 util/replay.py --fixtures sf --speed 4 --entry plugin:main
+    python3 util/replay.py --fixtures sf tokyo --speed 10 --json replay.json
+"""
+
+import argparse
+import bisect
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from util.odc_server import OdcStandIn
+
+DEFAULT_MAX_GAP_MS = 10000
+SAMPLE_INTERVAL_S = 0.5
+REPLAY_SECRETS = {
+    "AWS_BUCKET": "replay-bucket",
+    "AWS_REGION": "us-west-2",
+    "AWS_SECRET": "replay-secret",
+    "AWS_KEY": "replay-key",
+}
+
+
+def replay_offsets(times, max_gap_ms=DEFAULT_MAX_GAP_MS):
+    """Replay-time offset (ms from the first frame) of each frame.
+
+    Gaps longer than max_gap_ms, e.g. between fixture sets recorded weeks
+    apart, are clipped so the replay stays continuous.
+    """
+    offsets = []
+    offset = 0
+    for i, t in enumerate(times):
+        if i:
+            offset += min(t - times[i - 1], max_gap_ms)
+        offsets.append(offset)
+    return offsets
+
+
+class ReplayStandIn(OdcStandIn):
+    """Stand-in whose frames appear as the replay clock passes them."""
+
+    def __init__(self, speed=1.0, max_gap_ms=DEFAULT_MAX_GAP_MS, clock=time.monotonic, **kwargs):
+        super().__init__(**kwargs)
+        self.speed = speed
+        self.offsets = replay_offsets(self.times, max_gap_ms)
+        self.clock = clock
+        self.started_at = None
+        self.wall_started_at = None
+
+    def start_replay(self):
+        self.started_at = self.clock()
+        self.wall_started_at = time.time()
+
+    def replay_elapsed_ms(self):
+        if self.started_at is None:
+            return -1
+        return (self.clock() - self.started_at) * 1000 * self.speed
+
+    def visible_frames(self):
+        return range(bisect.bisect_right(self.offsets, self.replay_elapsed_ms()))
+
+    def capture_wall_time(self, i):
+        """Wall-clock time (time.time()) at which frame i became visible."""
+        return self.wall_started_at + self.offsets[i] / 1000 / self.speed
+
+    @property
+    def duration_s(self):
+        return (self.offsets[-1] if self.offsets else 0) / 1000 / self.speed
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _slope(samples):
+    """Least-squares slope of (t, backlog) samples, in frames per second."""
+    if len(samples) < 2:
+        return 0.0
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_b = sum(b for _, b in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var == 0:
+        return 0.0
+    return sum((t - mean_t) * (b - mean_b) for t, b in samples) / var
+
+
+def summarize_replay(server, backlog_samples, wall_elapsed_s):
+    index = {f["name"]: i for i, f in enumerate(server.frames)}
+    captured = len(server.visible_frames())
+    first_upload = {}
+    for upload in server.uploads:
+        first_upload.setdefault(upload["handle"], upload["time"])
+
+    latencies = [
+        uploaded_at - server.capture_wall_time(index[handle])
+        for handle, uploaded_at in first_upload.items()
+        if handle in index
+    ]
+    frame_rate = captured / server.duration_s if server.duration_s else 0.0
+    return {
+        "speed": server.speed,
+        "wall_seconds": round(wall_elapsed_s, 3),
+        "frames_captured": captured,
+        "frames_uploaded": len(first_upload),
+        "duplicate_uploads": len(server.uploads) - len(first_upload),
+        "capture_rate_fps": round(frame_rate, 3),
+        "upload_throughput_fps": round(len(first_upload) / wall_elapsed_s, 3)
+        if wall_elapsed_s
+        else 0.0,
+        "latency_s": {
+            "p50": _percentile(latencies, 0.5),
+            "p90": _percentile(latencies, 0.9),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None,
+        },
+        "backlog_final": captured - len(first_upload),
+        "backlog_growth_fps": round(_slope(backlog_samples), 3),
+        "requests": dict(server.stats["requests"]),
+    }
+
+
+def load_entry_point(spec):
+    """Resolve `module:function`."""
+    module_name, _, attr = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or "main")
+
+
+def run_replay(entry, drain_s=5.0, sample_interval_s=SAMPLE_INTERVAL_S, **server_kwargs):
+    """Replay fixtures against `entry` (a callable or `module:function` spec).
+
+    Returns the summary dict. The entry point runs in a daemon thread and is
+    left running; it is expected to loop forever like a plugin main().
+    """
+    server_kwargs.setdefault("address", ("127.0.0.1", 0))
+    server_kwargs.setdefault("secrets", REPLAY_SECRETS)
+    server = ReplayStandIn(**server_kwargs)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    # beeutil reads its host at import time, so set it before resolving the entry point.
+    previous_host = os.environ.get("BEE_ODC_HOST")
+    os.environ["BEE_ODC_HOST"] = server.url
+    if isinstance(entry, str):
+        entry = load_entry_point(entry)
+
+    server.start_replay()
+    started = time.monotonic()
+    threading.Thread(target=entry, name="replay-plugin", daemon=True).start()
+
+    samples = []
+    deadline = started + server.duration_s + drain_s
+    try:
+        while True:
+            now = time.monotonic()
+            with server.lock:
+                uploaded = len({u["handle"] for u in server.uploads})
+            samples.append((now - started, len(server.visible_frames()) - uploaded))
+            if now >= deadline:
+                break
+            time.sleep(min(sample_interval_s, max(0.0, deadline - now)))
+        with server.lock:
+            return summarize_replay(server, samples, time.monotonic() - started)
+    finally:
+        server.shutdown()
+        server.server_close()
+        if previous_host is None:
+            os.environ.pop("BEE_ODC_HOST", None)
+        else:
+            os.environ["BEE_ODC_HOST"] = previous_host
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay fixture drives against a plugin.")
+    parser.add_argument("--fixtures", nargs="+", default=["sf"])
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--entry", default="plugin:main", help="Plugin entry point")
+    parser.add_argument("--drain", type=float, default=10.0, help="Seconds to run after replay")
+    parser.add_argument("--max-gap-ms", type=int, default=DEFAULT_MAX_GAP_MS)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="Write the report to this path")
+    args = parser.parse_args()
+
+    report = run_replay(
+        args.entry,
+        drain_s=args.drain,
+        fixtures=args.fixtures,
+        speed=args.speed,
+        max_gap_ms=args.max_gap_ms,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    )
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Stdlib-only S3 stand-in for testing beeutil.s3 off-device.
+
+Keeps objects in memory and serves the path-style calls S3Uploader makes:
+
+    PUT    /<bucket>/<key>                               put object
+    PUT    /<bucket>/<key>?partNumber=N&uploadId=ID      upload part
+    POST   /<bucket>/<key>?uploads                       initiate multipart upload
+    POST   /<bucket>/<key>?uploadId=ID                   complete multipart upload
+    DELETE /<bucket>/<key>?uploadId=ID                   abort multipart upload
+    GET    /<bucket>/<key>                               get object
+    GET    /__stats                                      request counters
+
+SigV4 signatures are checked when credentials are given. Latency and 503s on
+chosen part numbers can be injected.
+
+Usage:
+    python3 util/s3_server.py --port 9000 --access-key test --secret-key test
+    BEE_S3_ENDPOINT=http://127.0.0.1:9000 PYTHONPATH=src python3 -c "import plugin; plugin.main()"
+"""
+
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+def _etag(data):
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class S3StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 9000),
+        access_key=None,
+        secret_key=None,
+        region="us-east-1",
+        latency_ms=0.0,
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.latency_ms = latency_ms
+        self.fail_parts = set()
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.uploads = {}
+        self.stats = {}
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, route):
+        with self.lock:
+            self.stats[route] = self.stats.get(route, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: S3StandIn
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status=200, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_xml(self, root, status=200):
+        body = ET.tostring(root, encoding="utf-8")
+        self._send(status, body, {"Content-Type": "application/xml"})
+
+    def _error(self, status, code):
+        root = ET.Element("Error")
+        ET.SubElement(root, "Code").text = code
+        self._send_xml(root, status)
+
+    def _authorized(self):
+        server = self.server
+        if server.access_key is None:
+            return True
+        auth = self.headers.get("Authorization", "")
+        amz_date = self.headers.get("x-amz-date", "")
+        if f"Credential={server.access_key}/" not in auth or not amz_date:
+            return False
+        signed = auth.split("SignedHeaders=", 1)[-1].split(",", 1)[0].split(";")
+        headers = {
+            name: self.headers.get(name, "")
+            for name in signed
+            if name not in ("host", "x-amz-date", "x-amz-content-sha256")
+        }
+        # Only needed when checking signatures; keeps the stand-in stdlib-only otherwise.
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+        from beeutil.s3 import sign
+
+        expected = sign(
+            self.command,
+            f"http://{self.headers['Host']}{self.path}",
+            headers,
+            server.access_key,
+            server.secret_key,
+            server.region,
+            payload_hash=self.headers.get("x-amz-content-sha256", ""),
+            now=calendar.timegm(time.strptime(amz_date, "%Y%m%dT%H%M%SZ")),
+        )
+        return expected["Authorization"] == auth
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if url.path == "/__stats":
+            with self.server.lock:
+                stats = json.dumps({"requests": self.server.stats}).encode("utf-8")
+            return self._send(200, stats, {"Content-Type": "application/json"})
+
+        query = parse_qs(url.query, keep_blank_values=True)
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        if "partNumber" in query:
+            route = f"{self.command} part"
+        elif "uploads" in query or "uploadId" in query:
+            route = f"{self.command} multipart"
+        else:
+            route = f"{self.command} object"
+        self.server.record(route)
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+        if not self._authorized():
+            return self._error(403, "SignatureDoesNotMatch")
+        if not bucket or not key:
+            return self._error(400, "InvalidRequest")
+        handler = getattr(self, f"_{self.command.lower()}")
+        return handler((bucket, key), query, body)
+
+    def _get(self, obj, query, body):
+        with self.server.lock:
+            stored = self.server.objects.get(obj)
+        if stored is None:
+            return self._error(404, "NoSuchKey")
+        self._send(200, stored["data"], {"ETag": stored["etag"]})
+
+    def _put(self, obj, query, body):
+        server = self.server
+        if "partNumber" not in query:
+            etag = _etag(body)
+            with server.lock:
+                server.objects[obj] = {"data": body, "etag": etag}
+            return self._send(200, headers={"ETag": etag})
+
+        number = int(query["partNumber"][0])
+        if number in server.fail_parts:
+            return self._error(503, "SlowDown")
+        with server.lock:
+            upload = server.uploads.get(query["uploadId"][0])
+            if upload is None or upload["object"] != obj:
+                return self._error(404, "NoSuchUpload")
+            upload["parts"][number] = body
+        self._send(200, headers={"ETag": _etag(body)})
+
+    def _post(self, obj, query, body):
+        server = self.server
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with server.lock:
+                server.uploads[upload_id] = {"object": obj, "parts": {}}
+            root = ET.Element("InitiateMultipartUploadResult", xmlns=XMLNS)
+            ET.SubElement(root, "Bucket").text = obj[0]
+            ET.SubElement(root, "Key").text = obj[1]
+            ET.SubElement(root, "UploadId").text = upload_id
+            return self._send_xml(root)
+
+        with server.lock:
+            upload = server.uploads.get(query.get("uploadId", [""])[0])
+            if upload is None or upload["object"] != obj:
+                return self._error(404, "NoSuchUpload")
+            parts = []
+            for part in ET.fromstring(body).iter("Part"):
+                number = int(part.findtext("PartNumber"))
+                data = upload["parts"].get(number)
+                if data is None or _etag(data) != part.findtext("ETag"):
+                    return self._error(400, "InvalidPart")
+                parts.append(data)
+            digest = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts))
+            etag = f'"{digest.hexdigest()}-{len(parts)}"'
+            server.objects[obj] = {"data": b"".join(parts), "etag": etag}
+            del server.uploads[query["uploadId"][0]]
+        root = ET.Element("CompleteMultipartUploadResult", xmlns=XMLNS)
+        ET.SubElement(root, "Key").text = obj[1]
+        ET.SubElement(root, "ETag").text = etag
+        self._send_xml(root)
+
+    def _delete(self, obj, query, body):
+        with self.server.lock:
+            if "uploadId" in query:
+                self.server.uploads.pop(query["uploadId"][0], None)
+            else:
+                self.server.objects.pop(obj, None)
+        self._send(204)
+
+
+def serve_in_thread(**kwargs):
+    """Start a stand-in on an ephemeral port (unless given). Caller must call shutdown()."""
+    kwargs.setdefault("address", ("127.0.0.1", 0))
+    server = S3StandIn(**kwargs)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory S3 stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default=None, help="Check signatures with this key")
+    parser.add_argument("--secret-key", default=None)
+    parser.add_argument("--region", default="us-east-1")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = S3StandIn(
+        address=(args.host, args.port),
+        access_key=args.access_key,
+        secret_key=args.secret_key,
+        region=args.region,
+        latency_ms=args.latency_ms,
+    )
+    print(f"S3 stand-in serving at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from beeutil.embeddings import find_matches_batch
+from util.calibrate import (
+    calibrate,
+    calibrated_queries,
+    fixture_dataset,
+    load_truth,
+    score_matrix,
+    sweep,
+)
+
+
+def test_sweep_matches_brute_force():
+    rng = np.random.RandomState(0)
+    scores = rng.uniform(-1, 1, 500)
+    positives = rng.uniform(size=500) < 0.2
+    thresholds = np.linspace(-1, 1, 41)
+    result = sweep(scores, positives, thresholds)
+    for i, t in enumerate(thresholds):
+        hit = scores >= t
+        assert result["matches"][i] == hit.sum()
+        assert result["true_positives"][i] == (hit & positives).sum()
+        if hit.any():
+            assert result["precision"][i] == pytest.approx((hit & positives).sum() / hit.sum())
+        assert result["recall"][i] == pytest.approx((hit & positives).sum() / positives.sum())
+
+
+def test_match_volume_agrees_with_matcher():
+    frames, queries, _ = fixture_dataset(["sf"], n_queries=3, dim=16)
+    report = calibrate(frames, queries, thresholds=[0.5, 0.8, 0.9])
+    for row in report:
+        for t, count in zip(row["sweep"]["thresholds"], row["sweep"]["matches"]):
+            qe = [dict(q, threshold=t) for q in queries if q["label"] == row["label"]]
+            assert len(find_matches_batch(frames, qe, t)) == count
+
+
+def test_fixture_calibration_reaches_target_precision():
+    frames, queries, truth = fixture_dataset(["sf", "tokyo"], n_queries=4, dim=32)
+    report = calibrate(frames, queries, truth, target_precision=0.9)
+    for row in report:
+        assert row["precision"] >= 0.9
+        assert row["recall"] > 0
+        assert 0 < row["suggested_threshold"] < 1
+
+
+def test_volume_only_calibration_respects_rate():
+    frames, queries, _ = fixture_dataset(["sf"], n_queries=3, dim=16)
+    report = calibrate(frames, queries, target_rate=50)
+    for row in report:
+        assert row["matches_per_1000"] <= 50
+        assert "precision" not in row
+
+
+def test_calibrated_queries_format(tmp_path):
+    frames, queries, truth = fixture_dataset(["sf"], n_queries=2, dim=16)
+    report = calibrate(frames, queries, truth)
+    updated = calibrated_queries(queries, report)
+    assert [q["label"] for q in updated] == [q["label"] for q in queries]
+    assert [q["threshold"] for q in updated] == [r["suggested_threshold"] for r in report]
+    assert updated[0]["embedding"] == queries[0]["embedding"]
+
+
+def test_score_matrix_shape_and_range():
+    frames, queries, _ = fixture_dataset(["sf"], n_queries=2, dim=16)
+    scores = score_matrix(frames, queries)
+    assert scores.shape == (len(frames), len(queries))
+    assert np.all(np.abs(scores) <= 1 + 1e-9)
+
+
+def test_load_truth(tmp_path):
+    path = tmp_path / "truth.json"
+    path.write_text(json.dumps({"a.jpg": ["sign", "hydrant"], "b.jpg": "sign"}))
+    assert load_truth(str(path)) == {"sign": {"a.jpg", "b.jpg"}, "hydrant": {"a.jpg"}}
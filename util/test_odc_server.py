@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import beeutil.embeddings as embeddings
+import beeutil.image_cache as image_cache
+import beeutil.recordings as recordings
+from util.odc_server import parse_frame_name, serve_in_thread
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault("fixtures", ["sf"])
+        kwargs.setdefault("embedding_dim", 16)
+        server = serve_in_thread(**kwargs)
+        servers.append(server)
+        monkeypatch.setattr(embeddings, "ODC_API_BASE", f"{server.url}/api/1")
+        monkeypatch.setattr(recordings, "ODC_API_BASE", f"{server.url}/api/1")
+        monkeypatch.setattr(image_cache, "CACHE_ROUTE", f"{server.url}/cache")
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_parse_frame_name():
+    assert parse_frame_name("1765835621771_37.79_-122.39.jpg") == (1765835621771, 37.79, -122.39)
+
+
+def test_list_contents_since_is_exclusive(standin):
+    server = standin()
+    names = image_cache.list_contents()
+    assert len(names) == len(server.frames)
+    assert names == sorted(names)
+
+    cursor = names[9].split("_")[0]
+    assert image_cache.list_contents(since=cursor) == names[10:]
+    assert image_cache.list_contents(until=cursor) == names[:10]
+
+
+def test_page_size_limits_lists(standin):
+    standin(page_size=7)
+    assert len(image_cache.list_contents()) == 7
+    assert len(embeddings.list_embeddings()) == 7
+
+
+def test_fetch_and_match_finds_synthetic_scenes(standin):
+    server = standin()
+    qe = embeddings.load_query_embeddings("my-plugin")
+    assert qe
+
+    matches, cursor = embeddings.fetch_and_match(0, qe, default_threshold=0.8)
+    assert cursor == server.frames[-1]["time"]
+    assert {m["label"] for m in matches} >= {qe[0]["label"]}
+
+
+def test_recordings_segments(standin):
+    server = standin()
+    start = server.frames[0]["time"]
+    videos = recordings.get_videos_by_timerange(start, start + 30000)
+    assert len(videos) in (3, 4)
+    assert videos[0]["filename"].endswith(".mp4")
+
+
+def test_error_injection(standin):
+    standin(error_rate=1.0)
+    with pytest.raises(embeddings.EmbeddingsError, match="503"):
+        embeddings.list_embeddings()
+
+
+def test_uploads_and_files_are_served(standin):
+    server = standin()
+    handle = server.frames[0]["name"]
+    image_cache.upload_to_s3("session", handle, "bucket", "us-west-2", "secret", "key")
+
+    stats = requests.get(f"{server.url}/__stats").json()
+    assert stats["uploads"][0]["handle"] == handle
+    assert stats["requests"]["/cache/uploadS3/" + handle] == 1
+
+    sidecar = requests.get(f"{server.url}/cache/{handle[:-4]}.json").json()
+    assert sidecar["time"] == server.frames[0]["time"]
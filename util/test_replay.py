@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from util.replay import ReplayStandIn, replay_offsets, run_replay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_replay_offsets_clip_long_gaps():
+    assert replay_offsets([1000, 2000, 60000, 61000], max_gap_ms=5000) == [0, 1000, 6000, 7000]
+
+
+def test_frames_become_visible_with_clock():
+    clock = FakeClock()
+    server = ReplayStandIn(
+        address=("127.0.0.1", 0), fixtures=["sf"], speed=2.0, clock=clock, embedding_dim=4
+    )
+    try:
+        assert len(server.visible_frames()) == 0
+        server.start_replay()
+        assert len(server.visible_frames()) == 1
+
+        clock.now += (server.offsets[5] + 1) / 1000 / 2.0
+        assert len(server.visible_frames()) == 6
+
+        clock.now += server.duration_s
+        assert len(server.visible_frames()) == len(server.frames)
+    finally:
+        server.server_close()
+
+
+def _uploader(stop, delay_s):
+    def entry():
+        base = os.environ["BEE_ODC_HOST"]
+        last = None
+        while not stop.is_set():
+            params = {"since": last} if last else {}
+            try:
+                for handle in requests.get(f"{base}/cache/list", params=params).json():
+                    requests.post(f"{base}/cache/uploadS3/{handle}?prefix=replay")
+                    last = handle.split("_")[0]
+                    time.sleep(delay_s)
+            except requests.ConnectionError:
+                return
+            time.sleep(0.01)
+
+    return entry
+
+
+def test_fast_plugin_keeps_up():
+    stop = threading.Event()
+    try:
+        report = run_replay(
+            _uploader(stop, 0.0),
+            drain_s=0.3,
+            sample_interval_s=0.05,
+            fixtures=["sf"],
+            speed=200.0,
+            max_gap_ms=1000,
+            embedding_dim=4,
+        )
+    finally:
+        stop.set()
+
+    assert report["frames_captured"] == report["frames_uploaded"]
+    assert report["backlog_final"] == 0
+    assert report["latency_s"]["p50"] < 0.5
+
+
+def test_slow_plugin_falls_behind():
+    stop = threading.Event()
+    try:
+        report = run_replay(
+            _uploader(stop, 0.05),
+            drain_s=0.0,
+            sample_interval_s=0.05,
+            fixtures=["sf"],
+            speed=200.0,
+            max_gap_ms=1000,
+            embedding_dim=4,
+        )
+    finally:
+        stop.set()
+
+    assert report["backlog_final"] > 0
+    assert report["backlog_growth_fps"] > 0
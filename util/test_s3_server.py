@@ -0,0 +1,160 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import beeutil.resilience as resilience
+import beeutil.s3 as s3
+from beeutil.s3 import MIN_PART_SIZE, S3Error, S3Uploader
+from util.s3_server import serve_in_thread
+
+ACCESS_KEY = "test-key"
+SECRET_KEY = "test-secret"
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    monkeypatch.setattr(resilience, "BACKOFF_BASE_S", 0.0)
+    monkeypatch.setattr(resilience, "BACKOFF_CAP_S", 0.0)
+    resilience.reset()
+    server = serve_in_thread(access_key=ACCESS_KEY, secret_key=SECRET_KEY)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _uploader(server, **kwargs):
+    kwargs.setdefault("part_size", MIN_PART_SIZE)
+    return S3Uploader("bucket", "us-east-1", ACCESS_KEY, SECRET_KEY, endpoint=server.url, **kwargs)
+
+
+def _write(path, size, seed=0):
+    data = (bytes(range(seed, 251)) + bytes(range(seed))) * (size // 251 + 1)
+    data = data[:size]
+    with open(path, "wb") as f:
+        f.write(data)
+    return data
+
+
+def test_small_file_single_put(standin, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    data = _write(cache_dir / "1000_37.0_-122.0.jpg", 4096)
+    uploader = _uploader(standin)
+    etag = uploader.upload_handle("session", "1000_37.0_-122.0.jpg", cache_dir=str(cache_dir))
+    stored = standin.objects[("bucket", "session/1000_37.0_-122.0.jpg")]
+    assert stored["data"] == data
+    assert etag == stored["etag"]
+    assert standin.stats == {"PUT object": 1}
+    uploader.close()
+
+
+def test_multipart_parallel_parts(standin, tmp_path):
+    path = tmp_path / "video.mp4"
+    data = _write(path, 2 * MIN_PART_SIZE + 1234)
+    uploader = _uploader(standin, multipart_threshold=MIN_PART_SIZE, workers=3)
+    etag = uploader.upload_file(str(path), "videos/1.mp4")
+    assert standin.objects[("bucket", "videos/1.mp4")]["data"] == data
+    assert etag.endswith('-3"')
+    assert standin.stats["PUT part"] == 3
+    assert standin.uploads == {}
+    uploader.close()
+
+
+def test_bad_credentials_rejected(standin, tmp_path):
+    path = tmp_path / "a.jpg"
+    _write(path, 10)
+    uploader = S3Uploader("bucket", "us-east-1", ACCESS_KEY, "wrong", endpoint=standin.url)
+    with pytest.raises(S3Error, match="SignatureDoesNotMatch") as e:
+        uploader.upload_file(str(path), "a.jpg")
+    assert e.value.code == "SignatureDoesNotMatch"
+    uploader.close()
+
+
+def test_retries_transient_part_errors(standin, tmp_path, monkeypatch):
+    path = tmp_path / "video.mp4"
+    data = _write(path, MIN_PART_SIZE + 10)
+    calls = []
+    real = requests.Session.request
+
+    def flaky(self, method, url, **kwargs):
+        calls.append(url)
+        if "partNumber=2" in url and calls.count(url) == 1:
+            raise requests.ConnectionError("reset")
+        return real(self, method, url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "request", flaky)
+    uploader = _uploader(standin, multipart_threshold=MIN_PART_SIZE)
+    uploader.upload_file(str(path), "v.mp4")
+    assert standin.objects[("bucket", "v.mp4")]["data"] == data
+    uploader.close()
+
+
+def test_resumes_interrupted_upload(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 0)
+    path = tmp_path / "video.mp4"
+    data = _write(path, 3 * MIN_PART_SIZE)
+    state_dir = str(tmp_path / "state")
+
+    standin.fail_parts = {3}
+    first = _uploader(standin, multipart_threshold=MIN_PART_SIZE, state_dir=state_dir)
+    with pytest.raises(S3Error, match="503"):
+        first.upload_file(str(path), "v.mp4")
+    first.close()
+    assert len(os.listdir(state_dir)) == 1
+
+    standin.fail_parts = set()
+    standin.stats.clear()
+    second = _uploader(standin, multipart_threshold=MIN_PART_SIZE, state_dir=state_dir)
+    second.upload_file(str(path), "v.mp4")
+    assert standin.objects[("bucket", "v.mp4")]["data"] == data
+    assert standin.stats == {"PUT part": 1, "POST multipart": 1}
+    assert os.listdir(state_dir) == []
+    second.close()
+
+
+def test_restarts_when_saved_upload_is_gone(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 0)
+    path = tmp_path / "video.mp4"
+    data = _write(path, 2 * MIN_PART_SIZE)
+    state_dir = str(tmp_path / "state")
+
+    standin.fail_parts = {2}
+    first = _uploader(standin, multipart_threshold=MIN_PART_SIZE, state_dir=state_dir)
+    with pytest.raises(S3Error, match="503"):
+        first.upload_file(str(path), "v.mp4")
+    standin.uploads.clear()  # expired server-side
+
+    standin.fail_parts = set()
+    first.upload_file(str(path), "v.mp4")
+    assert standin.objects[("bucket", "v.mp4")]["data"] == data
+    first.close()
+
+
+@pytest.mark.parametrize(
+    "saved", ['{"path": "video.mp4", "size": 1', '{"path": "elsewhere.mp4", "size": 1}', "[]"]
+)
+def test_restarts_from_corrupt_state_file(standin, tmp_path, saved):
+    path = tmp_path / "video.mp4"
+    data = _write(path, 2 * MIN_PART_SIZE)
+    state_dir = tmp_path / "state"
+    state_dir.mkdir()
+    uploader = _uploader(standin, multipart_threshold=MIN_PART_SIZE, state_dir=str(state_dir))
+    with open(uploader._state_path("v.mp4"), "w") as f:
+        f.write(saved)
+
+    uploader.upload_file(str(path), "v.mp4")
+    assert standin.objects[("bucket", "v.mp4")]["data"] == data
+    assert os.listdir(state_dir) == []
+    uploader.close()
+
+
+def test_endpoint_from_environment(standin, monkeypatch):
+    monkeypatch.setattr(s3, "S3_ENDPOINT", standin.url)
+    uploader = S3Uploader("bucket", "us-east-1", ACCESS_KEY, SECRET_KEY)
+    assert uploader.url("k").startswith(f"{standin.url}/bucket/")
+    uploader.close()